@@ -5,11 +5,15 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, QPushButton,
     QComboBox, QSlider, QTextEdit, QHBoxLayout, QSpinBox,
-    QMessageBox, QTabWidget, QTableWidget, QTableWidgetItem
+    QMessageBox, QTabWidget, QTableView, QProgressBar
 )
-from config import SLIDER_CONFIG
-from data_loader import load_data
-from model_trainer import ModelTrainer
+from config import CSV_PATHS, DATA_CACHE_CONFIG, SLIDER_CONFIG
+from data_loader import load_data, load_table
+from feature_store import ClientFeatureStore
+from gui_models import DataFrameTableModel
+from gui_workers import CampaignWorker, TrainingWorker
+from model_registry import ModelRegistry
+from offer_catalog import diff_offers
 from recommendation_engine import RecommendationSystem
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -20,9 +24,16 @@ except Exception as e:
     logging.error("Грешка при зареждане на данните: %s", e)
     sys.exit(1)
 
-trainer = ModelTrainer(clients, offers, history)
-model, scaler = trainer.train_model()
-recommender = RecommendationSystem(model, scaler, offers)
+# историческите признаци на клиентите за оценяване на кампанията
+feature_store = ClientFeatureStore.from_history(history, offers)
+
+# обучен модел за същите данни и MODEL_CONFIG се зарежда от регистъра;
+# иначе MainWindow го обучава във фонов режим
+registry = ModelRegistry()
+model_key = registry.fingerprint()
+linear_scorer = registry.load_scorer(model_key)
+if linear_scorer is not None:
+    logging.info("Моделът е зареден от регистъра (%s)", model_key)
 
 class MainWindow(QWidget):
     def __init__(self):
@@ -34,8 +45,68 @@ class MainWindow(QWidget):
         main_layout.addWidget(self.tabs)
         self._build_single_tab()
         self._build_campaign_tab()
+
+        h = QHBoxLayout()
+        self.model_status = QLabel()
+        h.addWidget(self.model_status)
+        self.retrain_button = QPushButton("Обучи модела наново")
+        self.retrain_button.clicked.connect(self.start_training)
+        h.addWidget(self.retrain_button)
+        self.reload_offers_button = QPushButton("Презареди офертите")
+        self.reload_offers_button.clicked.connect(self.reload_offers)
+        self.reload_offers_button.setEnabled(False)
+        h.addWidget(self.reload_offers_button)
+        main_layout.addLayout(h)
         self.setLayout(main_layout)
 
+        self.recommender = None
+        self.training_worker = None
+        if linear_scorer is not None:
+            self.on_model_ready(linear_scorer)
+        else:
+            self.start_training()
+
+    def start_training(self):
+        if self.training_worker is not None and self.training_worker.isRunning():
+            return
+        self.model_status.setText("Моделът се обучава...")
+        self.retrain_button.setEnabled(False)
+        if self.recommender is None:
+            self.single_button.setEnabled(False)
+            self.campaign_button.setEnabled(False)
+        self.training_worker = TrainingWorker(registry, model_key, clients, offers, history, self)
+        self.training_worker.trained.connect(self.on_model_ready)
+        self.training_worker.failed.connect(self.on_training_failed)
+        self.training_worker.start()
+
+    def on_model_ready(self, scorer):
+        # след ново обучение каталогът остава с досегашните промени
+        current_offers = self.recommender.offers if self.recommender is not None else offers
+        self.recommender = RecommendationSystem(scorer, None, current_offers, feature_store)
+        self.model_status.setText(f"Модел: {model_key}")
+        self.retrain_button.setEnabled(True)
+        self.reload_offers_button.setEnabled(True)
+        self.single_button.setEnabled(True)
+        self.campaign_button.setEnabled(True)
+
+    def reload_offers(self):
+        """Прочита offers наново и прилага само разликите – без рестарт и без ново обучение."""
+        try:
+            new_offers = load_table(CSV_PATHS['offers'], DATA_CACHE_CONFIG['enabled'])
+            add, update, retire = diff_offers(self.recommender.offers, new_offers)
+            change = self.recommender.apply_catalog_delta(add, update, retire)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Грешка при презареждане на офертите: {e}")
+            return
+        self.model_status.setText(
+            f"Модел: {model_key} | каталог v{change.version}: +{len(change.added)} нови, "
+            f"{len(change.updated)} променени, -{len(change.retired)} премахнати")
+
+    def on_training_failed(self, message):
+        self.model_status.setText("Обучението е неуспешно.")
+        self.retrain_button.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Грешка при обучение на модела: {message}")
+
     def _build_single_tab(self):
         self.single_tab = QWidget()
         layout = QVBoxLayout()
@@ -124,12 +195,28 @@ class MainWindow(QWidget):
         self.campaign_budget_spin.setValue(50_000)
         layout.addWidget(self.campaign_budget_spin)
 
+        h = QHBoxLayout()
         self.campaign_button = QPushButton("Optimize Campaign")
         self.campaign_button.clicked.connect(self.on_campaign_optimize)
-        layout.addWidget(self.campaign_button)
-
-        self.campaign_results = QTableWidget()
+        h.addWidget(self.campaign_button)
+        self.campaign_cancel_button = QPushButton("Cancel")
+        self.campaign_cancel_button.setEnabled(False)
+        self.campaign_cancel_button.clicked.connect(self.on_campaign_cancel)
+        h.addWidget(self.campaign_cancel_button)
+        layout.addLayout(h)
+
+        self.campaign_phase = QLabel("")
+        layout.addWidget(self.campaign_phase)
+        self.campaign_progress = QProgressBar()
+        self.campaign_progress.setRange(0, 1)
+        self.campaign_progress.setValue(0)
+        layout.addWidget(self.campaign_progress)
+
+        self.campaign_model = DataFrameTableModel()
+        self.campaign_results = QTableView()
+        self.campaign_results.setModel(self.campaign_model)
         layout.addWidget(self.campaign_results)
+        self.campaign_worker = None
 
         self.campaign_tab.setLayout(layout)
         self.tabs.addTab(self.campaign_tab, "Campaign Optimization")
@@ -146,7 +233,7 @@ class MainWindow(QWidget):
             'preferred_category': self.category_select.currentData(),
             'budget': self.budget_slider.value()
         }
-        rec = recommender.get_recommendations(client)
+        rec = self.recommender.get_recommendations(client)
         if rec is None or rec.empty:
             self.single_results.setText("Няма подходяща оферта.")
             return
@@ -160,23 +247,59 @@ class MainWindow(QWidget):
         )
         self.single_results.setText(text)
 
+    CAMPAIGN_PHASES = {
+        'eligibility': "Допустимост",
+        'scoring': "Оценяване",
+        'model': "Построяване на модела",
+        'solve': "Решаване",
+    }
+
     def on_campaign_optimize(self):
+        if self.campaign_worker is not None and self.campaign_worker.isRunning():
+            return
         total_budget = self.campaign_budget_spin.value()
-        assignments = recommender.optimize_campaign(clients, total_budget)
+        self.campaign_model.set_frame(None)
+        self.campaign_button.setEnabled(False)
+        self.campaign_cancel_button.setEnabled(True)
+        self.campaign_worker = CampaignWorker(self.recommender, clients, total_budget, self)
+        self.campaign_worker.progress.connect(self.on_campaign_progress)
+        self.campaign_worker.finished_ok.connect(self.on_campaign_done)
+        self.campaign_worker.cancelled.connect(self.on_campaign_cancelled)
+        self.campaign_worker.failed.connect(self.on_campaign_failed)
+        self.campaign_worker.start()
+
+    def on_campaign_cancel(self):
+        if self.campaign_worker is not None:
+            self.campaign_worker.requestInterruption()
+            self.campaign_cancel_button.setEnabled(False)
+            self.campaign_phase.setText("Прекъсване...")
+
+    def on_campaign_progress(self, phase, done, total):
+        self.campaign_phase.setText(self.CAMPAIGN_PHASES.get(phase, phase))
+        self.campaign_progress.setRange(0, max(total, 1))
+        self.campaign_progress.setValue(done)
+
+    def _campaign_finished(self, message):
+        self.campaign_phase.setText(message)
+        self.campaign_button.setEnabled(True)
+        self.campaign_cancel_button.setEnabled(False)
+
+    def on_campaign_done(self, assignments):
         if assignments is None or assignments.empty:
+            self._campaign_finished("")
             QMessageBox.information(self, "Result", "No assignments found under this budget.")
             return
-
-        df = assignments
-        self.campaign_results.clear()
-        self.campaign_results.setRowCount(len(df))
-        self.campaign_results.setColumnCount(len(df.columns))
-        self.campaign_results.setHorizontalHeaderLabels(df.columns.tolist())
-        for i, row in df.iterrows():
-            for j, col in enumerate(df.columns):
-                item = QTableWidgetItem(str(row[col]))
-                self.campaign_results.setItem(i, j, item)
+        self.campaign_model.set_frame(assignments)
         self.campaign_results.resizeColumnsToContents()
+        solve = assignments.attrs.get('solve', {})
+        self._campaign_finished(f"{len(assignments)} назначения ({solve.get('status', '')})")
+
+    def on_campaign_cancelled(self):
+        self._campaign_finished("Оптимизацията е прекъсната.")
+
+    def on_campaign_failed(self, message):
+        self._campaign_finished("Оптимизацията е неуспешна.")
+        QMessageBox.critical(self, "Грешка", message)
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
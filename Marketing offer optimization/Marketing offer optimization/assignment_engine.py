@@ -0,0 +1,193 @@
+import time
+
+import numpy as np
+
+from knapsack_heuristic import lagrangian_assignment
+
+
+def _exact_reduction(problem, reduced: np.ndarray):
+    """
+    Кандидатите с положителна редуцирана оценка, които могат да са в оптимума, и маска
+    кои от тях са на оферта с ограничаващ капацитет. Капацитет, не по-малък от броя на
+    кандидатите за офертата, не ограничава. За всеки клиент остават кандидатите по
+    намаляваща оценка до първата неограничена оферта включително – тя е винаги
+    достъпна, така че по-слабите от нея не се избират.
+    """
+    cand = np.flatnonzero(reduced > 0)
+    if len(cand) == 0:
+        return cand, np.zeros(0, dtype=bool)
+    demand = np.bincount(problem.offer_codes[cand], minlength=len(problem.capacities))
+    binding = demand > problem.capacities
+    order = cand[np.lexsort((-reduced[cand], problem.client_codes[cand]))]
+    clients = problem.client_codes[order]
+    unbound = ~binding[problem.offer_codes[order]]
+    starts = np.flatnonzero(np.r_[True, clients[1:] != clients[:-1]])
+    # брой неограничени оферти преди позицията в групата на клиента
+    cum = np.cumsum(unbound) - unbound
+    before = cum - np.repeat(cum[starts], np.diff(np.r_[starts, len(order)]))
+    cand = np.sort(order[before == 0])
+    return cand, binding[problem.offer_codes[cand]]
+
+
+def transport_assignment(problem, lam: float):
+    """
+    Задачата без бюджет при цена lam на бюджета: max sum (score - lam * price) x при най-много
+    1 оферта на клиент и до capacity на оферта. Матрицата е на двуделен граф (напълно
+    унимодулярна), затова базисното LP решение (dual simplex) е цяло.
+    Връща избора и стойността на целевата функция.
+    """
+    reduced = problem.scores - lam * problem.prices
+    cand, capped = _exact_reduction(problem, reduced)
+    selected = np.zeros(problem.n_vars, dtype=bool)
+    if not capped.any():
+        # нито един капацитет не ограничава: всеки клиент взема единствения си кандидат
+        selected[cand] = True
+        return selected, float(reduced[cand].sum())
+
+    # клиентите само с един кандидат без ограничение не влизат в LP
+    clients = problem.client_codes[cand]
+    contested = np.zeros(problem.n_clients, dtype=bool)
+    contested[clients[capped]] = True
+    in_lp = contested[clients]
+    selected[cand[~in_lp]] = True
+    value = float(reduced[cand[~in_lp]].sum())
+    cand, capped, clients = cand[in_lp], capped[in_lp], clients[in_lp]
+
+    from scipy import sparse
+    from scipy.optimize import linprog
+
+    n = len(cand)
+    cols = np.arange(n)
+    _, client_rows = np.unique(clients, return_inverse=True)
+    capped_offers, offer_rows = np.unique(problem.offer_codes[cand][capped], return_inverse=True)
+    n_clients = client_rows.max() + 1
+    A = sparse.vstack([
+        sparse.csr_matrix((np.ones(n), (client_rows, cols)), shape=(n_clients, n)),
+        sparse.csr_matrix((np.ones(capped.sum()), (offer_rows, cols[capped])), shape=(len(capped_offers), n)),
+    ], format='csr')
+    b = np.concatenate([np.ones(n_clients), np.floor(problem.capacities[capped_offers])])
+    res = linprog(-reduced[cand], A_ub=A, b_ub=b, bounds=(0, 1), method='highs-ds')
+    if res.x is None:
+        raise RuntimeError(f"Транспортната задача не е решена: {res.message}")
+    picked = cand[res.x > 0.5]
+    selected[picked] = True
+    return selected, value + float(reduced[picked].sum())
+
+
+def greedy_repair(problem, selected: np.ndarray, max_rounds: int = 5) -> np.ndarray:
+    """
+    Използва остатъка от бюджета като knapsack_heuristic.greedy_repair – на всеки клиент
+    най-изгодното подобрение (нова оферта или по-добра замяна) по намаляващо съотношение
+    печалба / допълнителна цена – но само към оферти с оставащ капацитет.
+    """
+    current = np.full(problem.n_clients, -1, dtype=np.int64)
+    current[problem.client_codes[selected]] = np.flatnonzero(selected)
+    stock = problem.capacities - np.bincount(problem.offer_codes[selected], minlength=len(problem.capacities))
+
+    for _ in range(max_rounds):
+        remaining = problem.total_budget - problem.prices[current[current >= 0]].sum()
+        chosen = current[problem.client_codes]
+        has_current = chosen >= 0
+        gain = problem.scores - np.where(has_current, problem.scores[np.maximum(chosen, 0)], 0.0)
+        extra = problem.prices - np.where(has_current, problem.prices[np.maximum(chosen, 0)], 0.0)
+
+        cand = np.flatnonzero((gain > 1e-12) & (extra <= remaining) & (stock[problem.offer_codes] >= 1))
+        if len(cand) == 0:
+            break
+        ratio = np.where(extra[cand] > 0, gain[cand] / np.maximum(extra[cand], 1e-12), np.inf)
+        cand = cand[np.lexsort((-gain[cand], -ratio))]
+        # по едно подобрение на клиент – първото с най-добро съотношение печалба / цена
+        _, first = np.unique(problem.client_codes[cand], return_index=True)
+        cand = cand[np.sort(first)]
+
+        changed = False
+        for i in cand.tolist():
+            client, offer = problem.client_codes[i], problem.offer_codes[i]
+            if extra[i] > remaining or stock[offer] < 1:
+                continue
+            if current[client] >= 0:
+                stock[problem.offer_codes[current[client]]] += 1
+            stock[offer] -= 1
+            remaining -= extra[i]
+            current[client] = i
+            changed = True
+        if not changed:
+            break
+    repaired = np.zeros(problem.n_vars, dtype=bool)
+    repaired[current[current >= 0]] = True
+    return repaired
+
+
+def solve_flow_lagrangian(problem, max_iter: int = 40, tol: float = 1e-2, lam_hint: float = None,
+                          time_limit: float = None):
+    """
+    Бисекция по цената lam на бюджета около transport_assignment; остатъкът от бюджета
+    след нея се използва от greedy_repair, затова точност 1% по lam е достатъчна. Без lam_hint
+    търсенето започва от lam на задачата без капацитет (евтина за решаване).
+    Връща (избор, lam, горна граница min L(lam), статус): 'heuristic' или 'time_limit'.
+    """
+    started = time.perf_counter()
+    budget = problem.total_budget
+    evaluations = {}
+
+    def evaluate(lam):
+        selected, value = transport_assignment(problem, lam)
+        evaluations[lam] = lam * budget + value
+        return selected, problem.prices[selected].sum() <= budget
+
+    def out_of_time():
+        return time_limit is not None and time.perf_counter() - started > time_limit
+
+    # при lam = 0 са положителни всички кандидати и транспортната задача е най-голяма –
+    # решава се само ако бюджетът би стигнал дори за най-скъпия кандидат на всеки клиент
+    positive = problem.scores > 0
+    most_expensive = np.zeros(problem.n_clients)
+    np.maximum.at(most_expensive, problem.client_codes[positive], problem.prices[positive])
+    if most_expensive.sum() <= budget:
+        selected, _ = evaluate(0.0)
+        return selected, 0.0, evaluations[0.0], 'heuristic'
+
+    positive &= problem.prices > 0
+    lo = 0.0
+    hi = float((problem.scores[positive] / problem.prices[positive]).max()) if positive.any() else 0.0
+    best, _ = evaluate(hi)
+    if lam_hint is None:
+        _, _, lam_hint, _ = lagrangian_assignment(problem)
+
+    if lo < lam_hint < hi:
+        # интервал около подсказката: стъпка 5% от нея, удвоявана
+        step = 0.05 * lam_hint
+        picks, feasible = evaluate(lam_hint)
+        if feasible:
+            hi, best = lam_hint, picks
+            while hi - step > lo:
+                picks, feasible = evaluate(hi - step)
+                if not feasible:
+                    lo = hi - step
+                    break
+                hi, best = hi - step, picks
+                step *= 2
+        else:
+            lo = lam_hint
+            while lo + step < hi:
+                picks, feasible = evaluate(lo + step)
+                if feasible:
+                    hi, best = lo + step, picks
+                    break
+                lo += step
+                step *= 2
+
+    status = 'heuristic'
+    for _ in range(max_iter):
+        if hi - lo <= tol * hi:
+            break
+        if out_of_time():
+            status = 'time_limit'
+            break
+        mid = 0.5 * (lo + hi)
+        picks, feasible = evaluate(mid)
+        if feasible:
+            hi, best = mid, picks
+        else:
+            lo = mid
+    return greedy_repair(problem, best), hi, min(evaluations.values()), status
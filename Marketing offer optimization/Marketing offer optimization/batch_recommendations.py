@@ -0,0 +1,124 @@
+import logging
+import multiprocessing
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import BATCH_CONFIG
+from features import feature_matrix
+from scoring import combined_score, predict_propensity
+
+logger = logging.getLogger(__name__)
+
+# Състоянието на пакетната задача в работния процес. Задава го _init_worker от initargs
+# на пула: при 'fork' те се наследяват, без да се сериализират, а всеки пул има свои процеси,
+# така че едновременни пакети от различни нишки не си пречат.
+_BATCH_STATE = None
+
+RESULT_COLUMNS = ['client_id', 'rank', 'offer_id', 'offer_name', 'price', 'category',
+                  'propensity', 'combined_score']
+
+
+def top_n_per_client(client_pos: np.ndarray, offer_pos: np.ndarray, scores: np.ndarray, top_n: int):
+    """
+    Индексите на до top_n двойки с най-висок score за всеки клиент и ранга им (0 = най-добра).
+    Както rank_top_n: NaN се приема за -inf, а при равенство печели по-ранната оферта.
+    """
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+    order = np.lexsort((offer_pos, -scores, client_pos))
+    sorted_clients = client_pos[order]
+    group_start = np.flatnonzero(np.r_[True, sorted_clients[1:] != sorted_clients[:-1]])
+    group_size = np.diff(np.r_[group_start, len(order)])
+    rank = np.arange(len(order)) - np.repeat(group_start, group_size)
+    keep = rank < top_n
+    return order[keep], rank[keep]
+
+
+def recommend_shard(system, clients: pd.DataFrame, budgets: np.ndarray, top_n: int,
+                    catalog=None) -> pd.DataFrame:
+    """
+    Препоръките за група клиенти с общи векторизирани стъпки: допустимост, признаци,
+    едно извикване на модела и избор на top_n по клиент. Без ограничения за марка и категория.
+    catalog е версията на каталога (по подразбиране текущата).
+    """
+    catalog = catalog or system.catalog.snapshot()
+    offers = catalog.offers
+    parts = []
+    for client_pos, offer_pos in catalog.eligibility.eligible_pairs(clients, budgets):
+        if len(client_pos) == 0:
+            continue
+        c = clients.iloc[client_pos]
+        offer = offers.iloc[offer_pos]
+        history = system.history_features(c['client_id'].to_numpy()) if 'client_id' in c.columns else {}
+        fv = feature_matrix(c['age'], c['income'], c['previous_purchases'], offer['price'], **history)
+        prop = predict_propensity(system.model, fv)
+        cs = combined_score(prop, offer['price'], offer['estimated_profit'],
+                            budgets[client_pos], catalog.max_profit)
+
+        chosen, rank = top_n_per_client(client_pos, offer_pos, cs, top_n)
+        c = c.iloc[chosen]
+        offer = offer.iloc[chosen]
+        parts.append(pd.DataFrame({
+            'client_id':      c['client_id'].to_numpy() if 'client_id' in c.columns else c.index.to_numpy(),
+            'rank':           rank,
+            'offer_id':       offer['offer_id'].to_numpy(),
+            'offer_name':     offer['offer_name'].to_numpy(),
+            'price':          offer['price'].to_numpy(),
+            'category':       offer['category'].to_numpy(),
+            'propensity':     prop[chosen],
+            'combined_score': cs[chosen]
+        }))
+    if not parts:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    return pd.concat(parts, ignore_index=True)
+
+
+def _init_worker(state):
+    global _BATCH_STATE
+    _BATCH_STATE = state
+
+
+def _run_shard(bounds):
+    system, clients, budgets, top_n, catalog = _BATCH_STATE
+    start, stop = bounds
+    return recommend_shard(system, clients.iloc[start:stop], budgets[start:stop], top_n, catalog)
+
+
+def _resolve_jobs(n_jobs, n_shards: int) -> int:
+    if n_jobs is None:
+        n_jobs = BATCH_CONFIG['n_jobs']
+    if n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    return max(1, min(n_jobs, n_shards))
+
+
+def iter_batch_recommendations(system, clients: pd.DataFrame, budgets=None, top_n: int = 1,
+                               n_jobs: int = None, shard_size: int = None):
+    """
+    Генерира DataFrame с препоръките за всеки shard_size клиента, в реда на clients.
+    С n_jobs > 1 групите се обработват паралелно в процеси, създадени с 'fork';
+    без 'fork' (напр. Windows) всичко върви в текущия процес. Целият пакет ползва
+    версията на каталога от началото си, дори ако междувременно каталогът се промени.
+    """
+    shard_size = shard_size or BATCH_CONFIG['shard_size']
+    if budgets is None:
+        budgets = clients['budget']
+    budgets = np.broadcast_to(np.asarray(budgets, dtype=float), (len(clients),))
+    shards = [(start, min(start + shard_size, len(clients)))
+              for start in range(0, len(clients), shard_size)]
+    catalog = system.catalog.snapshot()
+
+    n_jobs = _resolve_jobs(n_jobs, len(shards))
+    if n_jobs > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+        logger.warning("Няма 'fork' – пакетните препоръки се смятат в един процес")
+        n_jobs = 1
+    if n_jobs == 1:
+        for start, stop in shards:
+            yield recommend_shard(system, clients.iloc[start:stop], budgets[start:stop], top_n, catalog)
+        return
+
+    state = (system, clients, budgets, top_n, catalog)
+    with multiprocessing.get_context('fork').Pool(n_jobs, initializer=_init_worker, initargs=(state,)) as pool:
+        # imap запазва реда и връща всяка група веднага щом е готова
+        yield from pool.imap(_run_shard, shards)
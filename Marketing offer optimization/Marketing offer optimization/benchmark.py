@@ -0,0 +1,230 @@
+"""
+Бенчмарк на целия процес върху генерирани данни с различен мащаб.
+
+    python benchmark.py --scales small,medium --output bench.json
+    python benchmark.py --scales small --compare baseline.json --threshold 0.2
+
+Всеки етап се мери поотделно: load_data (от CSV и от кеша), preprocess_data, train_model,
+латентност на get_recommendations (p50/p99) и optimize_campaign по фази – кандидати,
+построяване на модела и решаване. Резултатът е JSON с метаданни за средата; с --compare
+се сравнява с предишен резултат и при регресия кодът на изход е 1.
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from config import SLIDER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# clients, offers, history и колко клиенти влизат в кампанията (None = всички)
+SCALES = {
+    'tiny':   {'clients': 1_000,   'offers': 1_000,   'history': 10_000,    'campaign_clients': None},
+    'small':  {'clients': 10_000,  'offers': 1_000,   'history': 100_000,   'campaign_clients': None},
+    'medium': {'clients': 10_000,  'offers': 10_000,  'history': 1_000_000, 'campaign_clients': 2_000},
+    'large':  {'clients': 100_000, 'offers': 100_000, 'history': 5_000_000, 'campaign_clients': 1_000},
+}
+
+# метрики, по-големи от базовите с повече от threshold, са регресия; под MIN_SECONDS е шум
+MIN_SECONDS = 0.005
+
+
+def parse_scale(name: str) -> dict:
+    """Име от SCALES или '<clients>x<offers>x<history>'."""
+    if name in SCALES:
+        return dict(SCALES[name])
+    try:
+        clients, offers, history = (int(part) for part in name.lower().split('x'))
+    except ValueError:
+        raise ValueError(f"Непознат мащаб {name!r}: {sorted(SCALES)} или <clients>x<offers>x<history>")
+    return {'clients': clients, 'offers': offers, 'history': history, 'campaign_clients': None}
+
+
+def environment() -> dict:
+    versions = {}
+    for module in ('numpy', 'pandas', 'sklearn', 'scipy', 'pulp', 'joblib'):
+        try:
+            versions[module] = __import__(module).__version__
+        except Exception:
+            versions[module] = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'git_commit': commit,
+        'packages': versions,
+    }
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def dataset(scale_name: str, scale: dict, data_dir: str, seed: int) -> dict:
+    """Пътищата до генерираните данни за мащаба; генерират се само ако липсват."""
+    from generate_datas import generate
+
+    directory = os.path.join(data_dir, f"{scale['clients']}x{scale['offers']}x{scale['history']}_s{seed}")
+    paths = {name: os.path.join(directory, f"{name}.csv") for name in ('clients', 'offers', 'history')}
+    if not all(os.path.exists(p) for p in paths.values()):
+        logger.info("Генериране на данни за %s в %s", scale_name, directory)
+        generate(scale['clients'], scale['offers'], scale['history'], seed, 'csv', directory)
+    return paths
+
+
+def campaign_phases(system, clients, total_budget: float, backend: str = None) -> dict:
+    """optimize_campaign с времената на фазите от progress_callback."""
+    marks = {}
+
+    def on_progress(phase, done, total):
+        now = time.perf_counter()
+        if done == 0 and phase in ('model', 'solve'):
+            marks[f'{phase}_start'] = now
+        elif done == total and phase in ('model', 'solve'):
+            marks[f'{phase}_end'] = now
+
+    started = time.perf_counter()
+    assignments = system.optimize_campaign(clients, total_budget, backend=backend, progress_callback=on_progress)
+    finished = time.perf_counter()
+    if 'model_start' not in marks:
+        return {'campaign_total': finished - started, 'campaign_candidates': finished - started,
+                'assignments': 0}
+    solve = assignments.attrs.get('solve', {})
+    return {
+        'campaign_total': finished - started,
+        'campaign_candidates': marks['model_start'] - started,      # допустимост и оценяване
+        'campaign_model_build': (marks['model_end'] - marks['model_start']) + solve.get('build_time', 0.0),
+        'campaign_solve': solve.get('solve_time', marks['solve_end'] - marks['solve_start']),
+        'assignments': len(assignments),
+        'solve_status': solve.get('status'),
+        'objective': solve.get('objective'),
+    }
+
+
+def run_scale(scale_name: str, scale: dict, args) -> dict:
+    from data_loader import load_data
+    from feature_store import ClientFeatureStore
+    from linear_scorer import LinearScorer
+    from model_trainer import ModelTrainer
+    from recommendation_engine import RecommendationSystem
+
+    paths = dataset(scale_name, scale, args.data_dir, args.seed)
+    result = {'scale': scale}
+
+    _, result['load_data_csv'] = timed(load_data, False, paths)
+    load_data(True, paths)   # създава кеша
+    (clients, offers, history), result['load_data_cached'] = timed(load_data, True, paths)
+
+    trainer = ModelTrainer(clients, offers, history)
+    _, result['preprocess_data'] = timed(trainer.preprocess_data)
+    if args.skip_train:
+        # без обучение: фиксирани тегла, за да се мерят останалите етапи
+        from features import FEATURE_COLUMNS
+        model = LinearScorer(np.full(len(FEATURE_COLUMNS), 1e-3), 0.0)
+    else:
+        with contextlib.redirect_stdout(io.StringIO()):
+            (pipeline, _), result['train_model'] = timed(trainer.train_model, args.search)
+        model = LinearScorer.from_pipeline(pipeline)
+
+    feature_store, result['feature_store_build'] = timed(ClientFeatureStore.from_history, history, offers)
+    system = RecommendationSystem(model, None, offers, feature_store)
+
+    rng = np.random.default_rng(args.seed)
+    sample = clients.iloc[rng.choice(len(clients), size=min(args.requests, len(clients)), replace=False)]
+    latencies = []
+    for client in sample.to_dict(orient='records'):
+        client['budget'] = SLIDER_CONFIG['default']
+        _, seconds = timed(system.get_recommendations, client)
+        latencies.append(seconds)
+    result['get_recommendations_p50'] = float(np.percentile(latencies, 50))
+    result['get_recommendations_p99'] = float(np.percentile(latencies, 99))
+
+    campaign_clients = clients
+    if scale.get('campaign_clients') is not None and scale['campaign_clients'] < len(clients):
+        campaign_clients = clients.iloc[:scale['campaign_clients']]
+    result.update(campaign_phases(system, campaign_clients, args.campaign_budget, args.backend))
+    return result
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Регресиите: (мащаб, метрика, базова стойност, текуща стойност, съотношение)."""
+    regressions = []
+    for scale_name, metrics in current['results'].items():
+        base_metrics = baseline.get('results', {}).get(scale_name)
+        if base_metrics is None:
+            continue
+        for metric, value in metrics.items():
+            base = base_metrics.get(metric)
+            if not _is_timing(metric) or not isinstance(value, (int, float)) or not isinstance(base, (int, float)):
+                continue
+            if value > base * (1 + threshold) and value - base > MIN_SECONDS:
+                regressions.append((scale_name, metric, base, value, value / base if base else float('inf')))
+    return regressions
+
+
+def _is_timing(metric: str) -> bool:
+    return metric not in ('scale', 'assignments', 'solve_status', 'objective')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк на зареждане, обучение, препоръки и кампания")
+    parser.add_argument('--scales', default='tiny', help=f"{','.join(SCALES)} или <clients>x<offers>x<history>")
+    parser.add_argument('--data-dir', default='bench_data')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=200, help="заявки за латентността на get_recommendations")
+    parser.add_argument('--campaign-budget', type=float, default=50_000)
+    parser.add_argument('--backend', default=None, help="решател за кампанията (по подразбиране от SOLVER_CONFIG)")
+    parser.add_argument('--search', default=None, help="'grid', 'halving' или 'random' за train_model")
+    parser.add_argument('--skip-train', action='store_true', help="без train_model (фиксиран линеен модел)")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', default=None, help="базов JSON за сравнение")
+    parser.add_argument('--threshold', type=float, default=0.2, help="допустимо забавяне спрямо базата (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    report = {'environment': environment(), 'results': {}}
+    for scale_name in args.scales.split(','):
+        scale_name = scale_name.strip()
+        logger.info("Мащаб %s", scale_name)
+        report['results'][scale_name] = run_scale(scale_name, parse_scale(scale_name), args)
+        for metric, value in report['results'][scale_name].items():
+            if _is_timing(metric) and isinstance(value, float):
+                logger.info("  %-28s %10.4f s", metric, value)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    logger.info("Резултатите са записани в %s", args.output)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for scale_name, metric, base, value, ratio in regressions:
+            logger.warning("РЕГРЕСИЯ %s/%s: %.4f s -> %.4f s (x%.2f)", scale_name, metric, base, value, ratio)
+        if regressions:
+            sys.exit(1)
+        logger.info("Няма регресии спрямо %s (праг %.0f%%)", args.compare, 100 * args.threshold)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import collections
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+from scoring import price_score
+
+# колоните на clients, от които зависят допустимостта и признаците
+CLIENT_KEY_COLUMNS = ['client_id', 'age', 'gender', 'income', 'previous_purchases', 'preferred_category']
+
+
+class CampaignCandidates:
+    """
+    Всички допустими двойки клиент × оферта без ограничение по бюджет, с изчислена
+    склонност и частта от combined_score, която не зависи от бюджета. За конкретен
+    бюджет остава да се филтрира price <= budget и да се добави price_score.
+    Пази и последното решение, за да започне от него следващото решаване, както и
+    клиентите (с позицията на клиента за всеки ред) и версията на каталога, за да може
+    при промяна в каталога да се оценят наново само двойките с променените оферти.
+    weights са теглата на combined_score, с които е сметнат base_score (None = от конфигурацията).
+    """
+
+    def __init__(self, frame: pd.DataFrame, base_score: np.ndarray, clients: pd.DataFrame = None,
+                 client_positions: np.ndarray = None, catalog=None, weights=None):
+        self.frame = frame
+        self.base_score = np.asarray(base_score, dtype=float)
+        self.prices = frame['price'].to_numpy(dtype=float)
+        self.clients = clients
+        self.client_positions = client_positions
+        self.catalog = catalog
+        self.weights = weights
+        # последното решение: бюджет, избрани позиции (в self.frame) и lam при 'lagrangian'
+        self.last_budget = None
+        self.last_selected = None
+        self.last_lam = None
+
+    def __len__(self):
+        return len(self.frame)
+
+    def at_budget(self, budget: float):
+        """Позициите на допустимите при budget кандидати и техните combined_score."""
+        positions = np.flatnonzero(self.prices <= budget)
+        scores = self.base_score[positions] + price_score(self.prices[positions], budget, self.weights)
+        return positions, scores
+
+    def remember(self, budget: float, positions: np.ndarray, lam=None):
+        self.last_budget = float(budget)
+        self.last_selected = positions
+        self.last_lam = lam
+
+    def initial_for(self, positions: np.ndarray):
+        """Последното решение върху подмножеството positions (булев масив) или None."""
+        if self.last_selected is None:
+            return None
+        selected = np.zeros(len(self.frame), dtype=bool)
+        selected[self.last_selected] = True
+        return selected[positions]
+
+
+class CandidateCache:
+    """Няколко последни CampaignCandidates по отпечатък на клиентите, модела и признаците."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, candidates: CampaignCandidates):
+        with self._lock:
+            self.entries[key] = candidates
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def refresh(self, rebuild):
+        """
+        Заменя всеки запис с rebuild(запис); при None записът отпада. rebuild върви извън
+        заключването, а записите, заменени междувременно от put(), не се пипат.
+        """
+        with self._lock:
+            entries = list(self.entries.items())
+        for key, candidates in entries:
+            refreshed = rebuild(candidates)
+            with self._lock:
+                if self.entries.get(key) is not candidates:
+                    continue
+                if refreshed is None:
+                    del self.entries[key]
+                else:
+                    self.entries[key] = refreshed
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+
+def clients_fingerprint(clients: pd.DataFrame) -> str:
+    columns = [c for c in CLIENT_KEY_COLUMNS if c in clients.columns]
+    hashed = pd.util.hash_pandas_object(clients[columns], index=False).to_numpy()
+    return hashlib.sha1(hashed.tobytes()).hexdigest() + f":{','.join(columns)}"
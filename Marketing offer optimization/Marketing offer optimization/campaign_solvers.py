@@ -0,0 +1,385 @@
+import logging
+import time
+
+import numpy as np
+import pulp
+
+from config import SOLVER_CONFIG
+from instrumentation import metrics
+from assignment_engine import solve_flow_lagrangian
+from knapsack_heuristic import reduced_candidate_set, solve_lagrangian
+
+logger = logging.getLogger(__name__)
+
+
+class CampaignProblem:
+    """
+    Кампанията като масиви: оценка и цена за всяка двойка клиент × оферта,
+    код на клиента (не повече от 1 оферта на клиент) и общ бюджет.
+    По желание код на офертата и капацитет за всеки код (np.inf = без ограничение).
+    """
+
+    def __init__(self, scores, prices, client_codes, total_budget: float,
+                 offer_codes=None, capacities=None):
+        self.scores = np.asarray(scores, dtype=float)
+        self.prices = np.asarray(prices, dtype=float)
+        self.client_codes = np.asarray(client_codes, dtype=np.int64)
+        self.total_budget = float(total_budget)
+        self.n_vars = len(self.scores)
+        self.n_clients = int(self.client_codes.max()) + 1 if self.n_vars else 0
+        if capacities is not None and np.isfinite(capacities).any():
+            self.offer_codes = np.asarray(offer_codes, dtype=np.int64)
+            self.capacities = np.asarray(capacities, dtype=float)
+        else:
+            self.offer_codes = None
+            self.capacities = None
+
+    @property
+    def has_capacities(self) -> bool:
+        return self.capacities is not None
+
+    def capped_offers(self) -> np.ndarray:
+        """Кодовете на офертите с краен капацитет (по един ред ограничение за всяка)."""
+        return np.flatnonzero(np.isfinite(self.capacities)) if self.has_capacities else np.empty(0, dtype=np.int64)
+
+    @property
+    def n_constraints(self) -> int:
+        """Редовете на constraint_matrix: клиенти, оферти с капацитет и бюджет."""
+        return self.n_clients + len(self.capped_offers()) + 1
+
+    def constraint_matrix(self):
+        """
+        CSR матрица с един ред на клиент (sum x <= 1), по един ред на оферта с капацитет
+        (sum x <= capacity) и последен ред за бюджета, заедно с границите на редовете.
+        """
+        # scipy се зарежда при първото решаване, за да не забавя стартирането
+        from scipy import sparse
+
+        cols = np.arange(self.n_vars)
+        blocks = [sparse.csr_matrix((np.ones(self.n_vars), (self.client_codes, cols)),
+                                    shape=(self.n_clients, self.n_vars))]
+        ub = [np.ones(self.n_clients)]
+        capped = self.capped_offers()
+        if len(capped):
+            row_of = np.full(len(self.capacities), -1)
+            row_of[capped] = np.arange(len(capped))
+            rows = row_of[self.offer_codes]
+            in_row = rows >= 0
+            blocks.append(sparse.csr_matrix((np.ones(in_row.sum()), (rows[in_row], cols[in_row])),
+                                            shape=(len(capped), self.n_vars)))
+            ub.append(self.capacities[capped])
+        blocks.append(sparse.csr_matrix(self.prices.reshape(1, -1)))
+        ub.append([self.total_budget])
+        A = sparse.vstack(blocks, format='csr')
+        ub = np.concatenate(ub)
+        return A, np.full(len(ub), -np.inf), ub
+
+    def greedy_solution(self) -> np.ndarray:
+        """
+        Алчно допустимо решение: кандидатите по намаляваща оценка на единица цена,
+        всеки клиент получава първата оферта, която се побира в остатъка от бюджета.
+        """
+        density = self.scores / np.maximum(self.prices, 1e-12)
+        order = np.lexsort((-self.scores, -density))
+        selected = np.zeros(self.n_vars, dtype=bool)
+        assigned = np.zeros(self.n_clients, dtype=bool)
+        remaining = self.total_budget
+        stock = self.capacities.copy() if self.has_capacities else None
+        for i in order:
+            if self.scores[i] <= 0:
+                continue
+            client = self.client_codes[i]
+            if assigned[client] or self.prices[i] > remaining:
+                continue
+            if stock is not None:
+                if stock[self.offer_codes[i]] < 1:
+                    continue
+                stock[self.offer_codes[i]] -= 1
+            selected[i] = True
+            assigned[client] = True
+            remaining -= self.prices[i]
+        return selected
+
+    def objective(self, selected: np.ndarray) -> float:
+        return float(self.scores[selected].sum())
+
+    def is_feasible(self, selected: np.ndarray) -> bool:
+        if selected is None or len(selected) != self.n_vars:
+            return False
+        per_client = np.bincount(self.client_codes[selected], minlength=self.n_clients)
+        if per_client.max(initial=0) > 1 or self.prices[selected].sum() > self.total_budget + 1e-9:
+            return False
+        if self.has_capacities:
+            per_offer = np.bincount(self.offer_codes[selected], minlength=len(self.capacities))
+            return bool((per_offer <= self.capacities).all())
+        return True
+
+    def subset(self, keep: np.ndarray):
+        """Задачата само с кандидатите keep (клиентите се преномерират, офертите – не)."""
+        _, sub_codes = np.unique(self.client_codes[keep], return_inverse=True)
+        return CampaignProblem(self.scores[keep], self.prices[keep], sub_codes, self.total_budget,
+                               self.offer_codes[keep] if self.has_capacities else None, self.capacities)
+
+    def start_solution(self, initial: np.ndarray = None) -> np.ndarray:
+        """По-доброто допустимо начало от алчното решение и initial (напр. решението за друг бюджет)."""
+        greedy = self.greedy_solution()
+        if self.is_feasible(initial) and self.objective(initial) > self.objective(greedy):
+            return np.asarray(initial, dtype=bool)
+        return greedy
+
+
+class SolveResult:
+    def __init__(self, selected, status, objective, bound=None,
+                 backend=None, build_time=0.0, solve_time=0.0, lam=None):
+        self.selected = selected
+        # двойствената цена на бюджета (само при 'lagrangian'), за начало на съседен бюджет
+        self.lam = lam
+        self.status = status
+        self.objective = objective
+        self.bound = bound
+        self.backend = backend
+        self.build_time = build_time
+        self.solve_time = solve_time
+
+    @property
+    def gap(self):
+        if self.bound is None or self.objective is None:
+            return None
+        return abs(self.bound - self.objective) / max(abs(self.bound), 1e-12)
+
+    def as_dict(self) -> dict:
+        return {
+            'backend': self.backend,
+            'status': self.status,
+            'objective': self.objective,
+            'bound': self.bound,
+            'gap': self.gap,
+            'build_time': self.build_time,
+            'solve_time': self.solve_time,
+        }
+
+
+class HighsBackend:
+    """
+    HiGHS чрез scipy.optimize.milp; моделът се подава директно като CSR матрица.
+    scipy не приема начално решение и брой нишки, затова алчното решение служи
+    като резервен вариант, ако решателят спре без по-добро решение.
+    """
+    name = 'highs'
+
+    def solve(self, problem: CampaignProblem, time_limit=None, mip_gap=None,
+              threads=None, warm_start=True, initial=None) -> SolveResult:
+        from scipy.optimize import Bounds, LinearConstraint, milp
+
+        start = time.perf_counter()
+        A, lb, ub = problem.constraint_matrix()
+        greedy = problem.start_solution(initial) if warm_start else None
+        build_time = time.perf_counter() - start
+        if threads not in (None, 1):
+            logger.info("HiGHS през scipy ползва една нишка; threads=%s се игнорира", threads)
+
+        options = {}
+        if time_limit is not None:
+            options['time_limit'] = time_limit
+        if mip_gap is not None:
+            options['mip_rel_gap'] = mip_gap
+
+        start = time.perf_counter()
+        res = milp(c=-problem.scores,
+                   constraints=LinearConstraint(A, lb, ub),
+                   integrality=np.ones(problem.n_vars),
+                   bounds=Bounds(0, 1),
+                   options=options)
+        solve_time = time.perf_counter() - start
+
+        status = {0: 'optimal', 1: 'time_limit', 2: 'infeasible', 3: 'unbounded'}.get(res.status, 'error')
+        bound = -res.mip_dual_bound if getattr(res, 'mip_dual_bound', None) is not None else None
+        if res.x is not None:
+            selected = res.x > 0.5
+            objective = problem.objective(selected)
+        else:
+            selected, objective = None, None
+
+        if greedy is not None and (objective is None or problem.objective(greedy) > objective):
+            selected, objective = greedy, problem.objective(greedy)
+            status = 'greedy' if status != 'optimal' else status
+        if selected is None:
+            selected = np.zeros(problem.n_vars, dtype=bool)
+        return SolveResult(selected, status, objective, bound, self.name, build_time, solve_time)
+
+
+class CbcBackend:
+    """
+    CBC чрез PuLP. Изразите се строят наведнъж от масивите, с поддръжка на
+    ограничение по време, относителна разлика, нишки и начално (алчно) решение.
+    """
+    name = 'cbc'
+
+    def solve(self, problem: CampaignProblem, time_limit=None, mip_gap=None,
+              threads=None, warm_start=True, initial=None) -> SolveResult:
+        start = time.perf_counter()
+        prob = pulp.LpProblem("Campaign_Optimization", pulp.LpMaximize)
+        x = [pulp.LpVariable(f"x_{i}", cat='Binary') for i in range(problem.n_vars)]
+
+        # целева функция
+        prob += pulp.LpAffineExpression(zip(x, problem.scores.tolist()))
+        # max 1 оферта на клиент
+        order = np.argsort(problem.client_codes, kind='stable')
+        bounds = np.flatnonzero(np.diff(problem.client_codes[order])) + 1
+        for group in np.split(order, bounds):
+            prob += pulp.LpAffineExpression((x[i], 1) for i in group) <= 1
+        # капацитет на офертите
+        if problem.has_capacities:
+            order = np.argsort(problem.offer_codes, kind='stable')
+            bounds = np.flatnonzero(np.diff(problem.offer_codes[order])) + 1
+            for group in np.split(order, bounds):
+                capacity = problem.capacities[problem.offer_codes[group[0]]]
+                if np.isfinite(capacity):
+                    prob += pulp.LpAffineExpression((x[i], 1) for i in group) <= float(capacity)
+        # бюджет
+        prob += pulp.LpAffineExpression(zip(x, problem.prices.tolist())) <= problem.total_budget
+
+        if warm_start:
+            for var, value in zip(x, problem.start_solution(initial)):
+                var.setInitialValue(int(value))
+        build_time = time.perf_counter() - start
+
+        solver = pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit, gapRel=mip_gap,
+                                   threads=threads, warmStart=warm_start)
+        start = time.perf_counter()
+        prob.solve(solver)
+        solve_time = time.perf_counter() - start
+
+        status = {pulp.LpSolutionOptimal: 'optimal',
+                  pulp.LpSolutionIntegerFeasible: 'time_limit',
+                  pulp.LpSolutionInfeasible: 'infeasible',
+                  pulp.LpSolutionUnbounded: 'unbounded'}.get(prob.sol_status, 'error')
+        selected = np.array([(var.varValue or 0) > 0.5 for var in x], dtype=bool)
+        objective = problem.objective(selected)
+        # CBC не връща горна граница през PuLP; при доказан оптимум (без gap)
+        # тя съвпада с целевата стойност
+        bound = objective if status == 'optimal' and not mip_gap else None
+        return SolveResult(selected, status, objective, bound, self.name, build_time, solve_time)
+
+
+class LagrangianBackend:
+    """
+    Евристика за милиони клиенти: бисекция по двойствената цена на бюджета,
+    алчно допълване и, по желание, точно дорешаване (polish) с MILP върху
+    top-k кандидатите на клиент. Горната граница е LP границата min L(lam).
+    """
+    name = 'lagrangian'
+
+    def __init__(self, polish: bool = None, polish_top_k: int = None, polish_backend: str = None,
+                 lam_hint: float = None):
+        self.polish = polish if polish is not None else SOLVER_CONFIG['polish']
+        # начална двойствена цена (напр. от решението за съседен бюджет) – стеснява бисекцията
+        self.lam_hint = lam_hint
+        self.polish_top_k = polish_top_k or SOLVER_CONFIG['polish_top_k']
+        self.polish_backend = polish_backend or SOLVER_CONFIG['polish_backend']
+
+    def solve(self, problem: CampaignProblem, time_limit=None, mip_gap=None,
+              threads=None, warm_start=True, initial=None) -> SolveResult:
+        if problem.has_capacities:
+            # евристиката не познава капацитета – същата идея с транспортна задача вътре
+            logger.info("Капацитет на офертите: 'lagrangian' се решава с 'flow'")
+            return FlowBackend(lam_hint=self.lam_hint).solve(problem, time_limit, mip_gap, threads,
+                                                             warm_start, initial)
+        start = time.perf_counter()
+        selected, lam, bound = solve_lagrangian(problem, lam_hint=self.lam_hint)
+        objective = problem.objective(selected)
+        status = 'heuristic'
+        if warm_start and problem.is_feasible(initial) and problem.objective(initial) > objective:
+            selected, objective = np.asarray(initial, dtype=bool), problem.objective(initial)
+        solve_time = time.perf_counter() - start
+        build_time = 0.0
+
+        if self.polish:
+            keep = reduced_candidate_set(problem, selected, lam, self.polish_top_k)
+            sub_problem = problem.subset(keep)
+            sub_result = get_solver_backend(self.polish_backend).solve(
+                sub_problem, time_limit=time_limit, mip_gap=mip_gap, threads=threads, warm_start=warm_start,
+                initial=selected[keep])
+            build_time += sub_result.build_time
+            solve_time += sub_result.solve_time
+            logger.info("Polish върху %d от %d кандидата: %s", len(keep), problem.n_vars, sub_result.status)
+            if sub_result.objective is not None and sub_result.objective > objective:
+                selected = np.zeros(problem.n_vars, dtype=bool)
+                selected[keep[sub_result.selected]] = True
+                objective = problem.objective(selected)
+                status = 'polished'
+
+        logger.info("Lagrangian: lam=%.6g, цел=%.6f, LP граница=%.6f", lam, objective, bound)
+        return SolveResult(selected, status, objective, bound, self.name, build_time, solve_time, lam)
+
+
+class FlowBackend:
+    """
+    Кампании с капацитет на офертите: без бюджета задачата е транспортна (клиенти × оферти,
+    по 1 на клиент, до capacity на оферта) и се решава като LP с цели решения.
+    Бюджетът влиза с двойствена цена lam, търсена с бисекция; остатъкът се допълва алчно.
+    Горната граница е min L(lam).
+    """
+    name = 'flow'
+
+    def __init__(self, lam_hint: float = None):
+        self.lam_hint = lam_hint
+
+    def solve(self, problem: CampaignProblem, time_limit=None, mip_gap=None,
+              threads=None, warm_start=True, initial=None) -> SolveResult:
+        if not problem.has_capacities:
+            # без капацитет транспортната задача е излишна – същото като 'lagrangian' без polish
+            logger.info("Офертите нямат капацитет: 'flow' се решава с 'lagrangian'")
+            return LagrangianBackend(polish=False, lam_hint=self.lam_hint).solve(
+                problem, time_limit, mip_gap, threads, warm_start, initial)
+        start = time.perf_counter()
+        selected, lam, bound, status = solve_flow_lagrangian(problem, lam_hint=self.lam_hint,
+                                                             time_limit=time_limit)
+        objective = problem.objective(selected)
+        if warm_start and problem.is_feasible(initial) and problem.objective(initial) > objective:
+            selected, objective = np.asarray(initial, dtype=bool), problem.objective(initial)
+        solve_time = time.perf_counter() - start
+        logger.info("Flow: lam=%.6g, цел=%.6f, граница=%.6f", lam, objective, bound)
+        return SolveResult(selected, status, objective, bound, self.name, 0.0, solve_time, lam)
+
+
+SOLVER_BACKENDS = {
+    HighsBackend.name: HighsBackend,
+    CbcBackend.name: CbcBackend,
+    LagrangianBackend.name: LagrangianBackend,
+    FlowBackend.name: FlowBackend,
+}
+
+
+def get_solver_backend(name: str = None, **backend_options):
+    name = name or SOLVER_CONFIG['backend']
+    try:
+        backend_class = SOLVER_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Непознат решател: {name}. Възможни: {', '.join(SOLVER_BACKENDS)}")
+    return backend_class(**backend_options)
+
+
+def solve_campaign(problem: CampaignProblem, backend: str = None, time_limit=None,
+                   mip_gap=None, threads=None, warm_start=None, initial=None,
+                   **backend_options) -> SolveResult:
+    """
+    Решава кампанията с избрания решател; липсващите параметри идват от SOLVER_CONFIG.
+    backend_options се подават на конструктора на решателя (напр. polish за 'lagrangian').
+    initial е начално решение (булев масив), ползва се при warm_start, ако е допустимо.
+    """
+    solver = get_solver_backend(backend, **backend_options)
+    result = solver.solve(
+        problem,
+        time_limit=time_limit if time_limit is not None else SOLVER_CONFIG['time_limit'],
+        mip_gap=mip_gap if mip_gap is not None else SOLVER_CONFIG['mip_gap'],
+        threads=threads if threads is not None else SOLVER_CONFIG['threads'],
+        warm_start=warm_start if warm_start is not None else SOLVER_CONFIG['warm_start'],
+        initial=initial,
+    )
+    metrics.count('solver.variables', problem.n_vars, backend=result.backend)
+    metrics.count('solver.constraints', problem.n_constraints, backend=result.backend)
+    metrics.count('solver.status', backend=result.backend, status=result.status)
+    metrics.observe('solver.build', result.build_time)
+    metrics.observe('solver.solve', result.solve_time)
+    return result
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+PRUNE_MODES = ('none', 'exact', 'hull')
+
+
+def pareto_frontier(prices, scores, client_codes) -> np.ndarray:
+    """
+    Маска на недоминираните кандидати: за същия клиент няма друга оферта,
+    която е не по-скъпа и с не по-ниска оценка. При пълни дубликати остава първият.
+    Премахването на доминираните не променя оптимума на кампанията.
+    """
+    prices = np.asarray(prices, dtype=float)
+    scores = np.asarray(scores, dtype=float)
+    client_codes = np.asarray(client_codes)
+    n = len(scores)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+
+    # по клиент, после по цена възходящо, оценка низходящо, позиция
+    order = np.lexsort((np.arange(n), -scores, prices, client_codes))
+    sorted_scores = pd.Series(scores[order])
+    sorted_clients = client_codes[order]
+    # най-високата оценка сред предходните (по-евтини или равни) оферти на клиента
+    previous_best = sorted_scores.groupby(sorted_clients).cummax().groupby(sorted_clients).shift(1)
+    keep_sorted = previous_best.isna().to_numpy() | (sorted_scores.to_numpy() > previous_best.to_numpy())
+
+    keep = np.zeros(n, dtype=bool)
+    keep[order] = keep_sorted
+    return keep
+
+
+def convex_hull_frontier(prices, scores, client_codes, keep: np.ndarray) -> np.ndarray:
+    """
+    Премахва и LP-доминираните точки: остават само върховете на горната изпъкнала
+    обвивка на (цена, оценка) за всеки клиент, като (0, 0) е вариантът „без оферта“.
+    Това е точно за LP релаксацията, но може да промени целочисления оптимум.
+    """
+    prices = np.asarray(prices, dtype=float)
+    scores = np.asarray(scores, dtype=float)
+    client_codes = np.asarray(client_codes)
+    keep = keep.copy()
+
+    while True:
+        idx = np.flatnonzero(keep)
+        # по фронта цената и оценката растат строго, така че редът по цена е и ред по оценка
+        idx = idx[np.lexsort((prices[idx], client_codes[idx]))]
+        clients = client_codes[idx]
+        p, s = prices[idx], scores[idx]
+
+        first = np.r_[True, clients[1:] != clients[:-1]]
+        last = np.r_[clients[1:] != clients[:-1], True]
+        prev_p = np.where(first, 0.0, np.r_[0.0, p[:-1]])
+        prev_s = np.where(first, 0.0, np.r_[0.0, s[:-1]])
+        next_p = np.r_[p[1:], 0.0]
+        next_s = np.r_[s[1:], 0.0]
+
+        # точката е под отсечката между съседите си, ако наклонът не намалява
+        left = (s - prev_s) * (next_p - p)
+        right = (next_s - s) * (p - prev_p)
+        drop = ~last & (left <= right)
+        # отрицателни оценки никога не са по-добри от „без оферта“
+        drop |= s <= 0
+        if not drop.any():
+            return keep
+        # всяка махната точка е под отсечка между две оставащи, затова не е връх на обвивката
+        keep[idx[drop]] = False
+
+
+def cap_top_k(scores, client_codes, keep: np.ndarray, top_k: int) -> np.ndarray:
+    """Оставя най-много top_k кандидата с най-висока оценка на клиент."""
+    scores = np.asarray(scores, dtype=float)
+    client_codes = np.asarray(client_codes)
+    idx = np.flatnonzero(keep)
+    idx = idx[np.lexsort((-scores[idx], client_codes[idx]))]
+    clients = client_codes[idx]
+    starts = np.flatnonzero(np.r_[True, clients[1:] != clients[:-1]])
+    rank = np.arange(len(idx)) - np.repeat(starts, np.diff(np.r_[starts, len(idx)]))
+    capped = np.zeros(len(keep), dtype=bool)
+    capped[idx[rank < top_k]] = True
+    return capped
+
+
+def prune_candidates(prices, scores, client_codes, mode: str = 'exact', top_k: int = None) -> np.ndarray:
+    """
+    Маска на кандидатите, които остават за решателя.
+    mode: 'none' (без премахване), 'exact' (Парето фронт) или 'hull' (изпъкнала обвивка).
+    top_k ограничава допълнително броя кандидати на клиент.
+    """
+    if mode not in PRUNE_MODES:
+        raise ValueError(f"Непознат режим на премахване: {mode}. Възможни: {PRUNE_MODES}")
+    keep = np.ones(len(scores), dtype=bool)
+    if mode != 'none':
+        keep = pareto_frontier(prices, scores, client_codes)
+    if mode == 'hull':
+        keep = convex_hull_frontier(prices, scores, client_codes, keep)
+    if top_k is not None:
+        keep = cap_top_k(scores, client_codes, keep, top_k)
+    return keep
@@ -5,6 +5,12 @@ CSV_PATHS = {
     'history': 'history.csv'
 }
 
+DATA_CACHE_CONFIG = {
+    'enabled': True,
+    'dir': '.data_cache',   # типизиран колонен кеш на CSV файловете (.npy колони)
+    'validate': 'mtime'     # 'mtime' (mtime и размер) или 'hash' (SHA-256 на съдържанието)
+}
+
 SLIDER_CONFIG = {
     'min': 50,
     'max': 5000,
@@ -15,7 +21,90 @@ SLIDER_CONFIG = {
 MODEL_CONFIG = {
     'max_iter': 1000,
     'test_size': 0.3,
+    'random_state': 42,
+    'search': 'grid',       # 'grid', 'halving' (successive halving) или 'random'
+    'cv': 5,
+    'n_jobs': -1,           # всички ядра
+    'cache_preprocessing': True,
+    'n_iter': 15,           # кандидати при 'random'
+    'halving_factor': 3
+}
+
+
+INCREMENTAL_CONFIG = {
+    'line': 'incremental',  # поддиректория в регистъра с версиите
+    'pca_components': 10,
+    'alpha': 1e-4,          # регуляризация на SGDClassifier
+    'chunk_size': 50_000    # редове в блок при началното обучение
+}
+
+STREAM_CONFIG = {
+    'chunk_size': 1_000_000,  # редове от history в блок
+    'reference_date': None    # референтна дата за days_since_purchase; None = първи проход
+}
+
+SCORING_CONFIG = {
+    # максимален брой кандидати в едно извикване на predict_proba
+    'chunk_size': 100_000,
+    # тегла на combined_score: склонност, нормализирана печалба, свободен бюджет
+    'weights': {'propensity': 0.5, 'profit': 0.3, 'price': 0.2}
+}
+
+SERVICE_CONFIG = {
+    'host': '127.0.0.1',
+    'port': 8080,
+    'batch_window_ms': 5,       # колко дълго се събират единични заявки в една партида
+    'max_batch_size': 256,      # най-много клиенти в едно извикване на модела
+    'latency_window': 10_000,   # последни заявки по endpoint за процентилите на латентността
+    'max_finished_jobs': 100,   # приключили кампании, които GET /campaign/<id> още връща
+    'max_body_bytes': 50_000_000
+}
+
+BATCH_CONFIG = {
+    'n_jobs': -1,           # процеси за get_recommendations_batch; -1 = всички ядра, 1 = в текущия процес
+    'shard_size': 20_000    # клиенти в една задача (и в един върнат DataFrame)
+}
+
+INSTRUMENTATION_CONFIG = {
+    'enabled': False,        # времена и броячи по етап (instrumentation.metrics)
+    'track_memory': True,    # high-water mark на паметта на процеса при всеки етап
+    'profiler': 'cprofile'   # 'cprofile' или 'pyinstrument' за profile_call
+}
+
+SOLVER_CONFIG = {
+    'backend': 'highs',     # 'highs' (scipy.optimize.milp), 'cbc' (PuLP), 'lagrangian' (евристика) или 'flow' (при капацитет)
+    'time_limit': None,     # секунди, None = без ограничение
+    'mip_gap': None,        # относителна разлика, None = по подразбиране на решателя
+    'threads': None,
+    'warm_start': True,     # начално алчно решение
+    'polish': False,        # 'lagrangian': точно дорешаване с MILP върху намален набор
+    'polish_top_k': 3,      # кандидати на клиент при polish
+    'polish_backend': 'highs',
+    'prune': 'exact',       # 'none', 'exact' (Парето фронт) или 'hull' (изпъкнала обвивка, не е точно)
+    'prune_top_k': None,    # най-много кандидати на клиент след премахването
+    'candidate_cache': 4    # клиентски набори с кеширани оценки за optimize_campaign; 0 = без кеш
+}
+
+REPLAY_CONFIG = {
+    'split_date': None,         # начало на бъдещия прозорец в history; None = по test_share
+    'test_share': 0.2,          # дял на най-новите редове в бъдещия прозорец
+    'models': [{'pca__n_components': 10, 'lr__C': 1.0}],   # параметри на pipeline-а (ModelTrainer.fit_params)
+    'weight_step': 0.1,         # стъпка на решетката от тегла на combined_score (със сума 1)
+    'budgets': [1000],          # бюджет на клиент за препоръките
+    'campaign_budgets': [],     # общи бюджети за кампанията; празно = без кампания
+    'campaign_backend': 'lagrangian',
+    'top_n': 1,
+    'max_clients': 50_000,      # случайна извадка от клиентите в бъдещия прозорец; None = всички
+    'ips_clip': 50.0,           # горна граница на теглото на ред в ips_profit
+    'n_jobs': -1,               # процеси за конфигурациите; -1 = всички ядра
     'random_state': 42
 }
 
+SHARED_ARENA_CONFIG = {
+    'name': 'moo_arena'     # споделената памет с каталога и модела за работните процеси (shared_arena.py)
+}
 
+ARTIFACT_PATHS = {
+    'linear_scorer': 'linear_scorer.npz',
+    'model_registry': 'model_registry'
+}
@@ -1,12 +1,155 @@
-# data_loader.py
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
 import pandas as pd
-from config import CSV_PATHS
+from config import CSV_PATHS, DATA_CACHE_CONFIG
+
+# колони с дати, които се парсват веднъж при създаването на кеша
+DATE_COLUMNS = {'transaction_date'}
+# сменя се при промяна във формата на кеша
+CACHE_FORMAT = 1
+
+
+def _source_signature(path: str, validate: str) -> dict:
+    stat = os.stat(path)
+    signature = {'format': CACHE_FORMAT, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if validate == 'hash':
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        signature['sha256'] = digest.hexdigest()
+    return signature
+
+
+def _cache_dir(path: str, signature: dict) -> str:
+    """
+    <dir>/<име>-<хеш на абсолютния път>/<хеш на подписа>: файлове с едно и също име
+    в различни директории (напр. bench_data/*/clients.csv) не си пречат, а всяка версия
+    на файла е в своя директория, която след записа не се променя.
+    """
+    base = os.path.splitext(os.path.basename(path))[0]
+    path_key = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    version = hashlib.sha256(json.dumps(signature, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(DATA_CACHE_CONFIG['dir'], f"{base}-{path_key}", version)
+
+
+def _write_cache(df: pd.DataFrame, directory: str, signature: dict):
+    """
+    Записва кеша във временна директория и я преименува наведнъж, така че читател не вижда
+    непълен запис. Директориите на предишните версии на файла се изтриват.
+    """
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=os.path.basename(directory) + '.', suffix='.tmp', dir=parent)
+    try:
+        _write_columns(df, tmp_dir, signature)
+        os.replace(tmp_dir, directory)
+    except OSError:
+        # друг процес вече е записал същата версия – остава неговото копие
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.exists(os.path.join(directory, 'meta.json')):
+            raise
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    for name in os.listdir(parent):
+        if name != os.path.basename(directory) and not name.endswith('.tmp'):
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+
+def _write_columns(df: pd.DataFrame, directory: str, signature: dict):
+    """
+    Записва всяка колона като отделен .npy файл: цели числа с намалена ширина,
+    дати като int64 наносекунди, а низовете като категорийни кодове плюс масив с категориите.
+    """
+    columns = []
+    for i, name in enumerate(df.columns):
+        col = df[name]
+        entry = {'name': name, 'file': f"col{i}.npy"}
+        if name in DATE_COLUMNS:
+            values = pd.to_datetime(col, format="%Y-%m-%d", errors='coerce')
+            np.save(os.path.join(directory, entry['file']), values.to_numpy(dtype='datetime64[ns]').view(np.int64))
+            entry['kind'] = 'datetime'
+        elif pd.api.types.is_integer_dtype(col.dtype):
+            np.save(os.path.join(directory, entry['file']), pd.to_numeric(col, downcast='integer').to_numpy())
+            entry['kind'] = 'numeric'
+        elif pd.api.types.is_float_dtype(col.dtype) or pd.api.types.is_bool_dtype(col.dtype):
+            np.save(os.path.join(directory, entry['file']), col.to_numpy())
+            entry['kind'] = 'numeric'
+        else:
+            codes, categories = pd.factorize(col, sort=True)
+            codes = pd.to_numeric(pd.Series(codes), downcast='integer').to_numpy()
+            np.save(os.path.join(directory, entry['file']), codes)
+            entry['categories'] = f"col{i}_categories.npy"
+            np.save(os.path.join(directory, entry['categories']), np.asarray(categories, dtype=str))
+            entry['kind'] = 'categorical'
+        columns.append(entry)
+
+    # meta.json се пише последен – без него кешът се смята за невалиден
+    with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'source': signature, 'columns': columns}, f, ensure_ascii=False)
+
+
+def _read_cache(directory: str, signature: dict):
+    try:
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['source'] != signature:
+            return None
+
+        data = {}
+        for entry in meta['columns']:
+            # колоните се map-ват от диска и не се копират в паметта
+            values = np.load(os.path.join(directory, entry['file']), mmap_mode='r')
+            if entry['kind'] == 'datetime':
+                data[entry['name']] = pd.Series(values.view('datetime64[ns]'), copy=False)
+            elif entry['kind'] == 'categorical':
+                categories = np.load(os.path.join(directory, entry['categories']))
+                data[entry['name']] = pd.Categorical.from_codes(values, categories=categories.astype(object))
+            else:
+                data[entry['name']] = values
+    except FileNotFoundError:
+        # няма кеш или по-нова версия на файла току-що е изтрила тази
+        return None
+    return pd.DataFrame(data, copy=False)
+
+
+def load_table(path: str, use_cache: bool = True) -> pd.DataFrame:
+    """
+    Зарежда един CSV файл. При use_cache първото зареждане създава типизиран колонен кеш,
+    а следващите го четат, докато файлът не се промени (mtime и размер или хеш).
+    """
+    if not use_cache:
+        return pd.read_csv(path)
+    signature = _source_signature(path, DATA_CACHE_CONFIG['validate'])
+    directory = _cache_dir(path, signature)
+    df = _read_cache(directory, signature)
+    if df is None:
+        df = pd.read_csv(path)
+        _write_cache(df, directory, signature)
+        # от кеша типовете са същите като при следващите зареждания; ако по-нова версия
+        # на файла междувременно го е изтрила, остава прочетеният CSV
+        cached = _read_cache(directory, signature)
+        if cached is not None:
+            df = cached
+    return df
+
 
-def load_data():
+def load_data(use_cache: bool = None, paths: dict = None):
+    """clients, offers и history от CSV_PATHS или от paths със същите ключове."""
+    if use_cache is None:
+        use_cache = DATA_CACHE_CONFIG['enabled']
+    paths = paths or CSV_PATHS
     try:
-        clients = pd.read_csv(CSV_PATHS['clients'])
-        offers = pd.read_csv(CSV_PATHS['offers'])
-        history = pd.read_csv(CSV_PATHS['history'])
+        clients = load_table(paths['clients'], use_cache)
+        offers = load_table(paths['offers'], use_cache)
+        history = load_table(paths['history'], use_cache)
     except Exception as e:
         raise Exception(f"Грешка при зареждане на CSV файловете: {e}")
     return clients, offers, history
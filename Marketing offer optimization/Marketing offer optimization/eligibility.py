@@ -0,0 +1,262 @@
+import numpy as np
+import pandas as pd
+
+GENDER_ALL = 'All'
+# Бит 0 е запазен за пол, който не присъства като целеви пол в каталога –
+# такива клиенти виждат само офертите с target_gender == 'All'
+_UNKNOWN_GENDER_BIT = np.uint64(1)
+_ALL_BITS = np.uint64(np.iinfo(np.uint64).max)
+_MAX_BITS = 64
+
+
+def parse_preferred_categories(value):
+    """
+    Разделя preferred_category по запетая, точно както is_offer_eligible.
+    Връща None, ако клиентът няма предпочитание (falsy стойност).
+    """
+    if not value:
+        return None
+    return [p.strip() for p in str(value).split(',')]
+
+
+def _limit_columns(offers: pd.DataFrame):
+    """min_age, max_age и price като float масиви, в които NaN е заменено с безкрайност."""
+    # NaN в ограниченията никога не изключва оферта (сравнението с NaN е False),
+    # затова ги заменяме с безкрайности, които също никога не изключват
+    min_age = offers['min_age'].to_numpy(dtype=float, na_value=np.nan)
+    max_age = offers['max_age'].to_numpy(dtype=float, na_value=np.nan)
+    price = offers['price'].to_numpy(dtype=float, na_value=np.nan)
+    return (np.where(np.isnan(min_age), -np.inf, min_age),
+            np.where(np.isnan(max_age), np.inf, max_age),
+            np.where(np.isnan(price), -np.inf, price))
+
+
+def _category_bits(codes: np.ndarray) -> np.ndarray:
+    bits = np.zeros(len(codes), dtype=np.uint64)
+    has_code = codes >= 0
+    bits[has_code] = np.uint64(1) << codes[has_code].astype(np.uint64)
+    return bits
+
+
+class EligibilityIndex:
+    """
+    Индекс за допустимост на офертите, построен при зареждане на каталога и обновяван
+    с updated() при промени в него. Дава същия резултат като RecommendationSystem.is_offer_eligible, но само с NumPy операции.
+    """
+
+    def __init__(self, offers: pd.DataFrame):
+        self.n_offers = len(offers)
+        self.min_age, self.max_age, self.price = _limit_columns(offers)
+        self._build_sorted()
+        self._build_gender_masks(offers['target_gender'])
+        self._build_category_masks(offers['category'])
+
+    def _build_sorted(self):
+        # сортирани колони за бързо стесняване на кандидатите чрез searchsorted
+        self._min_age_order = np.argsort(self.min_age, kind='stable')
+        self._min_age_sorted = self.min_age[self._min_age_order]
+        self._max_age_order = np.argsort(self.max_age, kind='stable')
+        self._max_age_sorted = self.max_age[self._max_age_order]
+        self._price_order = np.argsort(self.price, kind='stable')
+        self._price_sorted = self.price[self._price_order]
+
+    def _build_gender_masks(self, target_gender: pd.Series):
+        values = [g for g in pd.unique(target_gender) if isinstance(g, str) and g != GENDER_ALL]
+        if len(values) >= _MAX_BITS:
+            raise ValueError(f"Твърде много различни стойности за target_gender: {len(values)}")
+        self.gender_codes = {g: i + 1 for i, g in enumerate(values)}
+        self.gender_masks = self._gender_masks_for(target_gender)
+
+    def _gender_masks_for(self, target_gender: pd.Series) -> np.ndarray:
+        masks = np.zeros(len(target_gender), dtype=np.uint64)
+        tg = target_gender.to_numpy(dtype=object)
+        masks[tg == GENDER_ALL] = _ALL_BITS
+        for g, bit in self.gender_codes.items():
+            masks[tg == g] = np.uint64(1) << np.uint64(bit)
+        return masks
+
+    def _build_category_masks(self, category: pd.Series):
+        values = [c for c in pd.unique(category) if isinstance(c, str)]
+        self.category_codes = {c: i for i, c in enumerate(values)}
+        self.category_code_array = self._category_codes_for(category)
+        # при повече от 64 категории минаваме към проверка по кодове (np.isin)
+        self.category_masks = _category_bits(self.category_code_array) if len(values) <= _MAX_BITS else None
+
+    def _category_codes_for(self, category: pd.Series) -> np.ndarray:
+        codes = np.full(len(category), -1, dtype=np.int64)
+        cat = category.to_numpy(dtype=object)
+        for c, code in self.category_codes.items():
+            codes[cat == c] = code
+        return codes
+
+    # масивите на индекса – за споделена памет (вж. shared_arena)
+    STATE_ARRAYS = ('min_age', 'max_age', 'price', '_min_age_order', '_min_age_sorted',
+                    '_max_age_order', '_max_age_sorted', '_price_order', '_price_sorted',
+                    'gender_masks', 'category_code_array', 'category_masks')
+
+    def export_state(self):
+        """(масиви, метаданни), от които from_state възстановява индекса без изчисления."""
+        arrays = {name: getattr(self, name) for name in self.STATE_ARRAYS if getattr(self, name) is not None}
+        meta = {'n_offers': self.n_offers, 'gender_codes': self.gender_codes,
+                'category_codes': self.category_codes}
+        return arrays, meta
+
+    @classmethod
+    def from_state(cls, arrays: dict, meta: dict):
+        """Индекс върху готови масиви (напр. изгледи към споделена памет), без копиране."""
+        index = cls.__new__(cls)
+        index.n_offers = meta['n_offers']
+        index.gender_codes = dict(meta['gender_codes'])
+        index.category_codes = dict(meta['category_codes'])
+        for name in cls.STATE_ARRAYS:
+            setattr(index, name, arrays.get(name))
+        return index
+
+    def updated(self, offers: pd.DataFrame, kept: np.ndarray, changed: np.ndarray):
+        """
+        Индексът за нова версия на каталога, без да се строи отначало. offers е новата
+        версия: запазените редове (kept – булев масив по старите позиции) в същия ред и
+        след тях добавените; changed са позициите в offers на променените и добавените редове.
+        Текущият индекс не се променя – заявките, които го ползват, продължават с него.
+        """
+        rows = offers.iloc[changed]
+        genders = {g for g in pd.unique(rows['target_gender']) if isinstance(g, str) and g != GENDER_ALL}
+        categories = {c for c in pd.unique(rows['category']) if isinstance(c, str)}
+        if genders - set(self.gender_codes) or categories - set(self.category_codes):
+            # нов пол или категория променят кодирането – индексът се строи отначало
+            return EligibilityIndex(offers)
+
+        index = EligibilityIndex.__new__(EligibilityIndex)
+        index.n_offers = len(offers)
+        index.gender_codes = self.gender_codes
+        index.category_codes = self.category_codes
+        n_kept = int(kept.sum())
+
+        def patched(old, new_values):
+            out = np.empty(index.n_offers, dtype=old.dtype)
+            out[:n_kept] = old[kept]
+            out[changed] = new_values
+            return out
+
+        for name, values in zip(('min_age', 'max_age', 'price'), _limit_columns(rows)):
+            setattr(index, name, patched(getattr(self, name), values))
+        index.gender_masks = patched(self.gender_masks, self._gender_masks_for(rows['target_gender']))
+        codes = self._category_codes_for(rows['category'])
+        index.category_code_array = patched(self.category_code_array, codes)
+        index.category_masks = None if self.category_masks is None else patched(self.category_masks,
+                                                                               _category_bits(codes))
+
+        # сортираните колони: досегашният ред без премахнатите и променените позиции,
+        # в който новите стойности се вмъкват със searchsorted – O(n) вместо сортиране
+        new_position = np.full(self.n_offers, -1, dtype=np.int64)
+        new_position[kept] = np.arange(n_kept)
+        moved = np.zeros(index.n_offers, dtype=bool)
+        moved[changed] = True
+        for name in ('min_age', 'max_age', 'price'):
+            values = getattr(index, name)
+            order = new_position[getattr(self, f'_{name}_order')]
+            order = order[order >= 0]
+            order = order[~moved[order]]
+            inserted = changed[np.argsort(values[changed], kind='stable')]
+            at = np.searchsorted(values[order], values[inserted], side='right')
+            order = np.insert(order, at, inserted)
+            setattr(index, f'_{name}_order', order)
+            setattr(index, f'_{name}_sorted', values[order])
+        return index
+
+    def client_gender_mask(self, gender) -> np.uint64:
+        bit = self.gender_codes.get(gender) if isinstance(gender, str) else None
+        if bit is None:
+            return _UNKNOWN_GENDER_BIT
+        return np.uint64(1) << np.uint64(bit)
+
+    def client_category_codes(self, preferred_category):
+        """Кодовете на предпочитаните категории или None при липса на предпочитание."""
+        preferred = parse_preferred_categories(preferred_category)
+        if preferred is None:
+            return None
+        return np.array(sorted({self.category_codes[p] for p in preferred if p in self.category_codes}),
+                        dtype=np.int64)
+
+    def _category_ok(self, offer_idx: np.ndarray, client_codes: np.ndarray) -> np.ndarray:
+        if self.category_masks is not None:
+            client_bits = np.bitwise_or.reduce(np.uint64(1) << client_codes.astype(np.uint64)) \
+                if len(client_codes) else np.uint64(0)
+            return (self.category_masks[offer_idx] & client_bits) != 0
+        return np.isin(self.category_code_array[offer_idx], client_codes)
+
+    def _narrow_candidates(self, age, budget) -> np.ndarray:
+        # Избираме най-тясното от трите подмножества, получени от сортираните колони
+        ranges = []
+        if not np.isnan(budget):
+            k = np.searchsorted(self._price_sorted, budget, side='right')
+            ranges.append((k, self._price_order[:k]))
+        if not np.isnan(age):
+            k = np.searchsorted(self._min_age_sorted, age, side='right')
+            ranges.append((k, self._min_age_order[:k]))
+            k = np.searchsorted(self._max_age_sorted, age, side='left')
+            ranges.append((self.n_offers - k, self._max_age_order[k:]))
+        if not ranges:
+            return np.arange(self.n_offers)
+        return min(ranges, key=lambda r: r[0])[1]
+
+    def eligible_offers(self, client: dict) -> np.ndarray:
+        """
+        Позиционните индекси (във възходящ ред) на допустимите оферти за един клиент.
+        """
+        age = float(client['age'])
+        budget = float(client['budget'])
+        idx = self._narrow_candidates(age, budget)
+
+        # 1. възраст и 3. бюджет – пълна проверка върху стесненото подмножество
+        ok = ~(age < self.min_age[idx]) & ~(age > self.max_age[idx]) & ~(self.price[idx] > budget)
+        # 2. целев пол
+        ok &= (self.gender_masks[idx] & self.client_gender_mask(client['gender'])) != 0
+        # 4. предпочитана категория
+        client_codes = self.client_category_codes(client.get('preferred_category'))
+        if client_codes is not None:
+            ok &= self._category_ok(idx, client_codes)
+        return np.sort(idx[ok])
+
+    def eligibility_matrix(self, clients: pd.DataFrame, budgets=None) -> np.ndarray:
+        """
+        Булева матрица клиент × оферта. budgets е скалар или масив с по една стойност
+        за клиент; при None се взима колоната 'budget' от clients.
+        """
+        if budgets is None:
+            budgets = clients['budget']
+        n_clients = len(clients)
+        age = clients['age'].to_numpy(dtype=float, na_value=np.nan)[:, None]
+        budget = np.broadcast_to(np.asarray(budgets, dtype=float), (n_clients,))[:, None]
+
+        matrix = ~(age < self.min_age) & ~(age > self.max_age) & ~(self.price > budget)
+
+        genders = clients['gender'].to_numpy(dtype=object)
+        gender_bits = np.array([self.client_gender_mask(g) for g in genders], dtype=np.uint64)
+        matrix &= (self.gender_masks[None, :] & gender_bits[:, None]) != 0
+
+        if 'preferred_category' in clients.columns:
+            all_offers = np.arange(self.n_offers)
+            preferred = clients['preferred_category'].to_numpy(dtype=object)
+            # разделяме всяка уникална стойност само веднъж
+            for value in pd.unique(preferred):
+                client_codes = self.client_category_codes(value)
+                if client_codes is None:
+                    continue
+                rows = np.flatnonzero(preferred == value) if value == value \
+                    else np.flatnonzero(pd.isna(preferred))
+                matrix[rows] &= self._category_ok(all_offers, client_codes)[None, :]
+        return matrix
+
+    def eligible_pairs(self, clients: pd.DataFrame, budgets=None, chunk_size: int = 10_000):
+        """
+        Генерира двойки (позиции на клиенти, позиции на оферти) по блокове от клиенти,
+        в реда клиент → оферта, без да държи цялата матрица в паметта.
+        """
+        if budgets is not None:
+            budgets = np.broadcast_to(np.asarray(budgets, dtype=float), (len(clients),))
+        for start in range(0, len(clients), chunk_size):
+            block = clients.iloc[start:start + chunk_size]
+            block_budgets = budgets[start:start + chunk_size] if budgets is not None else None
+            rows, cols = np.nonzero(self.eligibility_matrix(block, block_budgets))
+            yield rows + start, cols
@@ -0,0 +1,231 @@
+import numpy as np
+import pandas as pd
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+_NO_DATE = np.iinfo(np.int32).min
+
+
+class _AggregateTable:
+    """
+    Натрупани статистики по ключ в масиви с резерв за растеж.
+    Обновяването минава само през ключовете в делтата; за масово четене
+    се поддържа pd.Index, който се построява наново само след нови ключове.
+    """
+    FIELDS = ('n_rows', 'n_accepted', 'total_quantity', 'total_cross_sell')
+
+    def __init__(self, keys, n_rows, n_accepted, total_quantity, total_cross_sell, last_day):
+        keys = list(keys)
+        self._keys = keys
+        self._positions = {key: i for i, key in enumerate(keys)}
+        self._index = None
+        self._size = len(keys)
+        capacity = max(16, self._size)
+        self.n_rows = self._alloc(n_rows, np.int64, capacity)
+        self.n_accepted = self._alloc(n_accepted, np.int64, capacity)
+        self.total_quantity = self._alloc(total_quantity, np.float64, capacity)
+        self.total_cross_sell = self._alloc(total_cross_sell, np.float64, capacity)
+        self.last_day = self._alloc(last_day, np.int32, capacity, fill=_NO_DATE)
+
+    @classmethod
+    def from_arrays(cls, keys: np.ndarray, arrays: dict):
+        """
+        Таблица върху готови масиви (напр. изгледи за четене към споделена памет), без
+        копиране. Речникът за upsert и собствените копия се правят при първото обновяване.
+        """
+        table = cls.__new__(cls)
+        table._keys = keys
+        table._positions = None
+        table._index = None
+        table._size = len(keys)
+        for name in cls.FIELDS + ('last_day',):
+            setattr(table, name, arrays[name])
+        return table
+
+    def to_arrays(self):
+        """(ключове, масиви по поле) без резерва за растеж – за from_arrays."""
+        fields = {name: getattr(self, name)[:self._size] for name in self.FIELDS + ('last_day',)}
+        return np.asarray(self._keys), fields
+
+    @staticmethod
+    def _alloc(values, dtype, capacity, fill=0):
+        out = np.full(capacity, fill, dtype=dtype)
+        out[:len(values)] = values
+        return out
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self, needed: int):
+        capacity = len(self.n_rows)
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity)
+        for name in self.FIELDS + ('last_day',):
+            old = getattr(self, name)
+            fill = _NO_DATE if name == 'last_day' else 0
+            setattr(self, name, self._alloc(old[:self._size], old.dtype, capacity, fill))
+
+    def upsert(self, keys, n_rows, n_accepted, total_quantity, total_cross_sell, last_day):
+        """Добавя агрегатите на делтата; нови ключове се добавят в края. O(размер на делтата)."""
+        if self._positions is None:
+            self._own()
+        positions = np.empty(len(keys), dtype=np.int64)
+        new_keys = []
+        for i, key in enumerate(keys):
+            pos = self._positions.get(key)
+            if pos is None:
+                pos = self._size + len(new_keys)
+                self._positions[key] = pos
+                new_keys.append(key)
+            positions[i] = pos
+        if new_keys:
+            self._grow(self._size + len(new_keys))
+            self._keys.extend(new_keys)
+            self._size += len(new_keys)
+            self._index = None
+
+        np.add.at(self.n_rows, positions, n_rows)
+        np.add.at(self.n_accepted, positions, n_accepted)
+        np.add.at(self.total_quantity, positions, total_quantity)
+        np.add.at(self.total_cross_sell, positions, total_cross_sell)
+        np.maximum.at(self.last_day, positions, last_day)
+
+    def _own(self):
+        """Собствени, записваеми копия вместо масивите от from_arrays."""
+        self._keys = np.asarray(self._keys).tolist()
+        self._positions = {key: i for i, key in enumerate(self._keys)}
+        capacity = max(16, self._size)
+        for name in self.FIELDS + ('last_day',):
+            old = getattr(self, name)
+            fill = _NO_DATE if name == 'last_day' else 0
+            setattr(self, name, self._alloc(old[:self._size], old.dtype, capacity, fill))
+
+    def lookup(self, keys) -> np.ndarray:
+        """Позициите на ключовете с едно векторизирано търсене; -1 за непознат ключ."""
+        if self._index is None:
+            self._index = pd.Index(self._keys, tupleize_cols=False)
+        return self._index.get_indexer(keys)
+
+
+def _aggregate(history: pd.DataFrame, by: list):
+    """Един векторизиран group-by проход върху историята."""
+    data = pd.DataFrame({
+        'n_rows': 1,
+        'n_accepted': (history['response'].astype(object) == 'accepted').astype(np.int64),
+        'total_quantity': pd.to_numeric(history['quantity'], errors='coerce').fillna(0),
+        'total_cross_sell': pd.to_numeric(history['cross_sell_count'], errors='coerce').fillna(0),
+        'last_day': _to_days(history['transaction_date']),
+    }, index=history.index)
+    for column in by:
+        data[column] = history[column].to_numpy()
+    grouped = data.groupby(by, sort=False, observed=True).agg(
+        n_rows=('n_rows', 'sum'), n_accepted=('n_accepted', 'sum'),
+        total_quantity=('total_quantity', 'sum'), total_cross_sell=('total_cross_sell', 'sum'),
+        last_day=('last_day', 'max'))
+    keys = grouped.index.tolist()
+    return keys, {name: grouped[name].to_numpy() for name in grouped.columns}
+
+
+def _to_days(dates) -> np.ndarray:
+    parsed = pd.to_datetime(dates, format="%Y-%m-%d", errors='coerce').to_numpy(dtype='datetime64[D]')
+    days = (parsed - _EPOCH).astype(np.int64)
+    days[np.isnat(parsed)] = _NO_DATE
+    return days.astype(np.int32)
+
+
+class ClientFeatureStore:
+    """
+    Историческите признаци по client_id и по client_id × category: давност на последната
+    транзакция, общо количество, cross-sell и дял приети оферти. Строи се с един
+    group-by проход и се обновява с делти; признаците за цяла кампания се вземат наведнъж.
+    """
+
+    def __init__(self, offers: pd.DataFrame):
+        self.set_offers(offers)
+        self.clients = _AggregateTable([], [], [], [], [], [])
+        self.client_categories = _AggregateTable([], [], [], [], [], [])
+        self.last_day = _NO_DATE
+        # расте при всяко обновяване – кешовете на оценки по него разбират, че признаците са други
+        self.version = 0
+
+    def set_offers(self, offers: pd.DataFrame):
+        """Категориите на офертите за новите редове в update() – напр. след промяна в каталога."""
+        self._offer_index = pd.Index(offers['offer_id'])
+        self._offer_category = np.append(offers['category'].to_numpy(dtype=object), None)
+
+    @classmethod
+    def from_history(cls, history: pd.DataFrame, offers: pd.DataFrame):
+        store = cls(offers)
+        history = store._with_category(history)
+        keys, agg = _aggregate(history, ['client_id'])
+        store.clients = _AggregateTable(keys, **agg)
+        # последната дата – от агрегата по клиент: в него са и редовете с оферти извън каталога
+        store.last_day = int(agg['last_day'].max(initial=_NO_DATE))
+        keys, agg = _aggregate(history, ['client_id', 'category'])
+        store.client_categories = _AggregateTable(keys, **agg)
+        return store
+
+    def _with_category(self, history: pd.DataFrame) -> pd.DataFrame:
+        history = history.copy()
+        history['category'] = self._offer_category[self._offer_index.get_indexer(history['offer_id'])]
+        return history
+
+    def update(self, new_history: pd.DataFrame):
+        """Добавя нови редове от history; цената зависи само от размера на делтата."""
+        if len(new_history) == 0:
+            return self
+        new_history = self._with_category(new_history)
+        keys, agg = _aggregate(new_history, ['client_id'])
+        self.clients.upsert(keys, **agg)
+        self.last_day = int(agg['last_day'].max(initial=self.last_day))
+        keys, agg = _aggregate(new_history, ['client_id', 'category'])
+        self.client_categories.upsert(keys, **agg)
+        self.version += 1
+        return self
+
+    @property
+    def reference_date(self):
+        """Най-новата дата в историята – референтна за days_since_purchase, както при обучението."""
+        if self.last_day == _NO_DATE:
+            return None
+        return pd.Timestamp(_EPOCH + np.timedelta64(self.last_day, 'D'))
+
+    @staticmethod
+    def _features(table: _AggregateTable, positions: np.ndarray, reference_day: int) -> dict:
+        known = positions >= 0
+        pos = np.where(known, positions, 0)
+        n_rows = np.where(known, table.n_rows[pos], 0)
+        has_rows = n_rows > 0
+        safe_n = np.maximum(n_rows, 1)
+        last_day = np.where(known, table.last_day[pos], _NO_DATE)
+        has_date = last_day != _NO_DATE
+        return {
+            'days_since_purchase': np.where(has_date, reference_day - last_day, 0).astype(float),
+            # средно количество и cross-sell на транзакция – в мащаба на признаците при обучение
+            'quantity': np.where(has_rows, table.total_quantity[pos] / safe_n, 0.0),
+            'cross_sell_count': np.where(has_rows, table.total_cross_sell[pos] / safe_n, 0.0),
+            'acceptance_rate': np.where(has_rows, table.n_accepted[pos] / safe_n, 0.0),
+            'total_quantity': np.where(known, table.total_quantity[pos], 0.0),
+            'total_cross_sell': np.where(known, table.total_cross_sell[pos], 0.0),
+            'n_rows': n_rows,
+        }
+
+    def client_features(self, client_ids, reference_date=None) -> dict:
+        """
+        Признаците за масив от client_id с едно търсене. За непознат клиент всички
+        признаци са 0, както досега за нов потребител.
+        """
+        reference_day = self._reference_day(reference_date)
+        positions = self.clients.lookup(np.asarray(client_ids))
+        return self._features(self.clients, positions, reference_day)
+
+    def client_category_features(self, client_ids, categories, reference_date=None) -> dict:
+        reference_day = self._reference_day(reference_date)
+        keys = list(zip(np.asarray(client_ids).tolist(), np.asarray(categories, dtype=object).tolist()))
+        positions = self.client_categories.lookup(keys)
+        return self._features(self.client_categories, positions, reference_day)
+
+    def _reference_day(self, reference_date) -> int:
+        if reference_date is None:
+            return self.last_day
+        return int((np.datetime64(pd.Timestamp(reference_date).date(), 'D') - _EPOCH).astype(np.int64))
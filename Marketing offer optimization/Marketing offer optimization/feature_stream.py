@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+from config import STREAM_CONFIG
+from features import FEATURE_COLUMNS
+
+CLIENT_COLUMNS = ['age', 'income', 'previous_purchases']
+OFFER_COLUMNS = ['price']
+HISTORY_COLUMNS = ['client_id', 'offer_id', 'response', 'transaction_date', 'quantity', 'cross_sell_count']
+
+
+class LookupTable:
+    """
+    Колони от clients или offers като масиви, индексирани по id.
+    Липсващ id дава NaN, както merge(how='left').
+    """
+
+    def __init__(self, table: pd.DataFrame, key: str, columns: list):
+        self.index = pd.Index(table[key])
+        # последният ред е NaN и се избира при липсващ id (get_indexer връща -1)
+        self.columns = {c: np.append(table[c].to_numpy(dtype=float, na_value=np.nan), np.nan)
+                        for c in columns}
+
+    def gather(self, ids) -> dict:
+        positions = self.index.get_indexer(ids)
+        return {c: values[positions] for c, values in self.columns.items()}
+
+
+def iter_history_blocks(source, chunk_size: int = None):
+    """Историята на блокове: от CSV файл (без да се чете целият) или от DataFrame."""
+    chunk_size = chunk_size or STREAM_CONFIG['chunk_size']
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_size):
+            yield source.iloc[start:start + chunk_size]
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_size, usecols=lambda c: c in HISTORY_COLUMNS)
+
+
+def scan_history(source, chunk_size: int = None):
+    """Първи проход: брой редове и най-новата transaction_date (референтната дата)."""
+    n_rows = 0
+    reference_date = pd.NaT
+    for block in iter_history_blocks(source, chunk_size):
+        n_rows += len(block)
+        if 'transaction_date' in block.columns:
+            dates = pd.to_datetime(block['transaction_date'], format="%Y-%m-%d", errors='coerce')
+            block_max = dates.max()
+            if pd.notna(block_max) and (pd.isna(reference_date) or block_max > reference_date):
+                reference_date = block_max
+    return n_rows, reference_date
+
+
+class StreamingFeaturePipeline:
+    """
+    Признаците за обучение, смятани блок по блок, без да се обединява цялата история
+    с clients и offers в паметта. Всеки блок се допълва с масиви по client_id и offer_id,
+    а признаците се смятат със същия add_features като ModelTrainer.preprocess_data.
+
+    days_since_purchase използва глобалната най-нова дата; ако reference_date
+    (или STREAM_CONFIG['reference_date']) не е зададена, тя се намира с първи проход.
+    """
+
+    def __init__(self, trainer, reference_date=None, chunk_size: int = None):
+        self.trainer = trainer
+        self.clients = LookupTable(trainer.clients, 'client_id', CLIENT_COLUMNS)
+        self.offers = LookupTable(trainer.offers, 'offer_id', OFFER_COLUMNS)
+        reference_date = reference_date or STREAM_CONFIG['reference_date']
+        self.reference_date = pd.Timestamp(reference_date) if reference_date is not None else None
+        self.chunk_size = chunk_size or STREAM_CONFIG['chunk_size']
+
+    def _ensure_reference_date(self, source):
+        if self.reference_date is None:
+            _, self.reference_date = scan_history(source, self.chunk_size)
+        return self.reference_date
+
+    def transform_block(self, block: pd.DataFrame):
+        data = pd.DataFrame(self.clients.gather(block['client_id']), index=block.index)
+        for name, values in self.offers.gather(block['offer_id']).items():
+            data[name] = values
+        for name in ('transaction_date', 'quantity', 'cross_sell_count'):
+            if name in block.columns:
+                data[name] = block[name]
+        data = self.trainer.add_features(data, reference_date=self.reference_date)
+        labels = block['response'].astype(object).map({'accepted': 1, 'rejected': 0})
+        return data[FEATURE_COLUMNS].to_numpy(dtype=float), labels.to_numpy(dtype=float, na_value=np.nan)
+
+    def iter_blocks(self, source):
+        """Генерира (X, y) по блокове; y е NaN за непознат response."""
+        self._ensure_reference_date(source)
+        for block in iter_history_blocks(source, self.chunk_size):
+            yield self.transform_block(block)
+
+    def fit_incremental(self, learner, source):
+        """Подава блоковете към инкрементален модел (IncrementalModelTrainer)."""
+        for X, y in self.iter_blocks(source):
+            known = ~np.isnan(y)
+            learner.partial_fit_arrays(X[known], y[known].astype(int))
+        return learner.model
+
+    def write_feature_matrix(self, source, path_prefix: str):
+        """
+        Записва признаците и етикетите като <path_prefix>_X.npy и <path_prefix>_y.npy
+        (float32), без да държи цялата матрица в паметта. Връща ги като memmap.
+        """
+        n_rows, reference_date = scan_history(source, self.chunk_size)
+        if self.reference_date is None:
+            self.reference_date = reference_date
+        X_out = np.lib.format.open_memmap(f"{path_prefix}_X.npy", mode='w+', dtype=np.float32,
+                                          shape=(n_rows, len(FEATURE_COLUMNS)))
+        y_out = np.lib.format.open_memmap(f"{path_prefix}_y.npy", mode='w+', dtype=np.float32,
+                                          shape=(n_rows,))
+        start = 0
+        for X, y in self.iter_blocks(source):
+            X_out[start:start + len(X)] = X
+            y_out[start:start + len(y)] = y
+            start += len(X)
+        X_out.flush()
+        y_out.flush()
+        return X_out, y_out
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+# Редът на признаците, с който моделът се обучава и оценява – единствената дефиниция
+FEATURE_COLUMNS = ['age', 'income', 'previous_purchases', 'price',
+                   'days_since_purchase', 'age_group', 'income_bracket',
+                   'loyal_client', 'quantity', 'cross_sell_count']
+# Суровите колони, от които се смятат останалите (редът при подаване на NumPy масив)
+RAW_COLUMNS = ['age', 'income', 'previous_purchases', 'price',
+               'days_since_purchase', 'quantity', 'cross_sell_count']
+
+# при липса се приемат за 0 (нов потребител без история)
+OPTIONAL_COLUMNS = ['days_since_purchase', 'quantity', 'cross_sell_count']
+
+AGE_BINS = [30, 50]            # < 30, 30-49, >= 50
+INCOME_BINS = [40000, 80000]   # < 40k, 40k-80k, >= 80k
+LOYAL_PURCHASES = 10           # лоялен клиент при >= 10 предишни покупки
+
+
+def age_group(age) -> np.ndarray:
+    # np.digitize дава 2 за NaN, както и старото 0 if x < 30 else (1 if x < 50 else 2)
+    return np.digitize(np.asarray(age, dtype=float), AGE_BINS)
+
+
+def income_bracket(income) -> np.ndarray:
+    return np.digitize(np.asarray(income, dtype=float), INCOME_BINS)
+
+
+def loyal_client(previous_purchases) -> np.ndarray:
+    return np.where(np.asarray(previous_purchases, dtype=float) >= LOYAL_PURCHASES, 1, 0)
+
+
+def add_derived_columns(data: pd.DataFrame) -> pd.DataFrame:
+    """Добавя age_group, income_bracket и loyal_client към DataFrame."""
+    data['age_group'] = age_group(data['age'])
+    data['income_bracket'] = income_bracket(data['income'])
+    data['loyal_client'] = loyal_client(data['previous_purchases'])
+    return data
+
+
+def feature_matrix(age, income, previous_purchases, price,
+                   days_since_purchase=0, quantity=0, cross_sell_count=0) -> np.ndarray:
+    """
+    Матрицата от признаци в реда на FEATURE_COLUMNS. Всеки аргумент е скалар
+    (напр. данни за един клиент) или масив с дължината на price.
+    """
+    price = np.asarray(price, dtype=float)
+    n = len(price)
+    columns = {
+        'age': age, 'income': income, 'previous_purchases': previous_purchases, 'price': price,
+        'days_since_purchase': days_since_purchase, 'quantity': quantity, 'cross_sell_count': cross_sell_count,
+    }
+    columns = {name: np.broadcast_to(np.asarray(values, dtype=float), (n,)) for name, values in columns.items()}
+    columns['age_group'] = age_group(columns['age'])
+    columns['income_bracket'] = income_bracket(columns['income'])
+    columns['loyal_client'] = loyal_client(columns['previous_purchases'])
+
+    X = np.empty((n, len(FEATURE_COLUMNS)))
+    for j, name in enumerate(FEATURE_COLUMNS):
+        X[:, j] = columns[name]
+    return X
+
+
+def build_features(data) -> np.ndarray:
+    """
+    Признаците от DataFrame със суровите колони (липсващите от days_since_purchase,
+    quantity и cross_sell_count се приемат за 0) или от NumPy масив с колони RAW_COLUMNS.
+    """
+    if isinstance(data, pd.DataFrame):
+        raw = {name: data[name].to_numpy(dtype=float, na_value=np.nan)
+               for name in RAW_COLUMNS if name in data.columns or name not in OPTIONAL_COLUMNS}
+    else:
+        data = np.asarray(data, dtype=float)
+        if data.ndim != 2 or data.shape[1] != len(RAW_COLUMNS):
+            raise ValueError(f"Очаква се масив с колони {RAW_COLUMNS}")
+        raw = {name: data[:, j] for j, name in enumerate(RAW_COLUMNS)}
+    return feature_matrix(**raw)
@@ -1,69 +1,27 @@
-import pandas as pd
-import numpy as np
-import random
-from datetime import datetime, timedelta
-
-# Задаване на seed за повторяемост
-np.random.seed(42)
-random.seed(42)
+"""
+Синтетични данни за clients, offers и history.
 
+    python generate_datas.py --clients 100 --offers 1000 --history 5000 --seed 42
+    python generate_datas.py --history 50000000 --format parquet --out-dir data
+    python generate_datas.py --capacity-share 0.3    # 30% от офертите с ограничен брой
 
-# Функция за случайна дата между две дати
-def random_date(start, end):
-    delta = end - start
-    int_delta = delta.days
-    random_day = random.randint(0, int_delta)
-    return start + timedelta(days=random_day)
+Редовете се генерират векторизирано на блокове (numpy default_rng) и всеки блок се
+записва веднага, така че паметта не зависи от броя редове. Parquet изисква pyarrow.
+"""
+import argparse
+import os
+import time
+from datetime import date
 
+import numpy as np
+import pandas as pd
 
-# ---------------------------
-# 1. Генериране на данни за клиентите (clients.csv)
-num_clients = 100
-client_ids = list(range(1, num_clients + 1))
-first_names = ["Ivan", "Petar", "Georgi", "Dimitar", "Stoian", "Hristo", "Todor", "Nikolay", "Miroslav", "Veselin"]
-last_names = ["Ivanov", "Petrov", "Georgiev", "Dimitrov", "Stoianov", "Hristov", "Todorov", "Nikolov", "Miroslavov",
+FIRST_NAMES = ["Ivan", "Petar", "Georgi", "Dimitar", "Stoian", "Hristo", "Todor", "Nikolay", "Miroslav", "Veselin"]
+LAST_NAMES = ["Ivanov", "Petrov", "Georgiev", "Dimitrov", "Stoianov", "Hristov", "Todorov", "Nikolov", "Miroslavov",
               "Veselinov"]
-categories = ["Electronics", "Fashion", "Home", "Sports", "Books", "Beauty", "Toys", "Automotive", "Grocery", "Garden"]
-
-clients = []
-start_date = datetime(2022, 1, 1)
-end_date = datetime.now()
-
-for i in client_ids:
-    gender = random.choice(["M", "F"])
-    name = f"{random.choice(first_names)} {random.choice(last_names)}"
-    age = np.random.randint(18, 70)
-    # Разпределяне на доходите: половината с по-високи, половината с по-ниски стойности
-    income = np.random.randint(60000, 120000) if random.random() < 0.5 else np.random.randint(20000, 60000)
-    previous_purchases = np.random.randint(0, 21)
-    # С вероятност 70% клиентът има поне една предпочитана категория (ако има повече от една, те са разделени със запетая)
-    if random.random() < 0.7:
-        num_pref = random.randint(1, 2)
-        preferred_categories = random.sample(categories, num_pref)
-        preferred_category = ", ".join(preferred_categories)
-    else:
-        preferred_category = None
-    last_visit_date = random_date(start_date, end_date).strftime("%Y-%m-%d")
-
-    clients.append({
-        "client_id": i,
-        "name": name,
-        "gender": gender,
-        "age": age,
-        "income": income,
-        "previous_purchases": previous_purchases,
-        "preferred_category": preferred_category,
-        "last_visit_date": last_visit_date
-    })
-clients_df = pd.DataFrame(clients)
-
-# ---------------------------
-# 2. Генериране на данни за офертите (offers.csv)
-num_offers = 1000
-offer_ids = list(range(1, num_offers + 1))
-offer_categories = categories
+CATEGORIES = ["Electronics", "Fashion", "Home", "Sports", "Books", "Beauty", "Toys", "Automotive", "Grocery", "Garden"]
 
-brand_options = {
+BRAND_OPTIONS = {
     "Electronics": ["Samsung", "Apple", "Sony", "LG", "Huawei"],
     "Fashion": ["Gucci", "Prada", "Zara", "H&M", "Uniqlo"],
     "Home": ["Ikea", "Home Depot", "Leroy Merlin"],
@@ -76,70 +34,210 @@ brand_options = {
     "Garden": ["Bunnings", "Lowe's", "Gardena"]
 }
 
-offers = []
-for i in offer_ids:
-    price = np.random.randint(50, 5001)  # Цена между 50 и 5000 лв
-    category = random.choice(offer_categories)
-    target_gender = random.choices(["All", "M", "F"], weights=[0.5, 0.25, 0.25])[0]
-    min_age = np.random.randint(18, 41)
-    max_age = np.random.randint(41, 71)
-    if min_age >= max_age:
-        min_age, max_age = max_age, min_age + 1
-    margin_percentage = random.uniform(0.1, 0.5)
-    estimated_profit = round(price * margin_percentage, 2)
-    brand = random.choice(brand_options.get(category, ["Generic"]))
-
-    min_income_required = np.random.randint(20000, 120001)  # доход между 20k и 120k
-    min_previous_purchases_required = np.random.randint(0, 11)  # между 0 и 10
-
-    offers.append({
-        "offer_id": i,
-        "offer_name": f"Product {i}",
+VISIT_START, VISIT_END = np.datetime64('2022-01-01'), np.datetime64(date.today())
+TRANS_START, TRANS_END = np.datetime64('2015-01-01'), np.datetime64('2023-12-31')
+
+PRICE_MIN, PRICE_MAX = 50, 5000
+INCOME_REQUIRED_MIN, INCOME_REQUIRED_MAX = 20000, 120000
+PURCHASES_REQUIRED_MAX = 10
+CAPACITY_MIN, CAPACITY_MAX = 1, 100
+
+
+def random_dates(rng, start, end, n: int) -> np.ndarray:
+    """Равномерно разпределени дати в [start, end] като низове 'YYYY-MM-DD'."""
+    # всички възможни дати се форматират веднъж, блокът само ги индексира
+    labels = np.datetime_as_string(np.arange(start, end + 1, dtype='datetime64[D]'), unit='D').astype(object)
+    return labels[rng.integers(0, len(labels), size=n)]
+
+
+def generate_clients(rng, start_id: int, n: int) -> pd.DataFrame:
+    gender = np.array(["M", "F"])[rng.integers(0, 2, size=n)]
+    name = np.char.add(np.char.add(np.array(FIRST_NAMES)[rng.integers(0, len(FIRST_NAMES), size=n)], " "),
+                       np.array(LAST_NAMES)[rng.integers(0, len(LAST_NAMES), size=n)])
+    age = rng.integers(18, 70, size=n)
+    # половината с по-високи, половината с по-ниски доходи
+    high = rng.random(n) < 0.5
+    income = np.where(high, rng.integers(60000, 120000, size=n), rng.integers(20000, 60000, size=n))
+    previous_purchases = rng.integers(0, 21, size=n)
+
+    # с вероятност 70% една или две различни предпочитани категории, разделени със запетая
+    categories = np.array(CATEGORIES, dtype=object)
+    first = rng.integers(0, len(CATEGORIES), size=n)
+    second = (first + rng.integers(1, len(CATEGORIES), size=n)) % len(CATEGORIES)
+    two = rng.integers(1, 3, size=n) == 2
+    preferred = np.where(two, categories[first] + ", " + categories[second], categories[first])
+    preferred[rng.random(n) >= 0.7] = None
+
+    return pd.DataFrame({
+        "client_id": np.arange(start_id, start_id + n),
+        "name": name,
+        "gender": gender,
+        "age": age,
+        "income": income,
+        "previous_purchases": previous_purchases,
+        "preferred_category": preferred,
+        "last_visit_date": random_dates(rng, VISIT_START, VISIT_END, n)
+    })
+
+
+def generate_offers(rng, start_id: int, n: int) -> pd.DataFrame:
+    offer_ids = np.arange(start_id, start_id + n)
+    price = rng.integers(PRICE_MIN, PRICE_MAX + 1, size=n)
+    category_codes = rng.integers(0, len(CATEGORIES), size=n)
+    target_gender = np.array(["All", "M", "F"])[rng.choice(3, size=n, p=[0.5, 0.25, 0.25])]
+    min_age = rng.integers(18, 41, size=n)
+    max_age = rng.integers(41, 71, size=n)
+    estimated_profit = np.round(price * rng.uniform(0.1, 0.5, size=n), 2)
+
+    brand = np.empty(n, dtype=object)
+    for code, category in enumerate(CATEGORIES):
+        rows = np.flatnonzero(category_codes == code)
+        brands = np.array(BRAND_OPTIONS.get(category, ["Generic"]), dtype=object)
+        brand[rows] = brands[rng.integers(0, len(brands), size=len(rows))]
+
+    # Изискванията следват цената: по-скъпите оферти са за клиенти с по-висок доход
+    # и повече покупки, с шум, в досегашните граници 20k-120k и 0-10.
+    price_level = (price - PRICE_MIN) / (PRICE_MAX - PRICE_MIN)
+    income_level = np.clip(price_level * rng.uniform(0.6, 1.0, size=n), 0.0, 1.0)
+    min_income_required = (INCOME_REQUIRED_MIN + income_level * (INCOME_REQUIRED_MAX - INCOME_REQUIRED_MIN)).round(-3)
+    purchases_level = np.clip(price_level * rng.uniform(0.5, 1.0, size=n), 0.0, 1.0)
+    min_previous_purchases_required = np.floor(purchases_level * (PURCHASES_REQUIRED_MAX + 1))
+
+    return pd.DataFrame({
+        "offer_id": offer_ids,
+        "offer_name": np.char.add("Product ", offer_ids.astype(str)),
         "price": price,
-        "category": category,
+        "category": np.array(CATEGORIES, dtype=object)[category_codes],
         "target_gender": target_gender,
         "min_age": min_age,
         "max_age": max_age,
         "estimated_profit": estimated_profit,
         "brand": brand,
-        "min_income_required": min_income_required,
-        "min_previous_purchases_required": min_previous_purchases_required
+        "min_income_required": min_income_required.astype(np.int64),
+        "min_previous_purchases_required": np.minimum(min_previous_purchases_required,
+                                                      PURCHASES_REQUIRED_MAX).astype(np.int64)
     })
 
-offers_df = pd.DataFrame(offers)
-
-# ---------------------------
-# 3. Генериране на данни за историята (history.csv)
-num_history = 5000
-history_entries = []
-trans_start = datetime(2015, 1, 1)
-trans_end = datetime(2023, 12, 31)
-for _ in range(num_history):
-    client_id = random.choice(client_ids)
-    offer_id = random.choice(offer_ids)
-    response = random.choices(["accepted", "rejected"], weights=[0.3, 0.7])[0]
-    transaction_date = random_date(trans_start, trans_end).strftime("%Y-%m-%d")
-    quantity = np.random.randint(1, 11)  # Между 1 и 10 единици
-    cross_sell_count = np.random.randint(0, 6) if response == "accepted" else 0
-
-    history_entries.append({
-        "client_id": client_id,
-        "offer_id": offer_id,
-        "response": response,
-        "transaction_date": transaction_date,
-        "quantity": quantity,
-        "cross_sell_count": cross_sell_count
-    })
-history_df = pd.DataFrame(history_entries)
 
-# ---------------------------
-# Записване във файлове (с UTF-8 с BOM за правилно показване на кирилица)
-clients_df.to_csv("clients.csv", index=False, encoding="utf-8-sig")
-offers_df.to_csv("offers.csv", index=False, encoding="utf-8-sig")
-history_df.to_csv("history.csv", index=False, encoding="utf-8-sig")
-
-print("Данните са успешно генерирани и записани в 'clients.csv', 'offers.csv' и 'history.csv'.")
+def add_capacity(rng, offers: pd.DataFrame, share: float) -> pd.DataFrame:
+    """Колона capacity: за дял share от офертите – брой налични, за останалите празно (без ограничение)."""
+    capped = rng.random(len(offers)) < share
+    capacity = rng.integers(CAPACITY_MIN, CAPACITY_MAX + 1, size=len(offers)).astype(float)
+    offers['capacity'] = np.where(capped, capacity, np.nan)
+    return offers
 
 
+def generate_history(rng, num_clients: int, num_offers: int, n: int) -> pd.DataFrame:
+    accepted = rng.random(n) < 0.3
+    return pd.DataFrame({
+        "client_id": rng.integers(1, num_clients + 1, size=n),
+        "offer_id": rng.integers(1, num_offers + 1, size=n),
+        "response": np.where(accepted, "accepted", "rejected"),
+        "transaction_date": random_dates(rng, TRANS_START, TRANS_END, n),
+        "quantity": rng.integers(1, 11, size=n),   # между 1 и 10 единици
+        "cross_sell_count": np.where(accepted, rng.integers(0, 6, size=n), 0)
+    })
 
 
+class CsvChunkWriter:
+    """CSV в UTF-8 с BOM (за правилно показване на кирилица), записван блок по блок."""
+
+    def __init__(self, path: str):
+        self.file = open(path, 'w', encoding='utf-8-sig', newline='')
+        self.header = True
+
+    def write(self, df: pd.DataFrame):
+        df.to_csv(self.file, index=False, header=self.header)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetChunkWriter:
+    """Parquet файл с по една row group на блок."""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("За --format parquet е нужен pyarrow (pip install pyarrow)") from e
+        self.pa = pa
+        self.pq = pq
+        self.path = path
+        self.writer = None
+
+    def write(self, df: pd.DataFrame):
+        # схемата се фиксира от първия блок (иначе блок само с None би получил друг тип)
+        schema = self.writer.schema if self.writer is not None else None
+        table = self.pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {'csv': CsvChunkWriter, 'parquet': ParquetChunkWriter}
+
+
+def write_table(path: str, fmt: str, total: int, chunk_size: int, make_chunk):
+    """Генерира и записва total реда на блокове от chunk_size; make_chunk(start, n) -> DataFrame."""
+    writer = WRITERS[fmt](path)
+    try:
+        for start in range(0, total, chunk_size):
+            writer.write(make_chunk(start, min(chunk_size, total - start)))
+    finally:
+        writer.close()
+
+
+def generate(num_clients: int = 100, num_offers: int = 1000, num_history: int = 5000, seed: int = 42,
+             fmt: str = 'csv', out_dir: str = '.', chunk_size: int = 1_000_000, capacity_share: float = 0.0) -> dict:
+    """
+    Генерира трите таблици в out_dir. Връща пътищата им.
+    С capacity_share > 0 офертите получават колона capacity (вж. add_capacity).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    # отделен поток случайни числа за всяка таблица: броят клиенти не променя офертите;
+    # капацитетът е в свой поток, за да не променя останалите колони
+    client_rng, offer_rng, history_rng, capacity_rng = (
+        np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(4))
+    paths = {name: os.path.join(out_dir, f"{name}.{fmt}") for name in ('clients', 'offers', 'history')}
+
+    def offers_chunk(start, n):
+        offers = generate_offers(offer_rng, start + 1, n)
+        return add_capacity(capacity_rng, offers, capacity_share) if capacity_share > 0 else offers
+
+    write_table(paths['clients'], fmt, num_clients, chunk_size,
+                lambda start, n: generate_clients(client_rng, start + 1, n))
+    write_table(paths['offers'], fmt, num_offers, chunk_size, offers_chunk)
+    write_table(paths['history'], fmt, num_history, chunk_size,
+                lambda start, n: generate_history(history_rng, num_clients, num_offers, n))
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Генериране на синтетични clients, offers и history")
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--offers', type=int, default=1000)
+    parser.add_argument('--history', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--format', choices=sorted(WRITERS), default='csv')
+    parser.add_argument('--out-dir', default='.')
+    parser.add_argument('--chunk-size', type=int, default=1_000_000, help="редове в блок")
+    parser.add_argument('--capacity-share', type=float, default=0.0,
+                        help="дял оферти с ограничен капацитет (колона capacity); 0 = без колоната")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    paths = generate(args.clients, args.offers, args.history, args.seed,
+                     args.format, args.out_dir, args.chunk_size, args.capacity_share)
+    print(f"Данните са успешно генерирани и записани в {', '.join(repr(p) for p in paths.values())} "
+          f"за {time.perf_counter() - started:.1f} s.")
+
+
+if __name__ == '__main__':
+    main()
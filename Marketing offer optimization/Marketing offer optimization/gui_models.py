@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class DataFrameTableModel(QAbstractTableModel):
+    """
+    Таблица за QTableView директно върху колоните на DataFrame като масиви.
+    Клетките се форматират само когато се показват, затова и 100k реда се зареждат веднага.
+    """
+
+    def __init__(self, df: pd.DataFrame = None, parent=None):
+        super().__init__(parent)
+        self._columns = []
+        self._arrays = []
+        self._n_rows = 0
+        if df is not None:
+            self.set_frame(df)
+
+    def set_frame(self, df: pd.DataFrame):
+        self.beginResetModel()
+        if df is None:
+            df = pd.DataFrame()
+        self._columns = [str(c) for c in df.columns]
+        self._arrays = [df[c].to_numpy() for c in df.columns]
+        self._n_rows = len(df)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._n_rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self._arrays[index.column()][index.row()]
+        if role == Qt.DisplayRole:
+            if isinstance(value, (float, np.floating)):
+                return f"{value:.0f}" if float(value).is_integer() else f"{value:.4f}"
+            return str(value)
+        if role == Qt.TextAlignmentRole and isinstance(value, (int, float, np.number)):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._columns[section]
+        return str(section + 1)
@@ -0,0 +1,66 @@
+import logging
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from model_registry import train_and_register
+from recommendation_engine import CampaignCancelled
+
+
+class TrainingWorker(QThread):
+    """Обучава модела във фонов режим и го записва в регистъра."""
+    trained = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, registry, key, clients, offers, history, parent=None):
+        super().__init__(parent)
+        self.registry = registry
+        self.key = key
+        self.clients = clients
+        self.offers = offers
+        self.history = history
+
+    def run(self):
+        try:
+            scorer = train_and_register(self.registry, self.key, self.clients, self.offers, self.history)
+        except Exception as e:
+            logging.exception("Грешка при обучение на модела")
+            self.failed.emit(str(e))
+            return
+        self.trained.emit(scorer)
+
+
+class CampaignWorker(QThread):
+    """
+    Оптимизира кампанията във фонов режим. progress(фаза, готово, общо) се излъчва
+    за всяка фаза; requestInterruption() прекъсва между блоковете и фазите.
+    """
+    progress = pyqtSignal(str, int, int)
+    finished_ok = pyqtSignal(object)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, recommender, clients, total_budget, parent=None, **options):
+        super().__init__(parent)
+        self.recommender = recommender
+        self.clients = clients
+        self.total_budget = total_budget
+        self.options = options
+
+    def run(self):
+        try:
+            assignments = self.recommender.optimize_campaign(
+                self.clients, self.total_budget,
+                progress_callback=self.progress.emit,
+                should_cancel=self.isInterruptionRequested,
+                **self.options)
+        except CampaignCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            logging.exception("Грешка при оптимизация на кампанията")
+            self.failed.emit(str(e))
+            return
+        if self.isInterruptionRequested():
+            self.cancelled.emit()
+            return
+        self.finished_ok.emit(assignments)
@@ -0,0 +1,109 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import IncrementalPCA
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from config import INCREMENTAL_CONFIG, MODEL_CONFIG, STREAM_CONFIG
+from feature_stream import scan_history
+from model_trainer import ModelTrainer
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalModelTrainer:
+    """
+    Дообучаване само с новите редове от history, без пълно обучение.
+    StandardScaler, IncrementalPCA и SGDClassifier (логистична загуба) се обновяват
+    с partial_fit, така че цената на обновяването зависи само от размера на делтата.
+    Пълното обучение (ModelTrainer.train_model) остава отделен път.
+    reference_date е най-новата дата във вече видяната история (от предишната версия
+    или от ClientFeatureStore.reference_date) – спрямо нея се смята days_since_purchase.
+    """
+
+    def __init__(self, clients, offers, model: Pipeline = None, rows_seen: int = 0, reference_date=None):
+        self.clients = clients
+        self.offers = offers
+        self.model = model if model is not None else self._new_pipeline()
+        self.rows_seen = rows_seen
+        self.reference_date = pd.Timestamp(reference_date) if reference_date is not None else None
+
+    @staticmethod
+    def _new_pipeline() -> Pipeline:
+        return Pipeline([
+            ('scaler', StandardScaler()),
+            ('pca', IncrementalPCA(n_components=INCREMENTAL_CONFIG['pca_components'])),
+            ('lr', SGDClassifier(loss='log_loss', alpha=INCREMENTAL_CONFIG['alpha'],
+                                 random_state=MODEL_CONFIG['random_state']))
+        ])
+
+    def _advance_reference_date(self, newest):
+        """
+        Референтната дата за days_since_purchase: STREAM_CONFIG['reference_date'], ако е
+        зададена, иначе най-новата дата в цялата история – по-новата от досегашната и newest.
+        """
+        if STREAM_CONFIG['reference_date'] is not None:
+            self.reference_date = pd.Timestamp(STREAM_CONFIG['reference_date'])
+        elif pd.notna(newest) and (self.reference_date is None or newest > self.reference_date):
+            self.reference_date = pd.Timestamp(newest)
+        return self.reference_date
+
+    def features_for(self, new_history):
+        """
+        Признаците за новите редове – същите като при пълното обучение върху цялата история:
+        days_since_purchase се смята спрямо най-новата дата в нея, а не само в делтата.
+        """
+        newest = pd.to_datetime(new_history['transaction_date'], format="%Y-%m-%d", errors='coerce').max() \
+            if 'transaction_date' in new_history.columns else pd.NaT
+        reference_date = self._advance_reference_date(newest)
+        features, labels = ModelTrainer(self.clients, self.offers, new_history).preprocess_data(reference_date)
+        known = labels.notna().to_numpy()
+        return features.to_numpy(dtype=float)[known], labels.to_numpy()[known].astype(int)
+
+    def partial_fit_arrays(self, X: np.ndarray, y: np.ndarray):
+        """Обновява скалера, PCA и класификатора с един блок от признаци."""
+        if len(X) == 0:
+            return self.model
+        scaler = self.model.named_steps['scaler']
+        pca = self.model.named_steps['pca']
+        classifier = self.model.named_steps['lr']
+
+        scaler.partial_fit(X)
+        Z = scaler.transform(X)
+        # IncrementalPCA изисква поне n_components реда в блок
+        if len(Z) >= pca.n_components:
+            pca.partial_fit(Z)
+        elif not hasattr(pca, 'components_'):
+            raise ValueError(f"Първият блок трябва да има поне {pca.n_components} реда")
+        else:
+            logger.info("Блок с %d реда е твърде малък за PCA; обновява се само класификаторът", len(Z))
+        classifier.partial_fit(pca.transform(Z), y, classes=np.array([0, 1]))
+        self.rows_seen += len(X)
+        return self.model
+
+    def partial_fit(self, new_history):
+        """Дообучава модела с новите редове от history."""
+        X, y = self.features_for(new_history)
+        return self.partial_fit_arrays(X, y)
+
+    def bootstrap(self, history, chunk_size: int = None):
+        """Началният модел: цялата налична история, подадена на блокове към partial_fit."""
+        chunk_size = chunk_size or INCREMENTAL_CONFIG['chunk_size']
+        X, y = self.features_for(history)
+        for start in range(0, len(X), chunk_size):
+            self.partial_fit_arrays(X[start:start + chunk_size], y[start:start + chunk_size])
+        return self.model
+
+    def fit_stream(self, source, reference_date=None, chunk_size: int = None):
+        """
+        Дообучава модела от история, която не се събира в паметта (CSV файл или DataFrame),
+        блок по блок през StreamingFeaturePipeline.
+        """
+        if reference_date is None:
+            _, newest = scan_history(source, chunk_size)
+            reference_date = self._advance_reference_date(newest)
+        pipeline = ModelTrainer(self.clients, self.offers, None).stream_features(reference_date, chunk_size)
+        return pipeline.fit_incremental(self, source)
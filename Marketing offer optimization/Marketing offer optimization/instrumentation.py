@@ -0,0 +1,201 @@
+"""
+Измерване на етапите в pipeline-а: времена, броячи и най-голямата използвана памет.
+
+    from instrumentation import metrics
+    metrics.enable()
+    with metrics.stage('recommend.predict'):
+        ...
+    metrics.count('recommend.eligible_offers', len(eligible))
+    print(metrics.to_prometheus())
+
+Когато е изключено (INSTRUMENTATION_CONFIG['enabled'] = False), stage() връща общ
+празен context manager, а count() и observe() само проверяват един флаг.
+"""
+import contextlib
+import io
+import sys
+import threading
+import time
+
+from config import INSTRUMENTATION_CONFIG
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+
+def _max_rss_bytes():
+    """Най-голямата резидентна памет на процеса досега (high-water mark)."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux връща KiB, macOS – байтове
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+class _StageTimer:
+    __slots__ = ('owner', 'name', 'started')
+
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.owner.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Instrumentation:
+    """Натрупани времена по етап и броячи (по име и етикети); безопасно от няколко нишки."""
+
+    def __init__(self, enabled: bool = False, track_memory: bool = True):
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self._lock = threading.Lock()
+        self.reset()
+
+    def enable(self, track_memory: bool = None):
+        if track_memory is not None:
+            self.track_memory = track_memory
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}     # име -> [брой, сума, максимум] в секунди
+            self.counters = {}   # (име, етикети) -> стойност
+            self.memory_high_water = None
+
+    def stage(self, name: str):
+        """Context manager, който добавя времето на блока към етапа name."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _StageTimer(self, name)
+
+    def observe(self, name: str, seconds: float):
+        """Добавя вече измерено време (напр. build_time на решателя) към етапа name."""
+        if not self.enabled:
+            return
+        rss = _max_rss_bytes() if self.track_memory else None
+        with self._lock:
+            stat = self.stages.get(name)
+            if stat is None:
+                self.stages[name] = [1, seconds, seconds]
+            else:
+                stat[0] += 1
+                stat[1] += seconds
+                stat[2] = max(stat[2], seconds)
+            if rss is not None and (self.memory_high_water is None or rss > self.memory_high_water):
+                self.memory_high_water = rss
+
+    def count(self, name: str, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def timed_iter(self, iterable, name: str):
+        """Генерира елементите на iterable, като времето за всеки следващ отива в етапа name."""
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(name, time.perf_counter() - started)
+            yield item
+
+    def snapshot(self) -> dict:
+        """Текущите стойности като обикновени dict/float, за четене в процеса."""
+        with self._lock:
+            return {
+                'stages': {name: {'count': n, 'total_s': total, 'mean_s': total / n, 'max_s': peak}
+                           for name, (n, total, peak) in self.stages.items()},
+                'counters': {_label_key(name, labels): value for (name, labels), value in self.counters.items()},
+                'memory_high_water_bytes': self.memory_high_water,
+            }
+
+    def to_prometheus(self, prefix: str = 'moo') -> str:
+        """Стойностите в текстовия формат на Prometheus."""
+        with self._lock:
+            stages = sorted(self.stages.items())
+            counters = sorted(self.counters.items())
+            memory = self.memory_high_water
+        lines = [f'# HELP {prefix}_stage_seconds Време по етап на pipeline-а.',
+                 f'# TYPE {prefix}_stage_seconds summary']
+        for name, (n, total, _) in stages:
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{_escape(name)}"}} {n}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{_escape(name)}"}} {total!r}')
+        lines += [f'# HELP {prefix}_stage_seconds_max Най-дългото изпълнение на етапа.',
+                  f'# TYPE {prefix}_stage_seconds_max gauge']
+        for name, (_, _, peak) in stages:
+            lines.append(f'{prefix}_stage_seconds_max{{stage="{_escape(name)}"}} {peak!r}')
+        lines += [f'# HELP {prefix}_events_total Броячи на pipeline-а.',
+                  f'# TYPE {prefix}_events_total counter']
+        for (name, labels), value in counters:
+            label_text = ','.join([f'name="{_escape(name)}"'] +
+                                  [f'{k}="{_escape(str(v))}"' for k, v in labels])
+            lines.append(f'{prefix}_events_total{{{label_text}}} {value!r}')
+        if memory is not None:
+            lines += [f'# HELP {prefix}_memory_high_water_bytes Най-голямата резидентна памет на процеса.',
+                      f'# TYPE {prefix}_memory_high_water_bytes gauge',
+                      f'{prefix}_memory_high_water_bytes {memory}']
+        return '\n'.join(lines) + '\n'
+
+
+def _label_key(name: str, labels: tuple) -> str:
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{k}={v}' for k, v in labels) + '}'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+_NULL_STAGE = contextlib.nullcontext()
+
+# общият екземпляр за целия процес
+metrics = Instrumentation(INSTRUMENTATION_CONFIG['enabled'], INSTRUMENTATION_CONFIG['track_memory'])
+
+
+def profile_call(fn, *args, profiler: str = None, sort: str = 'cumulative', limit: int = 30, **kwargs):
+    """
+    Изпълнява fn(*args, **kwargs) под профилатор и връща (резултат, текстов отчет).
+    profiler е 'cprofile' или 'pyinstrument' (ако е инсталиран); по подразбиране от конфигурацията.
+    """
+    profiler = profiler or INSTRUMENTATION_CONFIG['profiler']
+    if profiler == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError as e:
+            raise ImportError("profiler='pyinstrument' изисква pyinstrument (pip install pyinstrument)") from e
+        capture = Profiler()
+        capture.start()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            capture.stop()
+        return result, capture.output_text()
+    if profiler != 'cprofile':
+        raise ValueError(f"Непознат профилатор {profiler!r}; очаква се 'cprofile' или 'pyinstrument'")
+
+    import cProfile
+    import pstats
+    capture = cProfile.Profile()
+    result = capture.runcall(fn, *args, **kwargs)
+    out = io.StringIO()
+    pstats.Stats(capture, stream=out).sort_stats(sort).print_stats(limit)
+    return result, out.getvalue()
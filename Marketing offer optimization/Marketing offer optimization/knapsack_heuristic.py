@@ -0,0 +1,173 @@
+import numpy as np
+
+
+class GroupedCandidates:
+    """
+    Кандидатите, подредени по клиент, за да се смятат максимуми по клиент
+    с np.maximum.reduceat вместо groupby.
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.order = np.argsort(problem.client_codes, kind='stable')
+        self.clients = problem.client_codes[self.order]
+        self.scores = problem.scores[self.order]
+        self.prices = problem.prices[self.order]
+        self.starts = np.flatnonzero(np.r_[True, self.clients[1:] != self.clients[:-1]]) \
+            if len(self.order) else np.array([], dtype=np.int64)
+        # пореден номер на групата (клиента) за всяка позиция в подредения масив
+        self.group_of = np.repeat(np.arange(len(self.starts)), np.diff(np.r_[self.starts, len(self.order)]))
+
+    def best_per_client(self, lam: float):
+        """
+        За всеки клиент най-добрата оферта по combined_score - lam * price.
+        Връща позициите (в подредения масив) на избраните оферти с положителна
+        редуцирана оценка и стойността на Лагранжевата функция за lam.
+        """
+        reduced = self.scores - lam * self.prices
+        group_max = np.maximum.reduceat(reduced, self.starts)
+        group_of = self.group_of
+        at_max = np.flatnonzero(reduced == group_max[group_of])
+        first = np.r_[True, group_of[at_max][1:] != group_of[at_max][:-1]]
+        picks = at_max[first]
+        picks = picks[reduced[picks] > 0]
+        dual_value = float(lam * self.problem.total_budget + np.maximum(group_max, 0).sum())
+        return picks, dual_value
+
+    def to_original(self, picks: np.ndarray) -> np.ndarray:
+        selected = np.zeros(len(self.order), dtype=bool)
+        selected[self.order[picks]] = True
+        return selected
+
+
+def lagrangian_assignment(problem, max_iter: int = 60, tol: float = 1e-6, lam_hint: float = None):
+    """
+    Бисекция по двойствената цена lam на бюджета. Връща избора при най-малката
+    намерена lam, за която бюджетът се спазва, самата lam и най-добрата горна граница
+    min L(lam), която за тази задача съвпада с LP границата.
+    С lam_hint (напр. lam за съседен бюджет) интервалът се търси около нея.
+    """
+    grouped = GroupedCandidates(problem)
+    budget = problem.total_budget
+
+    picks, bound = grouped.best_per_client(0.0)
+    if grouped.prices[picks].sum() <= budget:
+        return grouped, picks, 0.0, bound
+
+    positive = (grouped.scores > 0) & (grouped.prices > 0)
+    lo = 0.0
+    hi = float((grouped.scores[positive] / grouped.prices[positive]).max()) if positive.any() else 0.0
+    best_picks, dual_value = grouped.best_per_client(hi)
+    bound = min(bound, dual_value)
+    if lam_hint is not None and lo < lam_hint < hi:
+        lo, hi, best_picks, bound = _bracket(grouped, lam_hint, lo, hi, best_picks, bound, tol)
+    for _ in range(max_iter):
+        if hi - lo <= tol * max(hi, 1.0):
+            break
+        mid = 0.5 * (lo + hi)
+        picks, dual_value = grouped.best_per_client(mid)
+        bound = min(bound, dual_value)
+        if grouped.prices[picks].sum() <= budget:
+            hi, best_picks = mid, picks
+        else:
+            lo = mid
+    return grouped, best_picks, hi, bound
+
+
+def _bracket(grouped: GroupedCandidates, lam_hint: float, lo: float, hi: float,
+             best_picks: np.ndarray, bound: float, tol: float):
+    """
+    Стеснява [lo, hi] около lam_hint: стъпка от 1% от lam_hint, удвоявана, докато
+    интервалът не обхване границата на допустимост. Връща новите lo, hi, избора при hi и границата.
+    """
+    budget = grouped.problem.total_budget
+    step = max(0.01 * lam_hint, tol)
+    picks, dual_value = grouped.best_per_client(lam_hint)
+    bound = min(bound, dual_value)
+    if grouped.prices[picks].sum() <= budget:
+        hi, best_picks = lam_hint, picks
+        while hi - step > lo:
+            picks, dual_value = grouped.best_per_client(hi - step)
+            bound = min(bound, dual_value)
+            if grouped.prices[picks].sum() > budget:
+                return hi - step, hi, best_picks, bound
+            hi, best_picks = hi - step, picks
+            step *= 2
+        return lo, hi, best_picks, bound
+    lo = lam_hint
+    while lo + step < hi:
+        picks, dual_value = grouped.best_per_client(lo + step)
+        bound = min(bound, dual_value)
+        if grouped.prices[picks].sum() <= budget:
+            return lo, lo + step, picks, bound
+        lo += step
+        step *= 2
+    return lo, hi, best_picks, bound
+
+
+def greedy_repair(grouped: GroupedCandidates, picks: np.ndarray, max_rounds: int = 5) -> np.ndarray:
+    """
+    Използва остатъка от бюджета: на всеки клиент се предлага най-изгодното подобрение
+    (нова оферта или по-добра замяна) и подобренията се приемат по намаляващо
+    съотношение печалба / допълнителна цена, докато има бюджет.
+    """
+    n_clients = len(grouped.starts)
+    current = np.full(n_clients, -1, dtype=np.int64)
+    group_of = grouped.group_of
+    current[group_of[picks]] = picks
+
+    for _ in range(max_rounds):
+        remaining = grouped.problem.total_budget - grouped.prices[current[current >= 0]].sum()
+        has_current = current[group_of] >= 0
+        base_score = np.where(has_current, grouped.scores[np.maximum(current[group_of], 0)], 0.0)
+        base_price = np.where(has_current, grouped.prices[np.maximum(current[group_of], 0)], 0.0)
+        gain = grouped.scores - base_score
+        extra = grouped.prices - base_price
+
+        valid = (gain > 1e-12) & (extra <= remaining)
+        if not valid.any():
+            break
+        ratio = np.where(extra > 0, gain / np.maximum(extra, 1e-12), np.inf)
+        ratio = np.where(valid, ratio, -np.inf)
+        # по едно подобрение на клиент – първото с най-добро съотношение печалба / цена
+        group_best = np.maximum.reduceat(ratio, grouped.starts)
+        cand = np.flatnonzero(valid & (ratio == group_best[group_of]))
+        cand = cand[np.r_[True, group_of[cand][1:] != group_of[cand][:-1]]]
+        cand = cand[np.lexsort((-gain[cand], -ratio[cand]))]
+
+        taken = []
+        for i, cost in zip(cand.tolist(), extra[cand].tolist()):
+            if cost <= remaining:
+                taken.append(i)
+                remaining -= cost
+        if not taken:
+            break
+        taken = np.array(taken, dtype=np.int64)
+        current[group_of[taken]] = taken
+    return current[current >= 0]
+
+
+def solve_lagrangian(problem, max_iter: int = 60, lam_hint: float = None):
+    """
+    Евристика за кампанията (multiple-choice knapsack): бисекция по lam и алчно
+    допълване на остатъка от бюджета. Връща (избор, lam, горна граница).
+    """
+    grouped, picks, lam, bound = lagrangian_assignment(problem, max_iter=max_iter, lam_hint=lam_hint)
+    picks = greedy_repair(grouped, picks)
+    return grouped.to_original(picks), lam, bound
+
+
+def reduced_candidate_set(problem, selected: np.ndarray, lam: float, top_k: int) -> np.ndarray:
+    """
+    Позициите на кандидатите с top_k най-добри редуцирани оценки при lam за всеки клиент,
+    плюс вече избраните – по-малка задача за точно дорешаване с MILP.
+    """
+    reduced = problem.scores - lam * problem.prices
+    order = np.lexsort((-reduced, problem.client_codes))
+    clients = problem.client_codes[order]
+    starts = np.flatnonzero(np.r_[True, clients[1:] != clients[:-1]])
+    rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    keep = np.zeros(len(order), dtype=bool)
+    keep[order[rank < top_k]] = True
+    keep |= selected
+    return np.flatnonzero(keep)
@@ -0,0 +1,73 @@
+import numpy as np
+
+from features import FEATURE_COLUMNS
+
+
+def _step_affine(step, d):
+    """
+    Представя една линейна стъпка от pipeline-а като x -> x @ A + c.
+    Поддържат се StandardScaler и PCA / IncrementalPCA.
+    """
+    name = type(step).__name__
+    if name == 'StandardScaler':
+        mean = step.mean_ if step.mean_ is not None else np.zeros(d)
+        scale = step.scale_ if step.scale_ is not None else np.ones(d)
+        return np.diag(1.0 / scale), -mean / scale
+    if name in ('PCA', 'IncrementalPCA'):
+        A = step.components_.T.copy()
+        if step.whiten:
+            A /= np.sqrt(step.explained_variance_)
+        mean = step.mean_ if step.mean_ is not None else np.zeros(d)
+        return A, -mean @ A
+    raise ValueError(f"Стъпката {name} не може да бъде сгъната в линеен модел")
+
+
+class LinearScorer:
+    """
+    Обученият pipeline (StandardScaler -> PCA -> линеен класификатор), сгънат до
+    едно тегло на признак и свободен член: p = sigmoid(X @ w + b).
+    За оценяване не е нужен scikit-learn.
+    """
+
+    def __init__(self, weights, intercept, feature_columns=None):
+        self.weights = np.asarray(weights, dtype=float)
+        self.intercept = float(intercept)
+        self.feature_columns = list(feature_columns) if feature_columns is not None else list(FEATURE_COLUMNS)
+
+    @classmethod
+    def from_pipeline(cls, pipeline, feature_columns=None):
+        steps = [step for _, step in pipeline.steps]
+        classifier = steps[-1]
+        coef = np.asarray(classifier.coef_, dtype=float)
+        if coef.shape[0] != 1:
+            raise ValueError("Поддържа се само бинарен класификатор")
+
+        d = getattr(steps[0], 'n_features_in_', coef.shape[1])
+        A = np.eye(d)
+        c = np.zeros(d)
+        for step in steps[:-1]:
+            step_A, step_c = _step_affine(step, A.shape[1])
+            A, c = A @ step_A, c @ step_A + step_c
+
+        weights = A @ coef[0]
+        intercept = c @ coef[0] + float(np.ravel(classifier.intercept_)[0])
+        if feature_columns is None:
+            feature_columns = getattr(steps[0], 'feature_names_in_', None)
+        return cls(weights, intercept, feature_columns)
+
+    def decision_function(self, X) -> np.ndarray:
+        return np.asarray(X, dtype=float) @ self.weights + self.intercept
+
+    def predict_proba(self, X) -> np.ndarray:
+        # стабилна сигмоида: 1 / (1 + e^-z) = e^(-log(1 + e^-z))
+        p = np.exp(-np.logaddexp(0.0, -self.decision_function(X)))
+        return np.column_stack([1.0 - p, p])
+
+    def save(self, path):
+        np.savez(path, weights=self.weights, intercept=np.array(self.intercept),
+                 feature_columns=np.array(self.feature_columns))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['weights'], data['intercept'], data['feature_columns'].tolist())
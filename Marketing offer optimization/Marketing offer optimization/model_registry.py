@@ -0,0 +1,238 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from config import ARTIFACT_PATHS, CSV_PATHS, INCREMENTAL_CONFIG, MODEL_CONFIG
+from linear_scorer import LinearScorer
+
+logger = logging.getLogger(__name__)
+
+# сменя се при промяна във формата на записаните модели
+REGISTRY_FORMAT = 2
+# файлът в директорията на ключа, който сочи текущия запис
+CURRENT_POINTER = 'CURRENT'
+
+# хешовете на входните файлове по (абсолютен път, mtime, размер): непроменен файл не се чете наново
+_FILE_DIGESTS = {}
+
+
+def _file_digest(path: str) -> str:
+    stat = os.stat(path)
+    cache_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    digest = _FILE_DIGESTS.get(cache_key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        digest = _FILE_DIGESTS[cache_key] = sha.hexdigest()
+    return digest
+
+
+class ModelRegistry:
+    """
+    Обучените модели на диска, адресирани по хеш на входните CSV файлове и MODEL_CONFIG.
+    За всеки ключ се пазят pipeline-ът (joblib), сгънатият LinearScorer,
+    избраните параметри и CV оценките.
+
+    Директорията на ключа съдържа записите (по една директория на запис, която след
+    записа не се променя) и файла CURRENT с името на текущия запис.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or ARTIFACT_PATHS['model_registry']
+
+    def fingerprint(self, csv_paths: dict = None, model_config: dict = None) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"format={REGISTRY_FORMAT}".encode())
+        digest.update(json.dumps(model_config or MODEL_CONFIG, sort_keys=True, default=str).encode())
+        for name, path in sorted((csv_paths or CSV_PATHS).items()):
+            digest.update(name.encode())
+            digest.update(_file_digest(path).encode())
+        return digest.hexdigest()[:16]
+
+    def _entry(self, key: str):
+        """Директорията на текущия запис за ключа или None."""
+        try:
+            with open(os.path.join(self.root, key, CURRENT_POINTER), encoding='utf-8') as f:
+                entry = os.path.join(self.root, key, f.read().strip())
+        except FileNotFoundError:
+            return None
+        return entry if os.path.exists(os.path.join(entry, 'metadata.json')) else None
+
+    def has(self, key: str) -> bool:
+        return self._entry(key) is not None
+
+    def load_metadata(self, key: str) -> dict:
+        entry = self._entry(key)
+        if entry is None:
+            raise FileNotFoundError(f"Няма модел с ключ {key} в {self.root}")
+        with open(os.path.join(entry, 'metadata.json'), encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_scorer(self, key: str):
+        """LinearScorer за ключа или None; не изисква scikit-learn."""
+        entry = self._entry(key)
+        if entry is None:
+            return None
+        return LinearScorer.load(os.path.join(entry, 'linear_scorer.npz'))
+
+    def load_pipeline(self, key: str):
+        """Целият обучен pipeline за ключа или None."""
+        entry = self._entry(key)
+        if entry is None:
+            return None
+        import joblib
+        return joblib.load(os.path.join(entry, 'model.joblib'))
+
+    def _write(self, directory: str, model, metadata: dict) -> str:
+        """
+        Записва модела във временна директория до directory и я преименува на directory.
+        directory не бива да съществува: записите не се подменят, а се публикуват нови
+        (вж. _publish). Ако друг процес вече е заел името, се хвърля OSError.
+        """
+        import joblib
+        parent = os.path.dirname(directory)
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=os.path.basename(directory) + '.', suffix='.tmp', dir=parent)
+        try:
+            joblib.dump(model, os.path.join(tmp_dir, 'model.joblib'))
+            LinearScorer.from_pipeline(model).save(os.path.join(tmp_dir, 'linear_scorer.npz'))
+            metadata = dict(metadata, created=time.strftime('%Y-%m-%dT%H:%M:%S'))
+            # metadata.json се пише последен – по него се проверява дали записът е пълен
+            with open(os.path.join(tmp_dir, 'metadata.json'), 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, ensure_ascii=False, indent=2, default=str)
+            # os.rename, а не os.replace: не презаписва съществуваща директория и на Windows
+            os.rename(tmp_dir, directory)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return directory
+
+    def _publish(self, key: str, model, metadata: dict) -> str:
+        """
+        Записва нов запис за ключа и го прави текущ с едно преименуване на файла CURRENT:
+        читателите виждат или стария, или новия запис, а ключът не изчезва нито за миг.
+        Предишният запис остава за читателите, които вече са го избрали; по-старите се трият.
+        """
+        key_dir = os.path.join(self.root, key)
+        previous = self._entry(key)
+        entry = self._write(os.path.join(key_dir, f"e{time.time_ns():x}-{os.getpid()}"), model, metadata)
+
+        fd, tmp_pointer = tempfile.mkstemp(prefix=CURRENT_POINTER + '.', suffix='.tmp', dir=key_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(os.path.basename(entry))
+            os.replace(tmp_pointer, os.path.join(key_dir, CURRENT_POINTER))
+        except BaseException:
+            if os.path.exists(tmp_pointer):
+                os.remove(tmp_pointer)
+            shutil.rmtree(entry, ignore_errors=True)
+            raise
+
+        keep = {CURRENT_POINTER, os.path.basename(entry)}
+        if previous is not None:
+            keep.add(os.path.basename(previous))
+        for name in os.listdir(key_dir):
+            if name not in keep and not name.endswith('.tmp'):
+                shutil.rmtree(os.path.join(key_dir, name), ignore_errors=True)
+        return entry
+
+    def save(self, key: str, model, best_params: dict, cv_scores) -> str:
+        return self._publish(key, model, {
+            'key': key,
+            'model_config': MODEL_CONFIG,
+            'best_params': best_params,
+            'cv_scores': [float(s) for s in cv_scores],
+        })
+
+    # --- версии на инкрементално обновяваните модели ---
+
+    def _version_dir(self, line: str, version: int) -> str:
+        return os.path.join(self.root, line, f"v{version:04d}")
+
+    def versions(self, line: str) -> list:
+        """Пълните версии в линията, във възходящ ред."""
+        directory = os.path.join(self.root, line)
+        if not os.path.isdir(directory):
+            return []
+        found = []
+        for name in os.listdir(directory):
+            if name.startswith('v') and name[1:].isdigit() and \
+                    os.path.exists(os.path.join(directory, name, 'metadata.json')):
+                found.append(int(name[1:]))
+        return sorted(found)
+
+    def save_version(self, line: str, model, metadata: dict) -> int:
+        """Записва модела като следваща версия в линията и връща номера ѝ."""
+        existing = self.versions(line)
+        version = existing[-1] + 1 if existing else 1
+        self._write(self._version_dir(line, version), model, dict(metadata, line=line, version=version))
+        return version
+
+    def load_version(self, line: str, version: int = None):
+        """(pipeline, metadata) за версията (по подразбиране последната) или None."""
+        existing = self.versions(line)
+        if not existing:
+            return None
+        version = version or existing[-1]
+        import joblib
+        directory = self._version_dir(line, version)
+        with open(os.path.join(directory, 'metadata.json'), encoding='utf-8') as f:
+            metadata = json.load(f)
+        return joblib.load(os.path.join(directory, 'model.joblib')), metadata
+
+    def load_version_scorer(self, line: str, version: int = None):
+        existing = self.versions(line)
+        if not existing:
+            return None
+        return LinearScorer.load(os.path.join(self._version_dir(line, version or existing[-1]),
+                                              'linear_scorer.npz'))
+
+
+def train_and_register(registry: ModelRegistry, key: str, clients, offers, history):
+    """Обучава модела наново и го записва в регистъра под key. Връща LinearScorer."""
+    from model_trainer import ModelTrainer
+
+    trainer = ModelTrainer(clients, offers, history)
+    model, _ = trainer.train_model()
+    registry.save(key, model, trainer.best_params, trainer.cv_scores)
+    logger.info("Моделът е записан в регистъра с ключ %s", key)
+    return registry.load_scorer(key)
+
+
+def update_incremental(registry: ModelRegistry, clients, offers, new_history, line: str = None,
+                       reference_date=None):
+    """
+    Дообучава последната версия в линията с новите редове (или започва нова линия
+    от тях) и записва резултата като следваща версия. Връща номера на версията.
+    Най-новата дата във видяната история се пази в метаданните на версията;
+    reference_date (напр. feature_store.reference_date) може да я зададе наготово.
+    """
+    from incremental_trainer import IncrementalModelTrainer
+
+    line = line or INCREMENTAL_CONFIG['line']
+    previous = registry.load_version(line)
+    if previous is None:
+        trainer = IncrementalModelTrainer(clients, offers, reference_date=reference_date)
+        trainer.bootstrap(new_history)
+        parent = None
+    else:
+        model, metadata = previous
+        trainer = IncrementalModelTrainer(clients, offers, model, metadata['rows_seen'],
+                                          reference_date or metadata.get('reference_date'))
+        trainer.partial_fit(new_history)
+        parent = metadata['version']
+    version = registry.save_version(line, trainer.model, {
+        'parent': parent,
+        'delta_rows': len(new_history),
+        'rows_seen': trainer.rows_seen,
+        'reference_date': str(trainer.reference_date.date()) if trainer.reference_date is not None else None,
+        'incremental_config': INCREMENTAL_CONFIG,
+    })
+    logger.info("Инкрементален модел %s v%d (%d нови реда)", line, version, len(new_history))
+    return version
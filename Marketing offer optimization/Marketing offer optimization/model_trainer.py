@@ -1,12 +1,19 @@
+import shutil
+import tempfile
+
 import numpy as np
 import pandas as pd
 from sklearn.decomposition import PCA
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
 from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import GridSearchCV, cross_val_score
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, RandomizedSearchCV
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 
 from config import MODEL_CONFIG
+from feature_stream import StreamingFeaturePipeline
+from features import FEATURE_COLUMNS, add_derived_columns
+from linear_scorer import LinearScorer
 
 
 class ModelTrainer:
@@ -16,12 +23,16 @@ class ModelTrainer:
         self.history = history
         self.scaler = None
         self.model = None
+        self.best_params = None
+        self.cv_scores = None
 
-    def add_features(self, data):
+    def add_features(self, data, reference_date=None):
         # Ако има transaction_date, изчисляваме дни от покупката
+        # (спрямо reference_date или, ако не е зададена, най-новата дата в data)
         if 'transaction_date' in data.columns:
             data['transaction_date'] = pd.to_datetime(data['transaction_date'], format="%Y-%m-%d", errors='coerce')
-            reference_date = data['transaction_date'].max()
+            if reference_date is None:
+                reference_date = data['transaction_date'].max()
             data['days_since_purchase'] = (reference_date - data['transaction_date']).dt.days
         else:
             data['days_since_purchase'] = 0
@@ -37,35 +48,70 @@ class ModelTrainer:
         else:
             data['cross_sell_count'] = 0
 
-        # Добавяне на нови фийчъри
-        data['age_group'] = data['age'].apply(lambda x: 0 if x < 30 else (1 if x < 50 else 2))
-        data['income_bracket'] = data['income'].apply(lambda x: 0 if x < 40000 else (1 if x < 80000 else 2))
-        data['loyal_client'] = data['previous_purchases'].apply(lambda x: 1 if x >= 10 else 0)
-        return data
+        # Добавяне на нови фийчъри (същите прагове като при оценяването)
+        return add_derived_columns(data)
 
-    def preprocess_data(self):
+    def preprocess_data(self, reference_date=None):
         # Обединяване на данните: history + clients + offers
         data = self.history.merge(self.clients, on='client_id', how='left')
         data = data.merge(self.offers, on='offer_id', how='left')
-        data['response_binary'] = data['response'].map({'accepted': 1, 'rejected': 0})
-        data = self.add_features(data)
+        # response може да е категорийна колона от кеша на data_loader
+        data['response_binary'] = data['response'].astype(object).map({'accepted': 1, 'rejected': 0})
+        data = self.add_features(data, reference_date)
         # Избираме признаците, които се използват при обучението
-        feature_cols = ['age', 'income', 'previous_purchases', 'price',
-                        'days_since_purchase', 'age_group', 'income_bracket',
-                        'loyal_client', 'quantity', 'cross_sell_count']
-        features = data[feature_cols]
+        features = data[FEATURE_COLUMNS]
         labels = data['response_binary']
         return features, labels
 
-    def train_model(self):
-        features, labels = self.preprocess_data()
-
+    def _build_search(self, pipeline, param_grid, search):
+        common = dict(cv=MODEL_CONFIG['cv'], scoring='roc_auc', n_jobs=MODEL_CONFIG['n_jobs'])
+        if search == 'grid':
+            return GridSearchCV(pipeline, param_grid, **common)
+        if search == 'halving':
+            # successive halving: всички кандидати започват с малка част от данните,
+            # а само най-добрите продължават с повече редове
+            return HalvingGridSearchCV(pipeline, param_grid, factor=MODEL_CONFIG['halving_factor'],
+                                       random_state=MODEL_CONFIG['random_state'], **common)
+        if search == 'random':
+            return RandomizedSearchCV(pipeline, param_grid, n_iter=MODEL_CONFIG['n_iter'],
+                                      random_state=MODEL_CONFIG['random_state'], **common)
+        raise ValueError(f"Непознат режим на търсене: {search}. Възможни: grid, halving, random")
+
+    def stream_features(self, reference_date=None, chunk_size=None):
+        """
+        Поточен вариант на preprocess_data за история, която не се събира в паметта:
+        StreamingFeaturePipeline.iter_blocks(source) дава същите признаци по блокове.
+        """
+        return StreamingFeaturePipeline(self, reference_date, chunk_size)
+
+    @staticmethod
+    def build_pipeline(memory=None) -> Pipeline:
         # Ще използваме Pipeline с StandardScaler, PCA и LogisticRegression
-        pipeline = Pipeline([
+        return Pipeline([
             ('scaler', StandardScaler()),
-            ('pca', PCA()),  # ще търсим оптимален брой компоненти чрез grid search
+            ('pca', PCA()),  # броят компоненти идва от търсенето в train_model или от fit_params
             ('lr', LogisticRegression(max_iter=MODEL_CONFIG['max_iter']))
-        ])
+        ], memory=memory)
+
+    def fit_params(self, params: dict, features=None, labels=None):
+        """
+        Обучава pipeline с фиксирани параметри (напр. {'pca__n_components': 7, 'lr__C': 1}),
+        без търсене и кръстосана проверка. features и labels от preprocess_data могат да се
+        подадат наготово, за да не се смятат за всеки набор параметри.
+        """
+        if features is None or labels is None:
+            features, labels = self.preprocess_data()
+        return self.build_pipeline().set_params(**params).fit(features, labels)
+
+    def train_model(self, search=None):
+        features, labels = self.preprocess_data()
+        search = search or MODEL_CONFIG['search']
+
+        # Кеш на StandardScaler и PCA: кандидатите, които се различават само по параметрите
+        # на LogisticRegression, не обучават наново предварителната обработка
+        cache_dir = tempfile.mkdtemp(prefix='moo_pipeline_') if MODEL_CONFIG['cache_preprocessing'] else None
+
+        pipeline = self.build_pipeline(memory=cache_dir)
 
         # Оптимизация чрез GridSearchCV, като претърсваме параметрите на PCA и Logistic Regression
         param_grid = {
@@ -73,19 +119,35 @@ class ModelTrainer:
             'lr__C': [0.01, 0.1, 1, 10, 100],
             'lr__solver': ['lbfgs', 'saga', 'newton-cg']
         }
-        grid_search = GridSearchCV(pipeline, param_grid, cv=5, scoring='roc_auc')
-        grid_search.fit(features, labels)
+        try:
+            grid_search = self._build_search(pipeline, param_grid, search)
+            grid_search.fit(features, labels)
+        finally:
+            if cache_dir is not None:
+                shutil.rmtree(cache_dir, ignore_errors=True)
         self.model = grid_search.best_estimator_
+        # обученият модел не трябва да сочи към вече изтрития кеш
+        self.model.memory = None
         self.scaler = self.model.named_steps['scaler']
 
-        cv_scores = cross_val_score(self.model, features, labels, cv=5, scoring='roc_auc')
+        # CV оценките на най-добрия кандидат вече са в cv_results_, без ново обучение
+        n_splits = grid_search.n_splits_
+        cv_scores = np.array([grid_search.cv_results_[f'split{i}_test_score'][grid_search.best_index_]
+                              for i in range(n_splits)])
         print("Cross-validation ROC AUC scores with PCA:", cv_scores)
         print("Average ROC AUC:", np.mean(cv_scores))
         print("Best parameters:", grid_search.best_params_)
+        self.best_params = grid_search.best_params_
+        self.cv_scores = cv_scores
         return self.model, self.scaler
 
-
-
-
-
-
+    def export_linear_scorer(self, path=None):
+        """
+        Сгъва обучения pipeline в LinearScorer и го записва като .npz, ако е даден path.
+        """
+        if self.model is None:
+            raise ValueError("Моделът още не е обучен")
+        linear_scorer = LinearScorer.from_pipeline(self.model)
+        if path is not None:
+            linear_scorer.save(path)
+        return linear_scorer
@@ -0,0 +1,194 @@
+"""
+Каталогът с оферти като поредица от неизменни версии (copy-on-write).
+
+    catalog = OfferCatalog(offers)
+    snapshot = catalog.snapshot()          # offers, eligibility, max_profit на една версия
+    change = catalog.apply_delta(add=new_offers, update=price_changes, retire=[17, 42])
+
+apply_delta строи новата версия встрани и я публикува с една замяна на референцията:
+заявките, започнали със стария snapshot, довършват с него, а новите виждат новия.
+"""
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+from eligibility import EligibilityIndex
+
+logger = logging.getLogger(__name__)
+
+# колоните, без които добавена оферта не може да се оцени
+REQUIRED_COLUMNS = ('offer_id', 'offer_name', 'price', 'category', 'target_gender',
+                    'min_age', 'max_age', 'estimated_profit')
+
+
+class CatalogSnapshot:
+    """Една версия на каталога: офертите, индексът за допустимост и max_profit за нормализацията."""
+
+    def __init__(self, offers: pd.DataFrame, version: int = 0, eligibility: EligibilityIndex = None,
+                 max_profit: float = None):
+        self.offers = offers
+        self.version = version
+        self.eligibility = eligibility if eligibility is not None else EligibilityIndex(offers)
+        self.max_profit = max_profit if max_profit is not None else offers['estimated_profit'].max()
+        self.offer_index = pd.Index(offers['offer_id'])
+
+    def __len__(self):
+        return len(self.offers)
+
+
+class CatalogChange:
+    """Какво е променила apply_delta: offer_id по вид промяна и дали max_profit е друг."""
+
+    def __init__(self, version: int, added, updated, retired, max_profit_changed: bool):
+        self.version = version
+        self.added = pd.Index(added)
+        self.updated = pd.Index(updated)
+        self.retired = pd.Index(retired)
+        self.max_profit_changed = max_profit_changed
+
+    @property
+    def rescored(self) -> pd.Index:
+        """Офертите, чиито двойки с клиенти трябва да се оценят наново (нови и променени)."""
+        return self.added.append(self.updated)
+
+    def as_dict(self) -> dict:
+        return {'version': self.version, 'added': len(self.added), 'updated': len(self.updated),
+                'retired': len(self.retired), 'max_profit_changed': self.max_profit_changed}
+
+
+def diff_offers(current: pd.DataFrame, new: pd.DataFrame):
+    """
+    (add, update, retire) за apply_delta от current към new – напр. след редакция на
+    offers.csv. update съдържа целите редове на офертите с поне една различна стойност;
+    колони, които current няма, не се сравняват.
+    """
+    current_ids, new_ids = pd.Index(current['offer_id']), pd.Index(new['offer_id'])
+    retire = current_ids.difference(new_ids)
+    add = new[~new_ids.isin(current_ids)]
+    common = new_ids.intersection(current_ids)
+    columns = [c for c in new.columns if c in current.columns]
+    before = current.set_index('offer_id').loc[common, [c for c in columns if c != 'offer_id']]
+    after = new.set_index('offer_id').loc[common, before.columns]
+    differs = ~((before == after) | (before.isna() & after.isna()))
+    update = after[differs.any(axis=1).to_numpy()].reset_index()
+    return add, update, list(retire)
+
+
+def _as_frame(rows) -> pd.DataFrame:
+    if rows is None:
+        return pd.DataFrame({'offer_id': []})
+    return rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+
+
+class OfferCatalog:
+    """Текущата версия на каталога; промените се публикуват като нова версия."""
+
+    def __init__(self, offers: pd.DataFrame):
+        self._snapshot = CatalogSnapshot(offers.reset_index(drop=True))
+        # пише само един apply_delta наведнъж; четенето на snapshot() не чака
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_snapshot(cls, snapshot: CatalogSnapshot):
+        """Каталог, който започва от готова версия – напр. закачена от споделена памет."""
+        catalog = cls.__new__(cls)
+        catalog._snapshot = snapshot
+        catalog._lock = threading.Lock()
+        return catalog
+
+    def snapshot(self) -> CatalogSnapshot:
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def apply_delta(self, add=None, update=None, retire=None) -> CatalogChange:
+        """
+        add – нови оферти (DataFrame или списък от dict с поне REQUIRED_COLUMNS; колони,
+        които каталогът няма, се пренебрегват);
+        update – offer_id и колоните, които се променят (празна стойност не променя колоната);
+        retire – offer_id за премахване.
+        Индексът за допустимост се обновява само за засегнатите редове, а max_profit
+        се смята наново само ако максимумът може да се е променил.
+        """
+        add, update = _as_frame(add), _as_frame(update)
+        retire = pd.Index([] if retire is None else list(retire))
+        with self._lock:
+            old = self._snapshot
+            offers = old.offers
+            self._validate(old, add, update, retire)
+
+            kept = ~old.offer_index.isin(retire)
+            new = offers[kept]
+            updated_rows = np.empty(0, dtype=np.int64)
+            if len(update):
+                updated_rows = pd.Index(new['offer_id']).get_indexer(update['offer_id'])
+                changed_rows = new.iloc[updated_rows].copy()
+                # от списък от dict всеки ред носи само своите колони, а останалите са NaN:
+                # прилагат се само непразните клетки
+                values = update.set_axis(changed_rows.index)
+                for column in update.columns.drop('offer_id'):
+                    changed_rows[column] = values[column].combine_first(changed_rows[column])
+                # конкатенацията избира общ тип на колоната (напр. int -> float при нова цена 9.99)
+                untouched = np.ones(len(new), dtype=bool)
+                untouched[updated_rows] = False
+                new = pd.concat([new[untouched], changed_rows]).sort_index()
+            if len(add):
+                new = pd.concat([new, add.reindex(columns=offers.columns)], ignore_index=True)
+            new = new.reset_index(drop=True)
+
+            n_kept = int(kept.sum())
+            changed = np.concatenate([np.sort(updated_rows), np.arange(n_kept, len(new))])
+            eligibility = old.eligibility.updated(new, kept, changed)
+            max_profit = self._max_profit(old, new, kept, update, changed)
+            snapshot = CatalogSnapshot(new, old.version + 1, eligibility, max_profit)
+            self._snapshot = snapshot
+
+        change = CatalogChange(snapshot.version, add['offer_id'], update['offer_id'], retire,
+                               bool(max_profit != old.max_profit))
+        logger.info("Каталог v%d: +%d нови, %d променени, -%d премахнати%s", change.version,
+                    len(change.added), len(change.updated), len(change.retired),
+                    ", нов max_profit" if change.max_profit_changed else "")
+        return change
+
+    @staticmethod
+    def _validate(old: CatalogSnapshot, add: pd.DataFrame, update: pd.DataFrame, retire: pd.Index):
+        for name, ids in (('add', add['offer_id']), ('update', update['offer_id']), ('retire', retire)):
+            if pd.Index(ids).has_duplicates:
+                raise ValueError(f"Повтарящи се offer_id в {name}")
+        missing = [c for c in REQUIRED_COLUMNS if c not in add.columns]
+        if len(add) and missing:
+            raise ValueError(f"Липсват колони на новите оферти: {missing}")
+        unknown = [c for c in update.columns if c not in old.offers.columns]
+        if unknown:
+            raise ValueError(f"Непознати колони в update: {unknown}")
+        for name, ids in (('update', update['offer_id']), ('retire', retire)):
+            absent = pd.Index(ids).difference(old.offer_index)
+            if len(absent):
+                raise ValueError(f"Няма оферти {list(absent[:10])} за {name}")
+        if len(pd.Index(update['offer_id']).intersection(retire)):
+            raise ValueError("Една оферта не може едновременно да се променя и премахва")
+        existing = pd.Index(add['offer_id']).intersection(old.offer_index)
+        if len(existing):
+            raise ValueError(f"Офертите {list(existing[:10])} вече съществуват")
+
+    @staticmethod
+    def _max_profit(old: CatalogSnapshot, new: pd.DataFrame, kept: np.ndarray,
+                    update: pd.DataFrame, changed: np.ndarray) -> float:
+        """
+        Максимумът на estimated_profit: наново по целия каталог само ако е премахната или
+        променена оферта с досегашния максимум; иначе – от стария и новите стойности.
+        """
+        touched = ~kept
+        if 'estimated_profit' in update.columns:
+            touched = touched | old.offer_index.isin(update['offer_id'])
+        old_profit = old.offers['estimated_profit'].to_numpy(dtype=float, na_value=np.nan)
+        if (old_profit[touched] >= old.max_profit).any():
+            return new['estimated_profit'].max()
+        new_profit = new['estimated_profit'].iloc[changed].max()
+        if pd.isna(old.max_profit):
+            return new_profit
+        return old.max_profit if pd.isna(new_profit) else max(old.max_profit, new_profit)
@@ -1,13 +1,95 @@
+import itertools
+import logging
+
+import numpy as np
 import pandas as pd
-import pulp
-import warnings
+
+from batch_recommendations import iter_batch_recommendations
+from campaign_candidates import CampaignCandidates, CandidateCache, clients_fingerprint
+from campaign_solvers import CampaignProblem, solve_campaign
+from candidate_pruning import prune_candidates
+from config import SOLVER_CONFIG
+from eligibility import EligibilityIndex, parse_preferred_categories
+from features import feature_matrix
+from instrumentation import metrics
+from offer_catalog import OfferCatalog
+from scoring import base_score, combined_score, predict_propensity
+from selection import greedy_top_n, milp_top_n, rank_top_n
+
+logger = logging.getLogger(__name__)
+
+# клиенти в един блок от кандидати (допустимост и оценяване)
+CAMPAIGN_CHUNK_SIZE = 10_000
+CAMPAIGN_COLUMNS = ['client_id', 'offer_id', 'offer_name', 'price', 'category', 'propensity', 'combined_score']
+# версии на модела и на хранилището с признаци в ключа на кеша с кандидати; за разлика
+# от id() не се преизползват, когато старият обект бъде освободен
+_INPUT_VERSIONS = itertools.count(1)
+
+
+class CampaignCancelled(Exception):
+    """optimize_campaign е прекъсната чрез should_cancel."""
 
 class RecommendationSystem:
-    def __init__(self, model, scaler, offers: pd.DataFrame):
+    def __init__(self, model, scaler, offers, feature_store=None):
         self.model = model
         self.scaler = scaler
-        self.offers = offers
-        self.max_profit = self.offers['estimated_profit'].max()
+        # офертите, индексът за допустимост и max_profit са във версии (вж. apply_catalog_delta);
+        # offers е DataFrame или готов OfferCatalog (напр. от shared_arena.attach_system)
+        self.catalog = offers if isinstance(offers, OfferCatalog) else OfferCatalog(offers)
+        # ClientFeatureStore: историческите признаци на клиента вместо нули
+        self.feature_store = feature_store
+        cache_entries = SOLVER_CONFIG['candidate_cache']
+        self.candidate_cache = CandidateCache(cache_entries) if cache_entries else None
+
+    @property
+    def model(self):
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+        self.model_version = next(_INPUT_VERSIONS)
+
+    @property
+    def feature_store(self):
+        return self._feature_store
+
+    @feature_store.setter
+    def feature_store(self, feature_store):
+        self._feature_store = feature_store
+        self.feature_store_version = next(_INPUT_VERSIONS)
+
+    # текущата версия на каталога; заявка, която ги ползва заедно, взема един catalog.snapshot()
+    @property
+    def offers(self) -> pd.DataFrame:
+        return self.catalog.snapshot().offers
+
+    @property
+    def eligibility(self):
+        return self.catalog.snapshot().eligibility
+
+    @property
+    def max_profit(self) -> float:
+        return self.catalog.snapshot().max_profit
+
+    def apply_catalog_delta(self, add=None, update=None, retire=None):
+        """
+        Промяна в каталога без рестарт (вж. OfferCatalog.apply_delta). Заявките в ход
+        довършват със своята версия. В кешираните кандидати за кампании се оценяват
+        наново само двойките с новите и променените оферти; base_score на останалите
+        се преизчислява само ако max_profit е друг. Връща CatalogChange.
+        """
+        previous = self.catalog.snapshot()
+        change = self.catalog.apply_delta(add, update, retire)
+        snapshot = self.catalog.snapshot()
+        if self.feature_store is not None:
+            self.feature_store.set_offers(snapshot.offers)
+        if self.candidate_cache is not None:
+            with metrics.stage('catalog.refresh_candidates'):
+                self.candidate_cache.refresh(
+                    lambda candidates: self._refreshed_candidates(candidates, previous, snapshot, change))
+        metrics.count('catalog.deltas')
+        return change
 
     def is_offer_eligible(self, offer_item: pd.Series, client: dict) -> bool:
         # 1. възрастови ограничения
@@ -21,159 +103,372 @@ class RecommendationSystem:
         if offer_item['price'] > client['budget']:
             return False
         # 4. предпочитана категория
-        if client.get('preferred_category'):
-            preferred = [p.strip() for p in str(client['preferred_category']).split(',')]
+        preferred = parse_preferred_categories(client.get('preferred_category'))
+        if preferred is not None:
             if offer_item['category'] not in preferred:
                 return False
         return True
 
+    def history_features(self, client_ids) -> dict:
+        """
+        days_since_purchase, quantity и cross_sell_count за масив от client_id
+        от feature_store; без store (или за непознат клиент) са 0.
+        """
+        if self.feature_store is None:
+            return {}
+        features = self.feature_store.client_features(client_ids)
+        return {name: features[name] for name in ('days_since_purchase', 'quantity', 'cross_sell_count')}
+
+    def offer_capacities(self, offer_ids, catalog=None):
+        """
+        Капацитетът от колоната 'capacity' на офертите (празно = без ограничение): кодът
+        на всяка оферта от offer_ids (позицията ѝ в каталога) и капацитетите по код.
+        (None, None), ако колоната липсва или няма краен капацитет.
+        """
+        catalog = catalog or self.catalog.snapshot()
+        if 'capacity' not in catalog.offers.columns:
+            return None, None
+        capacities = pd.to_numeric(catalog.offers['capacity'], errors='coerce').fillna(np.inf).to_numpy(dtype=float)
+        if not np.isfinite(capacities).any():
+            return None, None
+        return catalog.offer_index.get_indexer(offer_ids), capacities
+
     def optimize_offer_selection(self,
                                  eligible_offers: pd.DataFrame,
-                                 scores: list) -> pd.Series:
+                                 scores,
+                                 top_n: int = 1,
+                                 max_per_brand: int = None,
+                                 max_per_category: int = None) -> pd.DataFrame:
         """
-        Избира точно една оферта от eligible_offers чрез PuLP:
-        max sum(scores[i] * x_i)
-        s.t. sum(x_i) == 1, x_i binary.
+        Избира до top_n оферти от eligible_offers, подредени по намаляващ scores.
+        Без ограничения за разнообразие: argmax / argpartition, без решател.
+        С едно ограничение (марка или категория): алчен избор, който е оптимален.
+        PuLP се ползва само когато двете ограничения действат едновременно.
         """
         n = len(eligible_offers)
         if n == 0:
             return None
 
-        prob = pulp.LpProblem("Offer_Selection", pulp.LpMaximize)
-        x = [pulp.LpVariable(f"x_{i}", cat='Binary') for i in range(n)]
-
-        # целева функция
-        prob += pulp.lpSum(scores[i] * x[i] for i in range(n)), "Total_Score"
-        # точно една оферта
-        prob += pulp.lpSum(x) == 1, "One_offer_constraint"
-
-        prob.solve()
-
-        for i in range(n):
-            if pulp.value(x[i]) == 1:
-                return eligible_offers.iloc[i]
-        return None
-
-    def get_recommendations(self, client: dict) -> pd.DataFrame:
+        scores = np.asarray(scores, dtype=float)
+        constraints = []
+        if max_per_brand is not None:
+            constraints.append((eligible_offers['brand'].to_numpy(), max_per_brand))
+        if max_per_category is not None:
+            constraints.append((eligible_offers['category'].to_numpy(), max_per_category))
+
+        if not constraints:
+            chosen = rank_top_n(scores, top_n)
+        elif len(constraints) == 1:
+            labels, max_per_label = constraints[0]
+            chosen = greedy_top_n(scores, labels, max_per_label, top_n)
+        else:
+            chosen = milp_top_n(scores, constraints, top_n)
+
+        if len(chosen) == 0:
+            return None
+        selected = eligible_offers.iloc[chosen].copy()
+        selected['combined_score'] = scores[chosen]
+        return selected
+
+    def get_recommendations(self,
+                            client: dict,
+                            top_n: int = 1,
+                            max_per_brand: int = None,
+                            max_per_category: int = None) -> pd.DataFrame:
         """
-        За единичен клиент: филтрира, смята combined_score и избира една оферта.
+        За единичен клиент: филтрира, смята combined_score и връща до top_n
+        оферти, подредени от най-добрата към по-слабите алтернативи.
         """
-        eligible = self.offers[self.offers.apply(lambda r: self.is_offer_eligible(r, client), axis=1)]
+        catalog = self.catalog.snapshot()
+        with metrics.stage('recommend.eligibility'):
+            eligible = catalog.offers.iloc[catalog.eligibility.eligible_offers(client)]
+        metrics.count('recommend.requests')
+        metrics.count('recommend.eligible_offers', len(eligible))
         if eligible.empty:
             return None
 
-        scores = []
-        for _, offer in eligible.iterrows():
-            fv = pd.DataFrame([[
-                client['age'],
-                client['income'],
-                client['previous_purchases'],
-                offer['price'],
-                0,  # days_since_purchase (нов потребител)
-                0 if client['age'] < 30 else (1 if client['age'] < 50 else 2),
-                0 if client['income'] < 40000 else (1 if client['income'] < 80000 else 2),
-                1 if client['previous_purchases'] >= 10 else 0,
-                0,  # quantity
-                0   # cross_sell_count
-            ]], columns=[
-                'age','income','previous_purchases','price',
-                'days_since_purchase','age_group','income_bracket',
-                'loyal_client','quantity','cross_sell_count'
-            ])
-
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore", category=UserWarning)
-                propensity = self.model.predict_proba(fv)[0, 1]
-
-            normalized_price  = offer['price'] / client['budget']
-            normalized_profit = offer['estimated_profit'] / self.max_profit
-            combined_score = (
-                0.5 * propensity +
-                0.3 * normalized_profit +
-                0.2 * (1 - normalized_price)
-            )
-            scores.append(combined_score)
-
-        best = self.optimize_offer_selection(eligible, scores)
-        return pd.DataFrame([best]) if best is not None else None
+        # всички кандидати се оценяват с едно извикване на модела
+        with metrics.stage('recommend.features'):
+            history = {}
+            if client.get('client_id') is not None:
+                history = {name: values[0] for name, values in
+                           self.history_features([client['client_id']]).items()}
+            fv = feature_matrix(client['age'], client['income'],
+                                client['previous_purchases'], eligible['price'], **history)
+        with metrics.stage('recommend.predict'):
+            propensity = predict_propensity(self.model, fv)
+        scores = combined_score(propensity, eligible['price'], eligible['estimated_profit'],
+                                client['budget'], catalog.max_profit)
+
+        with metrics.stage('recommend.selection'):
+            return self.optimize_offer_selection(eligible, scores, top_n,
+                                                 max_per_brand, max_per_category)
+
+    def get_recommendations_batch(self,
+                                  clients_df: pd.DataFrame,
+                                  budgets=None,
+                                  top_n: int = 1,
+                                  n_jobs: int = None,
+                                  shard_size: int = None):
+        """
+        Top-n оферти за всеки клиент от clients_df при бюджет budgets (скалар, масив
+        или колоната 'budget'). Генерира DataFrame по групи клиенти с колони client_id,
+        rank (0 = най-добра), offer_id, offer_name, price, category, propensity, combined_score.
+        """
+        return iter_batch_recommendations(self, clients_df, budgets, top_n, n_jobs, shard_size)
 
-    def optimize_campaign(self,
-                          clients: pd.DataFrame,
-                          total_budget: float) -> pd.DataFrame:
+    def campaign_candidates(self, clients: pd.DataFrame, progress=None) -> CampaignCandidates:
         """
-        За множество клиенти: разпределя при най-голяма сумарна combined_score
-        при общ бюджет total_budget и не повече от 1 оферта на клиент.
+        Допустимите двойки клиент × оферта за кампания с изчислена склонност – без ограничение
+        по бюджет, за да служат за всеки бюджет. Кешират се по отпечатък на клиентите и
+        версиите на модела и признаците, така че друг бюджет за същите клиенти не оценява
+        модела наново, а нов модел (system.model = ...) или ново хранилище – оценява.
         """
+        progress = progress or (lambda phase, done, total: None)
+        catalog = self.catalog.snapshot()
+        key = None
+        if self.candidate_cache is not None:
+            store_version = getattr(self.feature_store, 'version', None)
+            key = (clients_fingerprint(clients), self.model_version, self.feature_store_version, store_version)
+            cached = self.candidate_cache.get(key)
+            # запис от по-стара версия на каталога (построен, докато е вървяла промяна) не важи
+            if cached is not None and cached.catalog is catalog:
+                metrics.count('campaign.candidate_cache_hits')
+                progress('scoring', len(clients), len(clients))
+                return cached
+
+        n_clients = len(clients)
+        progress('eligibility', 0, n_clients)
         combos = []
-        for _, client in clients.iterrows():
-            c = client.to_dict()
-            # задаваме глобалния бюджет като client['budget'], за да мине проверката
-            c['budget'] = total_budget
-            for _, offer in self.offers.iterrows():
-                if not self.is_offer_eligible(offer, c):
+        base = []
+        positions = []
+        pairs = metrics.timed_iter(catalog.eligibility.eligible_pairs(clients, np.inf, CAMPAIGN_CHUNK_SIZE),
+                                   'campaign.eligibility')
+        for block, (client_pos, offer_pos) in enumerate(pairs):
+            block_stop = min((block + 1) * CAMPAIGN_CHUNK_SIZE, n_clients)
+            progress('eligibility', block_stop, n_clients)
+            if len(client_pos) == 0:
+                progress('scoring', block_stop, n_clients)
+                continue
+            frame, scores = self._score_pairs(clients.iloc[client_pos], catalog.offers.iloc[offer_pos],
+                                              catalog.max_profit)
+            combos.append(frame)
+            base.append(scores)
+            positions.append(client_pos)
+            progress('scoring', block_stop, n_clients)
+
+        if combos:
+            candidates = CampaignCandidates(pd.concat(combos, ignore_index=True), np.concatenate(base),
+                                            clients, np.concatenate(positions), catalog)
+        else:
+            candidates = CampaignCandidates(pd.DataFrame(columns=CAMPAIGN_COLUMNS[:-1]), np.empty(0),
+                                            clients, np.empty(0, dtype=np.int64), catalog)
+        if key is not None:
+            self.candidate_cache.put(key, candidates)
+        return candidates
+
+    def _score_pairs(self, c: pd.DataFrame, offer: pd.DataFrame, max_profit: float):
+        """Редовете на кандидатите за двойките (c, offer) и техният base_score."""
+        with metrics.stage('campaign.features'):
+            fv = feature_matrix(c['age'], c['income'], c['previous_purchases'], offer['price'],
+                                **self.history_features(c['client_id'].to_numpy()))
+        with metrics.stage('campaign.predict'):
+            prop = predict_propensity(self.model, fv)
+        frame = pd.DataFrame({
+            'client_id':       c['client_id'].to_numpy(),
+            'offer_id':        offer['offer_id'].to_numpy(),
+            'offer_name':      offer['offer_name'].to_numpy(),
+            'price':           offer['price'].to_numpy(),
+            'category':        offer['category'].to_numpy(),
+            'propensity':      prop
+        })
+        return frame, base_score(prop, offer['estimated_profit'], max_profit)
+
+    def _refreshed_candidates(self, candidates: CampaignCandidates, previous, catalog, change):
+        """
+        Кандидатите за новата версия на каталога: редовете на премахнатите и променените
+        оферти отпадат, двойките с новите и променените се оценяват наново, а останалите
+        запазват склонността си. None, ако записът не е от предишната версия.
+        """
+        if candidates.catalog is not previous or candidates.clients is None:
+            return None
+        frame = candidates.frame
+        keep = ~frame['offer_id'].isin(change.retired.append(change.updated)).to_numpy()
+        frames = [frame[keep]]
+        client_positions = [candidates.client_positions[keep]]
+        base = [candidates.base_score[keep]]
+        if change.max_profit_changed:
+            # нормализацията на печалбата е друга – base_score от запазената склонност
+            profit = catalog.offers['estimated_profit'].to_numpy()[catalog.offer_index.get_indexer(frames[0]['offer_id'])]
+            base[0] = base_score(frames[0]['propensity'].to_numpy(), profit, catalog.max_profit)
+
+        rescored = catalog.offer_index.get_indexer(change.rescored)
+        if len(rescored):
+            # допустимостта само спрямо засегнатите оферти – малък индекс само за тях
+            subset = catalog.offers.iloc[rescored]
+            index = EligibilityIndex(subset)
+            for client_pos, offer_pos in index.eligible_pairs(candidates.clients, np.inf, CAMPAIGN_CHUNK_SIZE):
+                if len(client_pos) == 0:
                     continue
-
-                fv = pd.DataFrame([[
-                    c['age'], c['income'], c['previous_purchases'], offer['price'],
-                    0,
-                    0 if c['age'] < 30 else (1 if c['age'] < 50 else 2),
-                    0 if c['income'] < 40000 else (1 if c['income'] < 80000 else 2),
-                    1 if c['previous_purchases'] >= 10 else 0,
-                    0, 0
-                ]], columns=[
-                    'age','income','previous_purchases','price',
-                    'days_since_purchase','age_group','income_bracket',
-                    'loyal_client','quantity','cross_sell_count'
-                ])
-                with warnings.catch_warnings():
-                    warnings.simplefilter("ignore", category=UserWarning)
-                    prop = self.model.predict_proba(fv)[0,1]
-
-                norm_price  = offer['price'] / total_budget
-                norm_profit = offer['estimated_profit'] / self.max_profit
-                cs = 0.5*prop + 0.3*norm_profit + 0.2*(1 - norm_price)
-
-                combos.append({
-                    'client_id':       c['client_id'],
-                    'offer_id':        offer['offer_id'],
-                    'offer_name':      offer['offer_name'],
-                    'price':           offer['price'],
-                    'category':        offer['category'],
-                    'propensity':      prop,
-                    'combined_score':  cs
-                })
-
-        if not combos:
+                pair_frame, scores = self._score_pairs(candidates.clients.iloc[client_pos],
+                                                       subset.iloc[offer_pos], catalog.max_profit)
+                frames.append(pair_frame)
+                client_positions.append(client_pos)
+                base.append(scores)
+
+        frame = pd.concat(frames, ignore_index=True)
+        client_positions = np.concatenate(client_positions)
+        base = np.concatenate(base)
+        # редът клиент -> позиция на офертата, както при построяване отначало
+        order = np.lexsort((catalog.offer_index.get_indexer(frame['offer_id']), client_positions))
+        refreshed = CampaignCandidates(frame.iloc[order].reset_index(drop=True), base[order],
+                                       candidates.clients, client_positions[order], catalog)
+        # предишното решение е по старите позиции – остава само lam като подсказка
+        refreshed.last_lam = candidates.last_lam
+        metrics.count('catalog.rescored_pairs', sum(len(f) for f in frames[1:]))
+        return refreshed
+
+    def solve_candidates(self,
+                         candidates: CampaignCandidates,
+                         total_budget: float,
+                         backend: str = None,
+                         time_limit: float = None,
+                         mip_gap: float = None,
+                         threads: int = None,
+                         warm_start: bool = None,
+                         polish: bool = None,
+                         prune: str = None,
+                         prune_top_k: int = None,
+                         progress=None) -> pd.DataFrame:
+        """
+        Решава кампанията за total_budget върху готовите кандидати. Започва от последното
+        решение за тях (ако е допустимо), а 'lagrangian' – и от неговата lam.
+        """
+        progress = progress or (lambda phase, done, total: None)
+        # глобалният бюджет играе ролята на client['budget'] при проверката за допустимост
+        positions, scores = candidates.at_budget(total_budget)
+        if len(positions) == 0:
             return pd.DataFrame([])
+        progress('model', 0, 1)
+
+        df = candidates.frame.iloc[positions].reset_index(drop=True)
+        df['combined_score'] = scores
+        client_codes, _ = pd.factorize(df['client_id'])
+
+        n_candidates = len(df)
+        metrics.count('campaign.candidate_pairs', n_candidates)
+        offer_codes, capacities = self.offer_capacities(df['offer_id'], candidates.catalog)
+        prune = prune or SOLVER_CONFIG['prune']
+        if capacities is not None and prune != 'none':
+            # с капацитет по-слабата оферта на клиента може да е нужна, ако по-добрата свърши
+            logger.info("Офертите имат капацитет: кандидатите не се съкращават (prune=%r -> 'none')", prune)
+            prune = 'none'
+        with metrics.stage('campaign.pruning'):
+            keep = prune_candidates(df['price'].to_numpy(), scores, client_codes, prune,
+                                    prune_top_k if prune_top_k is not None else SOLVER_CONFIG['prune_top_k'])
+        df = df[keep].reset_index(drop=True)
+        client_codes = client_codes[keep]
+        positions = positions[keep]
+        metrics.count('campaign.candidates_after_pruning', len(df))
+
+        if offer_codes is not None:
+            offer_codes = offer_codes[keep]
+        problem = CampaignProblem(df['combined_score'], df['price'], client_codes, total_budget,
+                                  offer_codes, capacities)
+        progress('model', 1, 1)
+        # конструкторите на решателите приемат само своите опции: polish е само на 'lagrangian'
+        backend = backend or SOLVER_CONFIG['backend']
+        backend_options = {}
+        if backend == 'lagrangian' and polish is not None:
+            backend_options['polish'] = polish
+        if backend in ('lagrangian', 'flow') and candidates.last_lam is not None:
+            backend_options['lam_hint'] = candidates.last_lam
+        progress('solve', 0, 1)
+        result = solve_campaign(problem, backend, time_limit, mip_gap, threads, warm_start,
+                                candidates.initial_for(positions), **backend_options)
+        progress('solve', 1, 1)
+        logger.info("Кандидати: %d -> %d след премахване (%.1f%%), решаване: %.3f s (%s)",
+                    n_candidates, len(df), 100.0 * len(df) / n_candidates,
+                    result.build_time + result.solve_time, result.status)
+        candidates.remember(total_budget, positions[result.selected], result.lam)
+
+        assignments = df[result.selected].reset_index(drop=True)
+        assignments.attrs['solve'] = result.as_dict()
+        return assignments
 
-        df = pd.DataFrame(combos)
-        prob = pulp.LpProblem("Campaign_Optimization", pulp.LpMaximize)
-        idx = list(df.index)
-        x = pulp.LpVariable.dicts('x', idx, cat='Binary')
-
-        # целева функция
-        prob += pulp.lpSum(df.at[i,'combined_score'] * x[i] for i in idx)
-        # max 1 оферта на клиент
-        for client_id, group in df.groupby('client_id').groups.items():
-            prob += pulp.lpSum(x[i] for i in group) <= 1
-        # бюджет
-        prob += pulp.lpSum(df.at[i,'price'] * x[i] for i in idx) <= total_budget
-
-        prob.solve()
-        chosen = [i for i in idx if pulp.value(x[i]) == 1]
-        return df.loc[chosen].reset_index(drop=True)
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+    def optimize_campaign(self,
+                          clients: pd.DataFrame,
+                          total_budget: float,
+                          backend: str = None,
+                          time_limit: float = None,
+                          mip_gap: float = None,
+                          threads: int = None,
+                          warm_start: bool = None,
+                          polish: bool = None,
+                          prune: str = None,
+                          prune_top_k: int = None,
+                          progress_callback=None,
+                          should_cancel=None) -> pd.DataFrame:
+        """
+        За множество клиенти: разпределя при най-голяма сумарна combined_score
+        при общ бюджет total_budget и не повече от 1 оферта на клиент.
+        backend='lagrangian' ползва евристиката за много клиенти (polish=True я дорешава с MILP).
+        Преди решаването кандидатите се свеждат до Парето фронта на клиента (prune='exact'),
+        което не променя оптимума; 'hull' и prune_top_k са по-агресивни и приблизителни.
+        Ако офертите имат колона 'capacity', всяка се дава на най-много capacity клиенти;
+        тогава кандидатите не се съкращават, а backend='flow' е бързият вариант за много клиенти.
+        Статусът, целевата стойност и горната граница на решателя са в result.attrs['solve'].
+
+        progress_callback(phase, done, total) се вика по фази: 'eligibility' и 'scoring'
+        (клиенти), 'model' и 'solve'. should_cancel() се проверява между блоковете и фазите;
+        при True се хвърля CampaignCancelled. Самото решаване не се прекъсва (вж. time_limit).
+        Оценките на кандидатите се кешират (вж. campaign_candidates), така че нов бюджет
+        за същите клиенти само решава задачата наново, от предишното решение.
+        """
+        def progress(phase, done, total):
+            if progress_callback is not None:
+                progress_callback(phase, done, total)
+            if should_cancel is not None and should_cancel():
+                raise CampaignCancelled(phase)
+
+        candidates = self.campaign_candidates(clients, progress)
+        return self.solve_candidates(candidates, total_budget, backend, time_limit, mip_gap, threads,
+                                     warm_start, polish, prune, prune_top_k, progress)
+
+    def budget_sweep(self,
+                     clients: pd.DataFrame,
+                     budgets,
+                     backend: str = None,
+                     progress_callback=None,
+                     **solve_options) -> pd.DataFrame:
+        """
+        Кампанията за всеки бюджет от budgets (списък или range) с едно оценяване на кандидатите.
+        Бюджетите се решават във възходящ ред, всеки от решението за предходния.
+        Връща по ред на бюджет: budget, objective, bound, status, assigned, total_cost, solve_time;
+        назначенията за всеки бюджет са в result.attrs['assignments'][budget].
+        """
+        candidates = self.campaign_candidates(clients, progress_callback)
+        budgets = sorted({float(b) for b in budgets})
+        rows = []
+        assignments = {}
+        for i, budget in enumerate(budgets):
+            if progress_callback is not None:
+                progress_callback('sweep', i, len(budgets))
+            result = self.solve_candidates(candidates, budget, backend, **solve_options)
+            solve = result.attrs.get('solve', {})
+            rows.append({
+                'budget': budget,
+                'objective': solve.get('objective', 0.0),
+                'bound': solve.get('bound'),
+                'status': solve.get('status', 'empty'),
+                'assigned': len(result),
+                'total_cost': float(result['price'].sum()) if len(result) else 0.0,
+                'solve_time': solve.get('build_time', 0.0) + solve.get('solve_time', 0.0),
+            })
+            assignments[budget] = result
+        if progress_callback is not None:
+            progress_callback('sweep', len(budgets), len(budgets))
+        frontier = pd.DataFrame(rows, columns=['budget', 'objective', 'bound', 'status', 'assigned',
+                                               'total_cost', 'solve_time'])
+        frontier.attrs['assignments'] = assignments
+        return frontier
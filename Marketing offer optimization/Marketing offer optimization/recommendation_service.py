@@ -0,0 +1,567 @@
+"""
+HTTP услуга за препоръки на localhost, само със стандартната библиотека (asyncio).
+
+    python recommendation_service.py [--host 127.0.0.1] [--port 8080] [--arena moo_arena | --arena-file PATH]
+
+С --arena/--arena-file каталогът, моделът и признаците не се зареждат, а процесът се
+закача към арената от shared_arena.py – няколко процеса делят една памет.
+
+    GET  /health                  състояние на модела и опашката
+    GET  /metrics/latency         брой заявки и p50/p95/p99 в ms по endpoint
+    GET  /metrics                 етапите и броячите от instrumentation във формат Prometheus
+    POST /recommend               {"client": {...}, "top_n": 1, "max_per_brand": null, "max_per_category": null}
+    POST /recommend/batch         {"clients": [{...}], "budgets": null, "top_n": 1}
+    POST /campaign                {"total_budget": 5000, "client_ids": null, "backend": null, ...} -> job_id
+    GET  /campaign/<job_id>       статус и резултат на кампанията
+    POST /catalog                 {"add": [{...}], "update": [{"offer_id": 1, "price": 99}], "retire": [7]}
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import numpy as np
+import pandas as pd
+
+from config import SERVICE_CONFIG
+from features import feature_matrix
+from instrumentation import metrics
+from scoring import combined_score, predict_propensity
+
+logger = logging.getLogger(__name__)
+
+KNOWN_PATHS = ('/health', '/metrics', '/metrics/latency', '/recommend', '/recommend/batch', '/campaign',
+               '/catalog')
+CAMPAIGN_OPTIONS = ('backend', 'time_limit', 'mip_gap', 'threads', 'warm_start',
+                    'polish', 'prune', 'prune_top_k')
+CLIENT_NUMBERS = ('age', 'income', 'previous_purchases', 'budget')
+FINISHED_JOB_STATUSES = ('done', 'failed')
+
+
+class BadRequest(Exception):
+    pass
+
+
+def recommend_many(system, requests: list) -> list:
+    """
+    get_recommendations за няколко заявки с едно извикване на модела.
+    Всяка заявка е {'client': {...}, 'top_n', 'max_per_brand', 'max_per_category'};
+    резултатите (DataFrame или None) са в реда на заявките. Всички заявки в групата
+    ползват една и съща версия на каталога.
+    """
+    for r in requests:
+        if r.get('top_n', 1) < 1:
+            raise ValueError(f"top_n трябва да е поне 1, а е {r['top_n']}")
+    catalog = system.catalog.snapshot()
+    offers = catalog.offers
+    eligible = [catalog.eligibility.eligible_offers(r['client']) for r in requests]
+    sizes = np.array([len(e) for e in eligible])
+    if sizes.sum() == 0:
+        return [None] * len(requests)
+
+    client_ids = [r['client'].get('client_id') for r in requests]
+    known = [i for i, cid in enumerate(client_ids) if cid is not None]
+    history = {}
+    if known:
+        per_client = system.history_features([client_ids[i] for i in known])
+        for name, values in per_client.items():
+            column = np.zeros(len(requests))
+            column[known] = values
+            history[name] = np.repeat(column, sizes)
+
+    positions = np.concatenate(eligible)
+    price = offers['price'].to_numpy()[positions]
+    clients = [r['client'] for r in requests]
+    fv = feature_matrix(np.repeat([c['age'] for c in clients], sizes),
+                        np.repeat([c['income'] for c in clients], sizes),
+                        np.repeat([c['previous_purchases'] for c in clients], sizes),
+                        price, **history)
+    propensity = predict_propensity(system.model, fv)
+    profit = offers['estimated_profit'].to_numpy()[positions]
+    budget = np.repeat([float(c['budget']) for c in clients], sizes)
+    scores = combined_score(propensity, price, profit, budget, catalog.max_profit)
+
+    results = []
+    bounds = np.r_[0, np.cumsum(sizes)]
+    for i, r in enumerate(requests):
+        start, stop = bounds[i], bounds[i + 1]
+        if start == stop:
+            results.append(None)
+            continue
+        results.append(system.optimize_offer_selection(
+            offers.iloc[positions[start:stop]], scores[start:stop], r.get('top_n', 1),
+            r.get('max_per_brand'), r.get('max_per_category')))
+    return results
+
+
+class MicroBatcher:
+    """
+    Събира едновременните единични заявки за batch_window_ms (или до max_batch_size)
+    и ги оценява заедно с recommend_many в отделна нишка.
+    """
+
+    def __init__(self, system, executor, window_ms: float = None, max_batch_size: int = None):
+        self.system = system
+        self.executor = executor
+        self.window = (window_ms if window_ms is not None else SERVICE_CONFIG['batch_window_ms']) / 1000.0
+        self.max_batch_size = max_batch_size or SERVICE_CONFIG['max_batch_size']
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.batched_requests = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def submit(self, request: dict):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((request, future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.window
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            requests = [request for request, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, recommend_many, self.system, requests)
+            except Exception as e:
+                if len(batch) == 1:
+                    _, future = batch[0]
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                # една грешна заявка не бива да проваля останалите: всяка се оценява поотделно
+                logger.warning("Партида от %d заявки е неуспешна (%s) – заявките се повтарят поотделно",
+                               len(batch), e)
+                results = await asyncio.gather(*(loop.run_in_executor(self.executor, recommend_many,
+                                                                      self.system, [request])
+                                                 for request in requests), return_exceptions=True)
+                for (_, future), result in zip(batch, results):
+                    if future.done():
+                        continue
+                    if isinstance(result, BaseException):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result[0])
+                continue
+            self.batches += 1
+            self.batched_requests += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+class LatencyTracker:
+    """Времената на последните заявки по endpoint (в секунди)."""
+
+    def __init__(self, window: int = None):
+        self.window = window or SERVICE_CONFIG['latency_window']
+        self.samples = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+        self.counts = collections.Counter()
+
+    def record(self, endpoint: str, seconds: float):
+        self.samples[endpoint].append(seconds)
+        self.counts[endpoint] += 1
+
+    def summary(self) -> dict:
+        out = {}
+        for endpoint, samples in self.samples.items():
+            p50, p95, p99 = np.percentile(np.fromiter(samples, dtype=float), [50, 95, 99]) * 1000.0
+            out[endpoint] = {'count': self.counts[endpoint], 'window': len(samples),
+                             'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+                             'max_ms': max(samples) * 1000.0}
+        return out
+
+
+def _records(df) -> list:
+    if df is None or df.empty:
+        return []
+    return df.to_dict(orient='records')
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} не се сериализира в JSON")
+
+
+def _dumps(payload) -> bytes:
+    return json.dumps(payload, default=_json_default, ensure_ascii=False).encode('utf-8')
+
+
+class RecommendationService:
+    """Маршрутите на услугата върху готов RecommendationSystem и таблицата с клиенти."""
+
+    def __init__(self, system, clients: pd.DataFrame, model_key: str = None):
+        self.system = system
+        self.clients = clients
+        self.model_key = model_key
+        self.started = time.time()
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='score')
+        # кампаниите се решават една по една и не заемат нишките за препоръки
+        self.campaign_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='campaign')
+        # промените в каталога – една по една, докато препоръките продължават със старата версия
+        self.catalog_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='catalog')
+        self.batcher = MicroBatcher(system, self.executor)
+        self.latency = LatencyTracker()
+        self.jobs = {}
+        self._job_ids = itertools.count(1)
+
+    async def start(self):
+        self.batcher.start()
+
+    async def stop(self):
+        await self.batcher.stop()
+        self.executor.shutdown(wait=False)
+        self.campaign_executor.shutdown(wait=False)
+        self.catalog_executor.shutdown(wait=False)
+
+    async def dispatch(self, method: str, path: str, body: bytes):
+        """Връща (HTTP статус, JSON обект) за заявката."""
+        path = path.split('?', 1)[0].rstrip('/') or '/'
+        if path == '/health' and method == 'GET':
+            return HTTPStatus.OK, self.health()
+        if path == '/metrics' and method == 'GET':
+            return HTTPStatus.OK, metrics.to_prometheus()
+        if path == '/metrics/latency' and method == 'GET':
+            return HTTPStatus.OK, {'endpoints': self.latency.summary(),
+                                   'micro_batches': self.batcher.batches,
+                                   'micro_batched_requests': self.batcher.batched_requests}
+        if path == '/recommend' and method == 'POST':
+            return HTTPStatus.OK, await self.recommend(_parse_json(body))
+        if path == '/recommend/batch' and method == 'POST':
+            return HTTPStatus.OK, await self.recommend_batch(_parse_json(body))
+        if path == '/campaign' and method == 'POST':
+            return HTTPStatus.ACCEPTED, self.submit_campaign(_parse_json(body))
+        if path.startswith('/campaign/') and method == 'GET':
+            job = self.jobs.get(path[len('/campaign/'):])
+            if job is None:
+                return HTTPStatus.NOT_FOUND, {'error': 'Няма такава кампания'}
+            return HTTPStatus.OK, job
+        if path == '/catalog' and method == 'POST':
+            return HTTPStatus.OK, await self.update_catalog(_parse_json(body))
+        if path in KNOWN_PATHS:
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': f'{method} не се поддържа за {path}'}
+        return HTTPStatus.NOT_FOUND, {'error': f'Непознат адрес {path}'}
+
+    def health(self) -> dict:
+        return {'status': 'ok', 'model_key': self.model_key,
+                'offers': len(self.system.offers), 'catalog_version': self.system.catalog.version,
+                'clients': len(self.clients),
+                'queue': self.batcher.queue.qsize(),
+                'campaign_jobs': sum(job['status'] in ('queued', 'running') for job in self.jobs.values()),
+                'uptime_s': time.time() - self.started}
+
+    async def recommend(self, payload: dict) -> dict:
+        # проверката е тук, а не в партидата: грешна заявка получава 400 и не стига до останалите
+        client = _validated_client(payload.get('client'))
+        result = await self.batcher.submit({'client': client, 'top_n': _count_option(payload, 'top_n', 1),
+                                            'max_per_brand': _count_option(payload, 'max_per_brand'),
+                                            'max_per_category': _count_option(payload, 'max_per_category')})
+        return {'offers': _records(result)}
+
+    async def recommend_batch(self, payload: dict) -> dict:
+        clients = payload.get('clients')
+        if not isinstance(clients, list):
+            raise BadRequest("Липсва 'clients'")
+        clients = pd.DataFrame(clients)
+        budgets = payload.get('budgets')
+        if budgets is None and 'budget' not in clients.columns:
+            raise BadRequest("Липсват 'budgets' или полето 'budget' на клиентите")
+        top_n = _count_option(payload, 'top_n', 1)
+
+        def run():
+            chunks = self.system.get_recommendations_batch(clients, budgets, top_n, n_jobs=1)
+            return pd.concat(list(chunks), ignore_index=True)
+
+        result = await asyncio.get_running_loop().run_in_executor(self.executor, run)
+        return {'offers': _records(result)}
+
+    async def update_catalog(self, payload: dict) -> dict:
+        unknown = set(payload) - {'add', 'update', 'retire'}
+        if unknown or not payload:
+            raise BadRequest("Очакват се 'add', 'update' и/или 'retire'")
+
+        def run():
+            return self.system.apply_catalog_delta(payload.get('add'), payload.get('update'), payload.get('retire'))
+
+        try:
+            change = await asyncio.get_running_loop().run_in_executor(self.catalog_executor, run)
+        except ValueError as e:
+            raise BadRequest(str(e))
+        return change.as_dict()
+
+    def submit_campaign(self, payload: dict) -> dict:
+        # цялата заявка се проверява, преди да се създаде задача: грешна заявка не оставя 'queued'
+        total_budget = _number(payload, 'total_budget')
+        if payload.get('clients') is not None:
+            clients = payload['clients']
+            if not isinstance(clients, list) or not all(isinstance(c, dict) for c in clients):
+                raise BadRequest("'clients' трябва да е списък от обекти")
+            clients = pd.DataFrame(clients)
+            missing = [c for c in ('client_id', *CLIENT_NUMBERS[:-1], 'gender') if c not in clients.columns]
+            if len(clients) and missing:
+                raise BadRequest(f"Липсват полета на клиентите: {missing}")
+        elif payload.get('client_ids') is not None:
+            if not isinstance(payload['client_ids'], list):
+                raise BadRequest("'client_ids' трябва да е списък")
+            clients = self.clients[self.clients['client_id'].isin(payload['client_ids'])]
+        else:
+            clients = self.clients
+        options = _campaign_options(payload)
+
+        job_id = str(next(self._job_ids))
+        job = {'job_id': job_id, 'status': 'queued', 'clients': len(clients),
+               'total_budget': total_budget, 'submitted': time.time()}
+        self.jobs[job_id] = job
+        asyncio.ensure_future(self._run_campaign(job, clients, total_budget, options))
+        return {'job_id': job_id, 'status': job['status']}
+
+    async def _run_campaign(self, job: dict, clients: pd.DataFrame, total_budget: float, options: dict):
+        def run():
+            job['status'] = 'running'
+            return self.system.optimize_campaign(clients, total_budget, **options)
+
+        started = time.perf_counter()
+        try:
+            assignments = await asyncio.get_running_loop().run_in_executor(self.campaign_executor, run)
+        except Exception as e:
+            logger.exception("Кампания %s е неуспешна", job['job_id'])
+            job.update(status='failed', error=str(e))
+        else:
+            job.update(status='done', solve=assignments.attrs.get('solve'),
+                       assignments=_records(assignments))
+        job['elapsed_s'] = time.perf_counter() - started
+        self.latency.record('campaign_job', job['elapsed_s'])
+        self._evict_jobs()
+
+    def _evict_jobs(self):
+        """Пази само последните SERVICE_CONFIG['max_finished_jobs'] приключили кампании."""
+        finished = [job_id for job_id, job in self.jobs.items() if job['status'] in FINISHED_JOB_STATUSES]
+        for job_id in finished[:max(len(finished) - SERVICE_CONFIG['max_finished_jobs'], 0)]:
+            del self.jobs[job_id]
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """HTTP/1.1 с keep-alive; тялото се чете по Content-Length."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': 'Невалиден ред на заявката'}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+                length = int(headers.get('content-length') or 0)
+                if length > SERVICE_CONFIG['max_body_bytes']:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': 'Тялото е твърде голямо'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                started = time.perf_counter()
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except BadRequest as e:
+                    status, payload = HTTPStatus.BAD_REQUEST, {'error': str(e)}
+                except Exception as e:
+                    logger.exception("Грешка при %s %s", method, target)
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+                endpoint = target.split('?', 1)[0].rstrip('/') or '/'
+                if endpoint.startswith('/campaign/'):
+                    endpoint = '/campaign/<id>'
+                elif endpoint not in KNOWN_PATHS:
+                    endpoint = '<unknown>'   # произволни адреси не трупат отделни серии
+                self.latency.record(f'{method} {endpoint}', time.perf_counter() - started)
+
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status: HTTPStatus, payload, keep_alive: bool):
+        if isinstance(payload, str):
+            body, content_type = payload.encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            body, content_type = _dumps(payload), 'application/json; charset=utf-8'
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+
+def _parse_json(body: bytes) -> dict:
+    try:
+        payload = json.loads(body or b'{}')
+    except ValueError as e:
+        raise BadRequest(f"Невалиден JSON: {e}")
+    if not isinstance(payload, dict):
+        raise BadRequest("Очаква се JSON обект")
+    return payload
+
+
+def _validated_client(client) -> dict:
+    """Копие на клиента с числови полета като float; BadRequest при липсващо или грешно поле."""
+    if not isinstance(client, dict):
+        raise BadRequest("Липсва 'client'")
+    missing = [c for c in (*CLIENT_NUMBERS, 'gender') if c not in client]
+    if missing:
+        raise BadRequest(f"Липсват полета на клиента: {missing}")
+    client = dict(client)
+    for name in CLIENT_NUMBERS:
+        value = client[name]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value):
+            raise BadRequest(f"Полето '{name}' трябва да е число, а е {value!r}")
+        client[name] = float(value)
+    if client.get('preferred_category') is not None and not isinstance(client['preferred_category'], str):
+        raise BadRequest("Полето 'preferred_category' трябва да е низ")
+    client_id = client.get('client_id')
+    if client_id is not None and (isinstance(client_id, bool) or not isinstance(client_id, (int, str))):
+        raise BadRequest("Полето 'client_id' трябва да е цяло число или низ")
+    return client
+
+
+def _count_option(payload: dict, name: str, default=None):
+    """Цяло число >= 1 от заявката (top_n, max_per_brand, ...); липсващо или null дава default."""
+    value = payload.get(name)
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise BadRequest(f"'{name}' трябва да е цяло число >= 1, а е {value!r}")
+    return value
+
+
+def _number(payload: dict, name: str) -> float:
+    """Неотрицателно крайно число от заявката; BadRequest, ако липсва или е друго."""
+    value = payload.get(name)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value) or value < 0:
+        raise BadRequest(f"'{name}' трябва да е неотрицателно число, а е {value!r}")
+    return float(value)
+
+
+def _campaign_options(payload: dict) -> dict:
+    """Параметрите от CAMPAIGN_OPTIONS за optimize_campaign, проверени по тип и стойност."""
+    from campaign_solvers import SOLVER_BACKENDS
+    from candidate_pruning import PRUNE_MODES
+
+    options = {name: payload[name] for name in CAMPAIGN_OPTIONS if payload.get(name) is not None}
+    if 'backend' in options and options['backend'] not in SOLVER_BACKENDS:
+        raise BadRequest(f"Непознат решател {options['backend']!r}. Възможни: {', '.join(SOLVER_BACKENDS)}")
+    if 'prune' in options and options['prune'] not in PRUNE_MODES:
+        raise BadRequest(f"Непознат режим на премахване {options['prune']!r}. Възможни: {', '.join(PRUNE_MODES)}")
+    for name in ('time_limit', 'mip_gap'):
+        if name in options:
+            options[name] = _number(options, name)
+    for name in ('threads', 'prune_top_k'):
+        if name in options:
+            options[name] = _count_option(options, name)
+    for name in ('warm_start', 'polish'):
+        if name in options and not isinstance(options[name], bool):
+            raise BadRequest(f"'{name}' трябва да е true или false")
+    return options
+
+
+def load_system():
+    """
+    Данните, моделът от регистъра (обучава се само ако липсва за текущите данни)
+    и историческите признаци. Връща (RecommendationSystem, clients, model_key).
+    """
+    from data_loader import load_data
+    from feature_store import ClientFeatureStore
+    from model_registry import ModelRegistry, train_and_register
+    from recommendation_engine import RecommendationSystem
+
+    clients, offers, history = load_data()
+    registry = ModelRegistry()
+    model_key = registry.fingerprint()
+    scorer = registry.load_scorer(model_key)
+    if scorer is None:
+        logger.info("Няма модел в регистъра за %s – обучава се", model_key)
+        scorer = train_and_register(registry, model_key, clients, offers, history)
+    feature_store = ClientFeatureStore.from_history(history, offers)
+    return RecommendationSystem(scorer, None, offers, feature_store), clients, model_key
+
+
+async def serve(service: RecommendationService, host: str = None, port: int = None):
+    host = host or SERVICE_CONFIG['host']
+    port = port if port is not None else SERVICE_CONFIG['port']
+    await service.start()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    logger.info("Услугата слуша на http://%s:%d", host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP услуга за препоръки на оферти")
+    parser.add_argument('--host', default=SERVICE_CONFIG['host'])
+    parser.add_argument('--port', type=int, default=SERVICE_CONFIG['port'])
+    arena_source = parser.add_mutually_exclusive_group()
+    arena_source.add_argument('--arena', help="име на споделената памет от shared_arena.py")
+    arena_source.add_argument('--arena-file', help="memory-mapped файл от shared_arena.py --file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.arena or args.arena_file:
+        from shared_arena import attach_system
+        started = time.perf_counter()
+        system, clients, arena = attach_system(name=args.arena, path=args.arena_file)
+        model_key = arena.meta.get('model_key')
+        if clients is None:
+            clients = pd.DataFrame({'client_id': []})
+        logger.info("Закачен към арена %s за %.1f ms", args.arena or args.arena_file,
+                    1000 * (time.perf_counter() - started))
+    else:
+        system, clients, model_key = load_system()
+    try:
+        asyncio.run(serve(RecommendationService(system, clients, model_key), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
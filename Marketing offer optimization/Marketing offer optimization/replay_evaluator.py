@@ -0,0 +1,333 @@
+"""
+Офлайн replay на препоръките и кампаниите върху бъдещ прозорец от history.
+
+    python replay_evaluator.py --split-date 2023-01-01 --weight-step 0.1 --budgets 500,1000
+    python replay_evaluator.py --campaign-budgets 20000,50000 --models '[{"lr__C": 0.1}, {"lr__C": 10}]'
+
+history се разделя по transaction_date: моделите се обучават върху миналото, историческите
+признаци на клиентите са само от миналото, а решенията на get_recommendations (top_n оферти
+при бюджет на клиент) и optimize_campaign (при общ бюджет) се сравняват с откликите в бъдещия
+прозорец. Конфигурация е модел × тегла на combined_score × бюджет × бюджет на кампанията:
+
+    auc                   ROC AUC на склонността върху бъдещите редове (зависи само от модела)
+    coverage              дял на клиентите с поне една препоръка
+    expected_profit       средно p * estimated_profit на клиент по модела (direct method)
+    matched_events        бъдещи редове с оферта, която политиката би препоръчала на клиента
+    replay_profit         средната печалба на тези редове при приемане (acceptance-weighted profit)
+    ips_profit            inverse-propensity оценка на печалбата на ред; склонността на
+                          логващата политика е честотата на офертата в миналото
+    snips_profit          самонормализираният вариант на ips_profit (по-малка дисперсия)
+    campaign_*            същото за назначенията на кампанията, плюс цена и целева стойност
+
+Признаците на двойките клиент × оферта се смятат веднъж, склонността – веднъж на модел; всички
+конфигурации ги преизползват и се оценяват паралелно в процеси ('fork'), които ги наследяват.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from batch_recommendations import _resolve_jobs, top_n_per_client
+from campaign_candidates import CampaignCandidates
+from config import REPLAY_CONFIG
+from features import feature_matrix
+from scoring import WEIGHT_NAMES, base_score, combined_score, predict_propensity, score_weights
+
+logger = logging.getLogger(__name__)
+
+# Оценителят по време на run(); при 'fork' се наследява от процесите – кешираните
+# склонности и двойки не се сериализират за всяка конфигурация.
+_REPLAY_STATE = None
+
+_CHUNK_SIZE = 10_000
+
+
+def split_history(history: pd.DataFrame, split_date=None, test_share: float = None):
+    """
+    (минало, бъдеще, split_date): редовете с transaction_date >= split_date са бъдещият
+    прозорец. Без split_date границата е квантилът, след който остават test_share от редовете.
+    Редове без дата остават в миналото.
+    """
+    dates = pd.to_datetime(history['transaction_date'], format="%Y-%m-%d", errors='coerce')
+    if split_date is None:
+        test_share = REPLAY_CONFIG['test_share'] if test_share is None else test_share
+        if not 0 < test_share < 1:
+            raise ValueError(f"test_share трябва да е между 0 и 1, а е {test_share}")
+        split_date = dates.quantile(1 - test_share)
+    split_date = pd.Timestamp(split_date)
+    future = (dates >= split_date).to_numpy()
+    if not future.any() or future.all():
+        raise ValueError(f"Границата {split_date.date()} оставя празно минало или бъдеще")
+    return history[~future], history[future], split_date
+
+
+def weight_grid(step: float = None) -> list:
+    """Всички тегла (склонност, печалба, цена) със стъпка step и сума 1."""
+    step = REPLAY_CONFIG['weight_step'] if step is None else step
+    n = int(round(1 / step))
+    if n < 1 or not np.isclose(n * step, 1):
+        raise ValueError(f"1 трябва да се дели на стъпката, а тя е {step}")
+    return [(i / n, j / n, (n - i - j) / n) for i in range(n + 1) for j in range(n + 1 - i)]
+
+
+def _roc_auc(labels: np.ndarray, scores: np.ndarray) -> float:
+    if len(np.unique(labels)) < 2:
+        return float('nan')
+    from sklearn.metrics import roc_auc_score
+    return float(roc_auc_score(labels, scores))
+
+
+class ReplayEvaluator:
+    """
+    Миналото, обучените върху него модели и кешираните склонности на допустимите двойки
+    за клиентите от бъдещия прозорец; evaluate() оценява една конфигурация, run() – много.
+    models е списък от параметри за ModelTrainer.fit_params.
+    """
+
+    def __init__(self, clients: pd.DataFrame, offers: pd.DataFrame, history: pd.DataFrame,
+                 split_date=None, models=None, max_clients=None, top_n: int = None,
+                 campaign_backend=None, test_share: float = None):
+        from feature_store import ClientFeatureStore
+        from linear_scorer import LinearScorer
+        from model_trainer import ModelTrainer
+        from recommendation_engine import RecommendationSystem
+
+        self.top_n = top_n or REPLAY_CONFIG['top_n']
+        self.campaign_backend = campaign_backend or REPLAY_CONFIG['campaign_backend']
+        past, future, self.split_date = split_history(history, split_date or REPLAY_CONFIG['split_date'], test_share)
+        logger.info("Минало: %d реда, бъдеще: %d реда от %s", len(past), len(future), self.split_date.date())
+
+        started = time.perf_counter()
+        trainer = ModelTrainer(clients, offers, past)
+        features, labels = trainer.preprocess_data()
+        known = labels.notna().to_numpy()
+        features, labels = features[known], labels[known].astype(int)
+        self.model_params = list(models or REPLAY_CONFIG['models'])
+        self.models = [LinearScorer.from_pipeline(trainer.fit_params(params, features, labels))
+                       for params in self.model_params]
+        logger.info("Обучени %d модела за %.1f s", len(self.models), time.perf_counter() - started)
+
+        # историческите признаци са само от миналото, както биха били към split_date
+        store = ClientFeatureStore.from_history(past, offers)
+        self.system = RecommendationSystem(self.models[0], None, offers, store)
+        self.catalog = self.system.catalog.snapshot()
+        self._select_clients(clients, future, max_clients)
+        self._cache_pairs()
+        self._prepare_events(past, future)
+
+    def _select_clients(self, clients: pd.DataFrame, future: pd.DataFrame, max_clients):
+        max_clients = REPLAY_CONFIG['max_clients'] if max_clients is None else max_clients
+        ids = pd.unique(future['client_id'])
+        ids = ids[np.isin(ids, clients['client_id'].to_numpy())]
+        if max_clients and len(ids) > max_clients:
+            rng = np.random.default_rng(REPLAY_CONFIG['random_state'])
+            ids = np.sort(rng.choice(ids, max_clients, replace=False))
+        self.clients = clients[clients['client_id'].isin(ids)].reset_index(drop=True)
+        self.client_index = pd.Index(self.clients['client_id'])
+
+    def _cache_pairs(self):
+        """Допустимите двойки (без ограничение по бюджет) и склонността им по модел."""
+        started = time.perf_counter()
+        offers = self.catalog.offers
+        client_pos, offer_pos, propensity = [], [], [[] for _ in self.models]
+        for c_pos, o_pos in self.catalog.eligibility.eligible_pairs(self.clients, np.inf, _CHUNK_SIZE):
+            if len(c_pos) == 0:
+                continue
+            c = self.clients.iloc[c_pos]
+            # признаците на блока се смятат веднъж за всички модели
+            X = feature_matrix(c['age'], c['income'], c['previous_purchases'], offers['price'].to_numpy()[o_pos],
+                               **self.system.history_features(c['client_id'].to_numpy()))
+            for m, model in enumerate(self.models):
+                propensity[m].append(predict_propensity(model, X))
+            client_pos.append(c_pos)
+            offer_pos.append(o_pos)
+
+        self.pair_client = np.concatenate(client_pos) if client_pos else np.empty(0, dtype=np.int64)
+        self.pair_offer = np.concatenate(offer_pos) if offer_pos else np.empty(0, dtype=np.int64)
+        self.propensity = [np.concatenate(p) if p else np.empty(0) for p in propensity]
+        self.pair_price = offers['price'].to_numpy(dtype=float)[self.pair_offer]
+        self.pair_profit = offers['estimated_profit'].to_numpy(dtype=float)[self.pair_offer]
+        logger.info("%d клиента, %d допустими двойки, склонност по %d модела за %.1f s", len(self.clients),
+                    len(self.pair_client), len(self.models), time.perf_counter() - started)
+
+    def _prepare_events(self, past: pd.DataFrame, future: pd.DataFrame):
+        """Бъдещите редове на избраните клиенти, наградата им и склонността на логването."""
+        offers = self.catalog.offers
+        n_offers = len(offers)
+        client_pos = self.client_index.get_indexer(future['client_id'])
+        offer_pos = self.catalog.offer_index.get_indexer(future['offer_id'])
+        known = (client_pos >= 0) & (offer_pos >= 0)
+        client_pos, offer_pos = client_pos[known], offer_pos[known]
+        accepted = (future['response'].astype(object).to_numpy()[known] == 'accepted')
+
+        self.event_keys = client_pos.astype(np.int64) * n_offers + offer_pos
+        self.event_accepted = accepted
+        self.event_reward = np.where(accepted, offers['estimated_profit'].to_numpy(dtype=float)[offer_pos], 0.0)
+        # логващата политика: честотата на офертата в миналото, изгладена с +1
+        counts = np.bincount(self.catalog.offer_index.get_indexer(past['offer_id']) + 1, minlength=n_offers + 1)[1:]
+        self.event_logging = ((counts + 1) / (counts.sum() + n_offers))[offer_pos]
+
+        c = self.clients.iloc[client_pos]
+        X = feature_matrix(c['age'], c['income'], c['previous_purchases'], offers['price'].to_numpy()[offer_pos],
+                           **self.system.history_features(c['client_id'].to_numpy()))
+        self.auc = [_roc_auc(accepted, predict_propensity(model, X)) for model in self.models]
+        logger.info("%d бъдещи реда за оценка, AUC по модел: %s", len(self.event_keys),
+                    ', '.join(f"{auc:.4f}" for auc in self.auc))
+
+    def configurations(self, weights=None, budgets=None, campaign_budgets=None) -> list:
+        """Всички комбинации модел × тегла × бюджет × бюджет на кампанията (None = без кампания)."""
+        weights = weight_grid() if weights is None else [score_weights(w) for w in weights]
+        budgets = REPLAY_CONFIG['budgets'] if budgets is None else budgets
+        campaign_budgets = REPLAY_CONFIG['campaign_budgets'] if campaign_budgets is None else campaign_budgets
+        return [{'model': m, 'weights': w, 'budget': float(b), 'campaign_budget': cb}
+                for m in range(len(self.models)) for w in weights for b in budgets
+                for cb in (list(campaign_budgets) or [None])]
+
+    def _policy_metrics(self, client_pos, offer_pos, propensity, probability: float, prefix: str = '') -> dict:
+        """
+        Метриките на политика, която дава offer_pos на client_pos с вероятност probability
+        (1 / top_n за препоръките, 1 за кампанията), върху бъдещите редове.
+        """
+        profit = self.catalog.offers['estimated_profit'].to_numpy(dtype=float)[offer_pos]
+        keys = client_pos.astype(np.int64) * len(self.catalog.offers) + offer_pos
+        matched = np.isin(self.event_keys, keys)
+        weights = np.where(matched, probability / self.event_logging, 0.0)
+        n_events = len(self.event_keys)
+        clip = REPLAY_CONFIG['ips_clip']
+        return {
+            f'{prefix}expected_profit': float((propensity * profit).sum() * probability / max(len(self.clients), 1)),
+            f'{prefix}matched_events': int(matched.sum()),
+            f'{prefix}replay_profit': float(self.event_reward[matched].mean()) if matched.any() else float('nan'),
+            f'{prefix}replay_acceptance': float(self.event_accepted[matched].mean()) if matched.any() else float('nan'),
+            f'{prefix}ips_profit': float((np.minimum(weights, clip) * self.event_reward).sum() / n_events) if n_events else float('nan'),
+            f'{prefix}snips_profit': float((weights * self.event_reward).sum() / weights.sum()) if weights.sum() > 0 else float('nan'),
+        }
+
+    def evaluate(self, config: dict) -> dict:
+        """Метриките на една конфигурация от configurations()."""
+        started = time.perf_counter()
+        weights = score_weights(config['weights'])
+        model, budget = config['model'], config['budget']
+        propensity = self.propensity[model]
+        result = {'model': model, 'model_params': json.dumps(self.model_params[model], sort_keys=True)}
+        result.update({f'w_{name}': w for name, w in zip(WEIGHT_NAMES, weights)})
+        result.update(budget=budget, campaign_budget=config['campaign_budget'], auc=self.auc[model])
+
+        # get_recommendations: top_n по combined_score сред офертите до бюджета на клиента
+        within = np.flatnonzero(self.pair_price <= budget)
+        scores = combined_score(propensity[within], self.pair_price[within], self.pair_profit[within],
+                                budget, self.catalog.max_profit, weights)
+        chosen, _ = top_n_per_client(self.pair_client[within], self.pair_offer[within], scores, self.top_n)
+        chosen = within[chosen]
+        result['coverage'] = len(np.unique(self.pair_client[chosen])) / max(len(self.clients), 1)
+        result.update(self._policy_metrics(self.pair_client[chosen], self.pair_offer[chosen],
+                                           propensity[chosen], 1.0 / self.top_n))
+
+        if config['campaign_budget'] is not None:
+            result.update(self._campaign(propensity, weights, config['campaign_budget']))
+        result['eval_s'] = time.perf_counter() - started
+        return result
+
+    def _campaign(self, propensity, weights, total_budget: float) -> dict:
+        """optimize_campaign върху кешираните двойки, с теглата на конфигурацията."""
+        frame = pd.DataFrame({
+            'client_id':  self.clients['client_id'].to_numpy()[self.pair_client],
+            'offer_id':   self.catalog.offers['offer_id'].to_numpy()[self.pair_offer],
+            'price':      self.pair_price,
+            'propensity': propensity,
+        })
+        candidates = CampaignCandidates(frame, base_score(propensity, self.pair_profit, self.catalog.max_profit, weights),
+                                        catalog=self.catalog, weights=weights)
+        assignments = self.system.solve_candidates(candidates, total_budget, backend=self.campaign_backend)
+        solve = assignments.attrs.get('solve', {})
+        if assignments.empty:
+            client_pos = offer_pos = np.empty(0, dtype=np.int64)
+            assigned_propensity = np.empty(0)
+        else:
+            client_pos = self.client_index.get_indexer(assignments['client_id'])
+            offer_pos = self.catalog.offer_index.get_indexer(assignments['offer_id'])
+            assigned_propensity = assignments['propensity'].to_numpy(dtype=float)
+        result = {'campaign_assigned': len(assignments),
+                  'campaign_cost': float(self.catalog.offers['price'].to_numpy(dtype=float)[offer_pos].sum()),
+                  'campaign_objective': solve.get('objective'),
+                  'campaign_status': solve.get('status')}
+        result.update(self._policy_metrics(client_pos, offer_pos, assigned_propensity, 1.0, prefix='campaign_'))
+        return result
+
+    def run(self, configs: list = None, n_jobs: int = None) -> pd.DataFrame:
+        """
+        Оценява configs (по подразбиране configurations()) – с n_jobs > 1 в процеси,
+        създадени с 'fork'; без 'fork' (напр. Windows) в текущия процес. Ред на конфигурация.
+        """
+        global _REPLAY_STATE
+        configs = self.configurations() if configs is None else configs
+        n_jobs = _resolve_jobs(REPLAY_CONFIG['n_jobs'] if n_jobs is None else n_jobs, len(configs))
+        if n_jobs > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+            logger.warning("Няма 'fork' – конфигурациите се оценяват в един процес")
+            n_jobs = 1
+        started = time.perf_counter()
+        if n_jobs == 1:
+            results = [self.evaluate(config) for config in configs]
+        else:
+            _REPLAY_STATE = self
+            try:
+                with multiprocessing.get_context('fork').Pool(n_jobs) as pool:
+                    results = pool.map(_evaluate_config, configs, chunksize=1)
+            finally:
+                _REPLAY_STATE = None
+        logger.info("%d конфигурации за %.1f s (%d процеса)", len(configs), time.perf_counter() - started, n_jobs)
+        return pd.DataFrame(results)
+
+
+def _evaluate_config(config: dict) -> dict:
+    return _REPLAY_STATE.evaluate(config)
+
+
+def _number_list(text: str) -> list:
+    return [float(part) for part in text.split(',') if part.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Офлайн replay на препоръките и кампаниите върху бъдещ прозорец")
+    parser.add_argument('--data-dir', default=None, help="директория с clients/offers/history.csv (по подразбиране CSV_PATHS)")
+    parser.add_argument('--split-date', default=REPLAY_CONFIG['split_date'], help="начало на бъдещия прозорец (YYYY-MM-DD)")
+    parser.add_argument('--test-share', type=float, default=REPLAY_CONFIG['test_share'])
+    parser.add_argument('--models', default=None, help="JSON списък от параметри на pipeline-а")
+    parser.add_argument('--weight-step', type=float, default=REPLAY_CONFIG['weight_step'])
+    parser.add_argument('--budgets', type=_number_list, default=REPLAY_CONFIG['budgets'])
+    parser.add_argument('--campaign-budgets', type=_number_list, default=REPLAY_CONFIG['campaign_budgets'])
+    parser.add_argument('--max-clients', type=int, default=REPLAY_CONFIG['max_clients'])
+    parser.add_argument('--n-jobs', type=int, default=REPLAY_CONFIG['n_jobs'])
+    parser.add_argument('--sort', default='snips_profit', help="метрика за подреждане на резултата")
+    parser.add_argument('--output', default='replay_results.csv')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # всяко решаване на кампания се логва от решателите
+    for name in ('recommendation_engine', 'campaign_solvers'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    from data_loader import load_data
+
+    paths = None
+    if args.data_dir:
+        paths = {name: os.path.join(args.data_dir, f"{name}.csv") for name in ('clients', 'offers', 'history')}
+    clients, offers, history = load_data(paths=paths)
+    evaluator = ReplayEvaluator(clients, offers, history, args.split_date,
+                                json.loads(args.models) if args.models else None, args.max_clients,
+                                test_share=args.test_share)
+    configs = evaluator.configurations(weight_grid(args.weight_step), args.budgets, args.campaign_budgets)
+    results = evaluator.run(configs, args.n_jobs)
+    results.to_csv(args.output, index=False)
+    logger.info("Резултатите са записани в %s", args.output)
+    if args.sort in results.columns:
+        columns = ['model'] + [f'w_{name}' for name in WEIGHT_NAMES] + ['budget', 'campaign_budget', args.sort]
+        print(results.sort_values(args.sort, ascending=False)[columns].head(10).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
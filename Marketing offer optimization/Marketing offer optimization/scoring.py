@@ -0,0 +1,62 @@
+import warnings
+
+import numpy as np
+
+from config import SCORING_CONFIG
+
+# тегла на combined_score по подразбиране: склонност, нормализирана печалба, свободен бюджет
+WEIGHT_NAMES = ('propensity', 'profit', 'price')
+PROPENSITY_WEIGHT, PROFIT_WEIGHT, PRICE_WEIGHT = (float(SCORING_CONFIG['weights'][name]) for name in WEIGHT_NAMES)
+
+
+def score_weights(weights=None) -> tuple:
+    """
+    (склонност, печалба, цена) за combined_score: от dict с ключове от WEIGHT_NAMES
+    (липсващите са по подразбиране), от три числа или – при None – от конфигурацията.
+    """
+    if weights is None:
+        return PROPENSITY_WEIGHT, PROFIT_WEIGHT, PRICE_WEIGHT
+    if isinstance(weights, dict):
+        unknown = set(weights) - set(WEIGHT_NAMES)
+        if unknown:
+            raise ValueError(f"Непознати тегла {sorted(unknown)}; възможни: {list(WEIGHT_NAMES)}")
+        defaults = dict(zip(WEIGHT_NAMES, score_weights()))
+        return tuple(float(weights.get(name, defaults[name])) for name in WEIGHT_NAMES)
+    weights = tuple(float(w) for w in weights)
+    if len(weights) != len(WEIGHT_NAMES):
+        raise ValueError(f"Очакват се {len(WEIGHT_NAMES)} тегла ({', '.join(WEIGHT_NAMES)}), а не {len(weights)}")
+    return weights
+
+
+def predict_propensity(model, X: np.ndarray, chunk_size: int = None) -> np.ndarray:
+    """
+    Вероятността за приемане за всеки ред на X с едно извикване на predict_proba,
+    или на блокове от chunk_size реда, за да се ограничи паметта.
+    """
+    if chunk_size is None:
+        chunk_size = SCORING_CONFIG['chunk_size']
+    out = np.empty(len(X))
+    with warnings.catch_warnings():
+        # моделът е обучен върху DataFrame с имена на колоните
+        warnings.simplefilter("ignore", category=UserWarning)
+        for start in range(0, len(X), chunk_size):
+            out[start:start + chunk_size] = model.predict_proba(X[start:start + chunk_size])[:, 1]
+    return out
+
+
+def base_score(propensity, profit, max_profit, weights=None) -> np.ndarray:
+    """Частта от combined_score, която не зависи от бюджета; weights – вж. score_weights."""
+    propensity_weight, profit_weight, _ = score_weights(weights)
+    normalized_profit = np.asarray(profit, dtype=float) / max_profit
+    return propensity_weight * propensity + profit_weight * normalized_profit
+
+
+def price_score(price, budget, weights=None) -> np.ndarray:
+    """Частта от combined_score за свободния бюджет; budget е скалар или масив."""
+    _, _, price_weight = score_weights(weights)
+    normalized_price = np.asarray(price, dtype=float) / budget
+    return price_weight * (1 - normalized_price)
+
+
+def combined_score(propensity, price, profit, budget, max_profit, weights=None) -> np.ndarray:
+    return base_score(propensity, profit, max_profit, weights) + price_score(price, budget, weights)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pulp
+
+
+def rank_top_n(scores, top_n: int = 1) -> np.ndarray:
+    """
+    Позициите на top_n най-добрите оценки, подредени по намаляваща оценка.
+    При равенство печели по-ранната позиция, така че резултатът е детерминиран.
+    """
+    scores = np.asarray(scores, dtype=float)
+    n = len(scores)
+    if n == 0 or top_n <= 0:
+        return np.array([], dtype=np.int64)
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+
+    if top_n >= n:
+        idx = np.arange(n)
+    elif top_n == 1:
+        # np.argmax връща първата позиция с максимална стойност
+        return np.array([np.argmax(scores)], dtype=np.int64)
+    else:
+        kth = np.argpartition(-scores, top_n - 1)[top_n - 1]
+        # всички позиции, равни на границата, за да може равенствата да се решат по позиция
+        idx = np.flatnonzero(scores >= scores[kth])
+    order = np.lexsort((idx, -scores[idx]))
+    return idx[order[:top_n]]
+
+
+def greedy_top_n(scores, labels, max_per_label: int, top_n: int) -> np.ndarray:
+    """
+    Top-N с най-много max_per_label оферти от една група (марка или категория).
+    При едно такова ограничение алчният избор по оценка е оптимален.
+    """
+    codes, _ = pd.factorize(np.asarray(labels, dtype=object), use_na_sentinel=False)
+    counts = np.zeros(codes.max() + 1 if len(codes) else 0, dtype=np.int64)
+    selected = []
+    for i in rank_top_n(scores, len(scores)):
+        if counts[codes[i]] >= max_per_label:
+            continue
+        counts[codes[i]] += 1
+        selected.append(i)
+        if len(selected) == top_n:
+            break
+    return np.array(selected, dtype=np.int64)
+
+
+def milp_top_n(scores, constraints, top_n: int) -> np.ndarray:
+    """
+    Top-N при няколко ограничения за разнообразие едновременно, решено с PuLP.
+    constraints е списък от (labels, max_per_label).
+    Първо се максимизира броят избрани оферти, после сумарната оценка.
+    """
+    scores = np.asarray(scores, dtype=float)
+    n = len(scores)
+    prob = pulp.LpProblem("Diverse_Offer_Selection", pulp.LpMaximize)
+    x = [pulp.LpVariable(f"x_{i}", cat='Binary') for i in range(n)]
+
+    # бонус за всяка избрана оферта, по-голям от всяка възможна загуба в оценката
+    bonus = 1.0 + (scores.max() - scores.min()) * top_n
+    prob += pulp.lpSum((scores[i] + bonus) * x[i] for i in range(n)), "Total_Score"
+    prob += pulp.lpSum(x) <= top_n, "Top_N_constraint"
+    for k, (labels, max_per_label) in enumerate(constraints):
+        codes, uniques = pd.factorize(np.asarray(labels, dtype=object), use_na_sentinel=False)
+        for j in range(len(uniques)):
+            members = np.flatnonzero(codes == j)
+            prob += pulp.lpSum(x[i] for i in members) <= max_per_label, f"Diversity_{k}_{j}"
+
+    prob.solve(pulp.PULP_CBC_CMD(msg=False))
+    chosen = np.array([i for i in range(n) if pulp.value(x[i]) > 0.5], dtype=np.int64)
+    return chosen[rank_top_n(scores[chosen], len(chosen))]
@@ -0,0 +1,348 @@
+"""
+Каталогът, индексът за допустимост, теглата на модела и признаците на клиентите в една
+споделена памет (multiprocessing.shared_memory) или в memory-mapped файл. Данните се
+зареждат и моделът се сгъва веднъж; всеки работен процес само се закача към тях.
+
+    python shared_arena.py [--name moo_arena | --file arena.bin]
+    python recommendation_service.py --arena moo_arena --port 8081
+    python recommendation_service.py --arena moo_arena --port 8082
+
+Форматът е MAGIC, версия на формата и дължина на заглавието, заглавието като JSON (dtype,
+форма и отместване на всеки масив и метаданните на каталога и модела) и масивите,
+подравнени на 64 байта. Закачените процеси получават NumPy изгледи само за четене, без
+копиране: числовите колони, индексът, теглата и агрегатите на клиентите заемат паметта
+веднъж за всички процеси. Текстовите и категорийните колони се пазят като кодове и речник;
+текстовите се възстановяват при закачане.
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import SHARED_ARENA_CONFIG
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'MOOARENA'
+FORMAT_VERSION = 1
+_PREFIX = struct.Struct('<8sII')   # MAGIC, версия на формата, дължина на JSON заглавието
+_ALIGN = 64
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def _attach_shared_memory(name: str):
+    """
+    Съществуващата споделена памет по име. Закачен процес не бива да я регистрира в
+    resource_tracker: той я изтрива при изхода на първия закачен процес (общ е и с
+    процесите, пуснати с multiprocessing). От Python 3.13 SharedMemory приема track=False;
+    при по-старите регистрацията се отменя веднага след отварянето.
+    """
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+    if os.name != 'nt':
+        # на Windows няма resource_tracker: паметта живее, докато има отворен към нея процес
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister('/' + shm.name.lstrip('/'), 'shared_memory')
+    return shm
+
+
+def _write(buffer, header: bytes, arrays: dict, layout: dict, data_start: int):
+    buffer[:_PREFIX.size] = _PREFIX.pack(MAGIC, FORMAT_VERSION, len(header))
+    buffer[_PREFIX.size:_PREFIX.size + len(header)] = header
+    for key, value in arrays.items():
+        target = np.ndarray(value.shape, dtype=value.dtype, buffer=buffer, offset=data_start + layout[key]['offset'])
+        target[...] = value
+        del target
+
+
+class SharedArena:
+    """
+    Масиви по име и JSON метаданни в един непрекъснат буфер. create() пише арената
+    (собственикът я изтрива с unlink()), attach() се закача само за четене.
+    buffer е mmap на файла или SharedMemory.buf; handle е обектът, който го държи отворен.
+    """
+
+    def __init__(self, buffer, handle, meta: dict, name: str = None, path: str = None, shm=None):
+        self.meta = meta
+        self.arrays = {}
+        data_start = meta['data_start']
+        for key, spec in meta['arrays'].items():
+            array = np.ndarray(tuple(spec['shape']), dtype=np.dtype(spec['dtype']),
+                               buffer=buffer, offset=data_start + spec['offset'])
+            # буферът на SharedMemory е за запис, но арената не се променя след create()
+            array.flags.writeable = False
+            self.arrays[key] = array
+        self._handle = handle
+        self.name = name
+        self.path = path
+        # при собственика – за unlink()
+        self._shm = shm
+
+    @property
+    def nbytes(self) -> int:
+        return self.meta['size']
+
+    def __getitem__(self, key) -> np.ndarray:
+        return self.arrays[key]
+
+    @classmethod
+    def create(cls, arrays: dict, meta: dict, name: str = None, path: str = None):
+        """
+        Записва arrays (име -> масив) и meta в нова споделена памет name (при path=None)
+        или във файла path. Файлът се записва встрани и се заменя наведнъж, така че
+        процес, който се закача в момента, вижда или старата, или новата арена.
+        """
+        layout, offset = {}, 0
+        arrays = {key: np.ascontiguousarray(value) for key, value in arrays.items()}
+        for key, value in arrays.items():
+            if value.dtype.hasobject:
+                raise ValueError(f"Масивът {key!r} е с Python обекти и не може да е в споделена памет")
+            offset = _aligned(offset)
+            layout[key] = {'dtype': value.dtype.str, 'shape': list(value.shape), 'offset': offset}
+            offset += value.nbytes
+        meta = dict(meta, arrays=layout, format_version=FORMAT_VERSION)
+        # data_start и size са в заглавието, затова се смятат, докато дължината му не се промени
+        header_size = 0
+        while True:
+            data_start = _aligned(_PREFIX.size + header_size)
+            meta.update(data_start=data_start, size=data_start + offset)
+            header = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+            if len(header) == header_size:
+                break
+            header_size = len(header)
+        size = max(meta['size'], 1)
+
+        if path is None:
+            from multiprocessing import shared_memory
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            try:
+                _write(shm.buf, header, arrays, layout, data_start)
+            except BaseException:
+                shm.close()
+                shm.unlink()
+                raise
+            return cls._opened(shm.buf, shm, name=shm.name, shm=shm)
+
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        try:
+            with open(tmp_path, 'w+b') as f:
+                f.truncate(size)
+                with mmap.mmap(f.fileno(), size) as mapped:
+                    _write(mapped, header, arrays, layout, data_start)
+                    mapped.flush()
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return cls.attach(path=path)
+
+    @classmethod
+    def attach(cls, name: str = None, path: str = None):
+        """Закача се към арената по име на споделената памет или по път до файл."""
+        if (name is None) == (path is None):
+            raise ValueError("Нужно е точно едно от name и path")
+        if path is not None:
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return cls._opened(mapped, mapped, path=path)
+        shm = _attach_shared_memory(name)
+        return cls._opened(shm.buf, shm, name=name)
+
+    @classmethod
+    def _opened(cls, buffer, handle, name: str = None, path: str = None, shm=None):
+        magic, version, header_size = _PREFIX.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            handle.close()
+            raise ValueError(f"{path or name} не е арена на офертите")
+        if version != FORMAT_VERSION:
+            handle.close()
+            raise ValueError(f"Версия на формата {version}, очаква се {FORMAT_VERSION}")
+        meta = json.loads(bytes(buffer[_PREFIX.size:_PREFIX.size + header_size]).decode('utf-8'))
+        return cls(buffer, handle, meta, name=name, path=path, shm=shm)
+
+    def close(self):
+        """
+        Освобождава изгледите на този процес. Масивите, взети от арената (и системата
+        върху тях), трябва вече да не се ползват – иначе буферът не може да се затвори.
+        """
+        self.arrays = {}
+        self._handle.close()
+
+    def unlink(self):
+        """Изтрива арената (споделената памет или файла); закачените процеси я ползват до close()."""
+        if self._shm is not None:
+            self._shm.unlink()
+        elif self.path is not None:
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def _encode_frame(prefix: str, frame: pd.DataFrame, arrays: dict) -> list:
+    """
+    Колоните на frame като масиви в arrays; връща описанието им за заглавието.
+    Числовите колони се пазят както са, категорийните – като кодове и категории,
+    а останалите (текст) – като кодове и речник на различните стойности.
+    """
+    columns = []
+    for column in frame.columns:
+        series = frame[column]
+        key = f"{prefix}/{column}"
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            arrays[key + '.codes'] = series.cat.codes.to_numpy()
+            arrays[key + '.categories'] = _dictionary(series.cat.categories, key)
+            columns.append({'name': column, 'kind': 'category', 'ordered': bool(series.cat.ordered)})
+        elif isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufcmM':
+            arrays[key] = series.to_numpy()
+            columns.append({'name': column, 'kind': 'numeric'})
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            arrays[key + '.codes'] = codes.astype(np.int32)
+            arrays[key + '.categories'] = _dictionary(uniques, key)
+            columns.append({'name': column, 'kind': 'values', 'dtype': str(series.dtype)})
+    return columns
+
+
+def _dictionary(values, key: str) -> np.ndarray:
+    values = np.asarray(pd.Index(values).tolist())
+    if values.dtype.hasobject:
+        raise ValueError(f"Стойностите на {key!r} са от смесен тип и не могат да се запишат")
+    return values
+
+
+def _decode_frame(prefix: str, columns: list, arena: SharedArena) -> pd.DataFrame:
+    """DataFrame от _encode_frame; числовите колони са изгледи към арената, без копиране."""
+    data = {}
+    for spec in columns:
+        column, key = spec['name'], f"{prefix}/{spec['name']}"
+        if spec['kind'] == 'numeric':
+            data[column] = arena[key]
+        elif spec['kind'] == 'category':
+            dtype = pd.CategoricalDtype(pd.Index(arena[key + '.categories']), ordered=spec['ordered'])
+            data[column] = pd.Categorical.from_codes(arena[key + '.codes'], dtype=dtype, validate=False)
+        else:
+            uniques = np.append(arena[key + '.categories'].astype(object), np.nan)
+            data[column] = pd.array(uniques[arena[key + '.codes']], dtype=spec['dtype'])
+    return pd.DataFrame(data, copy=False)
+
+
+def export_system(system, clients: pd.DataFrame = None, model_key: str = None,
+                  name: str = None, path: str = None) -> SharedArena:
+    """
+    Текущата версия на каталога на system, индексът ѝ за допустимост, сгънатият линеен
+    модел (LinearScorer) и агрегатите по клиент от feature_store – в нова арена.
+    clients (таблицата за кампаниите) се записва, ако е подадена.
+    """
+    model = system.model
+    if not all(hasattr(model, attr) for attr in ('weights', 'intercept', 'feature_columns')):
+        raise ValueError("В арената се записва само LinearScorer – сгънете модела с LinearScorer.from_pipeline")
+    snapshot = system.catalog.snapshot()
+    arrays = {}
+    meta = {
+        'created': time.time(),
+        'model_key': model_key,
+        'catalog': {'version': snapshot.version, 'max_profit': float(snapshot.max_profit),
+                    'columns': _encode_frame('offers', snapshot.offers, arrays)},
+        'model': {'intercept': model.intercept, 'feature_columns': list(model.feature_columns)},
+    }
+    arrays['model/weights'] = model.weights
+
+    eligibility_arrays, meta['eligibility'] = snapshot.eligibility.export_state()
+    arrays.update({f"eligibility/{k}": v for k, v in eligibility_arrays.items()})
+
+    store = system.feature_store
+    if store is not None:
+        keys, fields = store.clients.to_arrays()
+        arrays['features/keys'] = keys
+        arrays.update({f"features/{k}": v for k, v in fields.items()})
+        meta['feature_store'] = {'last_day': int(store.last_day), 'version': store.version}
+    if clients is not None:
+        meta['clients'] = _encode_frame('clients', clients.reset_index(drop=True), arrays)
+
+    arena = SharedArena.create(arrays, meta, name=name, path=path)
+    logger.info("Арена %s: %d масива, %.1f MB", path or arena.name, len(arrays), arena.nbytes / 1e6)
+    return arena
+
+
+def attach_system(name: str = None, path: str = None):
+    """
+    Закача се към арена от export_system и връща (RecommendationSystem, clients, arena).
+    arena трябва да живее, докато се ползва системата. Промени в каталога и признаците
+    (apply_catalog_delta, feature_store.update) засягат само този процес – данните в
+    арената не се променят; за всички процеси се публикува нова арена.
+    """
+    from eligibility import EligibilityIndex
+    from feature_store import ClientFeatureStore, _AggregateTable
+    from linear_scorer import LinearScorer
+    from offer_catalog import CatalogSnapshot, OfferCatalog
+    from recommendation_engine import RecommendationSystem
+
+    arena = SharedArena.attach(name=name, path=path)
+    meta = arena.meta
+    offers = _decode_frame('offers', meta['catalog']['columns'], arena)
+    eligibility = EligibilityIndex.from_state(
+        {k: arena[f"eligibility/{k}"] for k in EligibilityIndex.STATE_ARRAYS if f"eligibility/{k}" in arena.arrays},
+        meta['eligibility'])
+    snapshot = CatalogSnapshot(offers, meta['catalog']['version'], eligibility, meta['catalog']['max_profit'])
+    scorer = LinearScorer(arena['model/weights'], meta['model']['intercept'], meta['model']['feature_columns'])
+
+    store = None
+    if 'feature_store' in meta:
+        # client × category не участва в оценяването и не се записва
+        store = ClientFeatureStore(offers)
+        store.clients = _AggregateTable.from_arrays(
+            arena['features/keys'], {k: arena[f"features/{k}"] for k in _AggregateTable.FIELDS + ('last_day',)})
+        store.last_day = meta['feature_store']['last_day']
+        store.version = meta['feature_store']['version']
+
+    clients = _decode_frame('clients', meta['clients'], arena) if 'clients' in meta else None
+    system = RecommendationSystem(scorer, None, OfferCatalog.from_snapshot(snapshot), store)
+    return system, clients, arena
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Записва каталога, модела и признаците в споделена памет")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--name', default=SHARED_ARENA_CONFIG['name'], help="име на споделената памет")
+    target.add_argument('--file', help="memory-mapped файл вместо споделена памет")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from recommendation_service import load_system
+    system, clients, model_key = load_system()
+    if args.file:
+        export_system(system, clients, model_key, path=args.file).close()
+        return
+    arena = export_system(system, clients, model_key, name=args.name)
+    # споделената памет живее, докато собственикът не я изтрие
+    logger.info("Арената %s е готова; Ctrl+C я изтрива", arena.name)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        arena.unlink()
+        arena.close()
+
+
+if __name__ == '__main__':
+    main()
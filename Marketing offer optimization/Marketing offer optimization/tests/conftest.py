@@ -0,0 +1,45 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# модулите са плоски в директорията на пакета, без инсталиране
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_datas import generate_clients, generate_history, generate_offers  # noqa: E402
+
+NUM_CLIENTS = 300
+NUM_OFFERS = 60
+NUM_HISTORY = 4000
+
+
+@pytest.fixture(scope='session')
+def data():
+    """Малки генерирани таблици (clients, offers, history) с фиксиран seed."""
+    client_rng, offer_rng, history_rng = (np.random.default_rng(s) for s in np.random.SeedSequence(7).spawn(3))
+    clients = generate_clients(client_rng, 1, NUM_CLIENTS)
+    offers = generate_offers(offer_rng, 1, NUM_OFFERS)
+    history = generate_history(history_rng, NUM_CLIENTS, NUM_OFFERS, NUM_HISTORY)
+    return clients, offers, history
+
+
+@pytest.fixture(scope='session')
+def pipeline(data):
+    """Scaler -> PCA -> LogisticRegression, обучен с фиксирани параметри (без търсене)."""
+    from model_trainer import ModelTrainer
+
+    clients, offers, history = data
+    trainer = ModelTrainer(clients, offers, history.copy())
+    return trainer.fit_params({'pca__n_components': 5, 'lr__C': 1})
+
+
+@pytest.fixture
+def system(data, pipeline):
+    from feature_store import ClientFeatureStore
+    from linear_scorer import LinearScorer
+    from recommendation_engine import RecommendationSystem
+
+    clients, offers, history = data
+    return RecommendationSystem(LinearScorer.from_pipeline(pipeline), None, offers,
+                                ClientFeatureStore.from_history(history, offers))
@@ -0,0 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from batch_recommendations import iter_batch_recommendations
+
+
+def _batch(system, clients, budget, n_jobs):
+    return pd.concat(iter_batch_recommendations(system, clients, budget, top_n=2, n_jobs=n_jobs, shard_size=40),
+                     ignore_index=True)
+
+
+def test_concurrent_batches_keep_their_own_state(system, data):
+    clients = data[0]
+    requests = [(clients.iloc[:150], 1500.0), (clients.iloc[150:], 4000.0)]
+    expected = [_batch(system, c, budget, n_jobs=1) for c, budget in requests]
+
+    with ThreadPoolExecutor(len(requests)) as executor:
+        for _ in range(3):
+            futures = [executor.submit(_batch, system, c, budget, 2) for c, budget in requests]
+            for future, frame in zip(futures, expected):
+                pd.testing.assert_frame_equal(future.result(), frame)
+
+
+def test_parallel_matches_single_process(system, data):
+    clients = data[0]
+    budgets = np.random.default_rng(0).uniform(0, 5000, size=len(clients))
+    single = _batch(system, clients, budgets, n_jobs=1)
+    assert not single.empty
+    pd.testing.assert_frame_equal(_batch(system, clients, budgets, n_jobs=3), single)
+    assert (single['rank'] < 2).all()
@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+
+BACKENDS = ['highs', 'cbc', 'lagrangian', 'flow']
+
+
+def _skip_missing(backend):
+    if backend == 'cbc':
+        pytest.importorskip('pulp')
+
+
+@pytest.mark.parametrize('polish', [True, False])
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_optimize_campaign_accepts_polish(system, data, backend, polish):
+    _skip_missing(backend)
+    clients = data[0]
+    assignments = system.optimize_campaign(clients, 5000, backend=backend, polish=polish)
+
+    assert assignments['price'].sum() <= 5000
+    assert assignments['client_id'].is_unique
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_budget_sweep_accepts_polish(system, data, backend):
+    _skip_missing(backend)
+    sweep = system.budget_sweep(data[0], [2000, 5000], backend=backend, polish=False)
+
+    assert list(sweep['budget']) == [2000, 5000]
+    assert (sweep['total_cost'] <= sweep['budget']).all()
+
+
+def test_constraint_count_includes_capacity_rows():
+    from campaign_solvers import CampaignProblem
+
+    problem = CampaignProblem([1.0, 2.0, 3.0, 1.5], [10, 20, 30, 15], [0, 0, 1, 2], 40,
+                              offer_codes=[0, 1, 1, 2], capacities=[np.inf, 1, 2])
+    A, lb, ub = problem.constraint_matrix()
+    assert problem.n_constraints == A.shape[0] == len(ub) == 3 + 2 + 1
+
+
+def _random_problem(seed, n_clients, n_offers=8, per_client=3, capacities=False):
+    """Случайна кампания: всеки клиент има per_client различни оферти с цена на офертата."""
+    from campaign_solvers import CampaignProblem
+
+    rng = np.random.default_rng(seed)
+    offer_prices = rng.integers(50, 500, size=n_offers).astype(float)
+    offer_codes = np.concatenate([rng.choice(n_offers, per_client, replace=False) for _ in range(n_clients)])
+    client_codes = np.repeat(np.arange(n_clients), per_client)
+    scores = rng.uniform(0.1, 1.0, size=len(offer_codes))
+    budget = 0.4 * offer_prices[offer_codes].reshape(n_clients, per_client).min(axis=1).sum()
+    caps = None
+    if capacities:
+        caps = np.where(rng.random(n_offers) < 0.5, rng.integers(1, max(2, n_clients // 4), size=n_offers), np.inf)
+    return CampaignProblem(scores, offer_prices[offer_codes], client_codes, budget, offer_codes, caps)
+
+
+def _brute_force(problem):
+    """Оптимумът чрез изброяване на всички избори (по един или нито един кандидат на клиент)."""
+    import itertools
+
+    groups = [np.flatnonzero(problem.client_codes == c) for c in range(problem.n_clients)]
+    best = 0.0
+    for choice in itertools.product(*[[None, *g] for g in groups]):
+        selected = np.zeros(problem.n_vars, dtype=bool)
+        selected[[i for i in choice if i is not None]] = True
+        if problem.is_feasible(selected):
+            best = max(best, problem.objective(selected))
+    return best
+
+
+@pytest.mark.parametrize('capacities', [False, True])
+@pytest.mark.parametrize('seed', range(3))
+def test_exact_backends_find_brute_force_optimum(seed, capacities):
+    from campaign_solvers import solve_campaign
+
+    problem = _random_problem(seed, n_clients=6, capacities=capacities)
+    optimum = _brute_force(problem)
+    for backend in ('highs', 'cbc'):
+        _skip_missing(backend)
+        result = solve_campaign(problem, backend, mip_gap=0.0)
+        assert problem.is_feasible(result.selected)
+        assert result.objective == pytest.approx(optimum, abs=1e-9), backend
+
+
+@pytest.mark.parametrize('capacities', [False, True])
+@pytest.mark.parametrize('seed', range(3))
+def test_highs_and_cbc_objective_parity(seed, capacities):
+    from campaign_solvers import solve_campaign
+
+    pytest.importorskip('pulp')
+    problem = _random_problem(seed, n_clients=60, capacities=capacities)
+    highs = solve_campaign(problem, 'highs', mip_gap=0.0)
+    cbc = solve_campaign(problem, 'cbc', mip_gap=0.0)
+    assert highs.status == cbc.status == 'optimal'
+    assert highs.objective == pytest.approx(cbc.objective, abs=1e-6)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_lagrangian_is_feasible_and_bounded(seed):
+    from campaign_solvers import LagrangianBackend, solve_campaign
+
+    problem = _random_problem(seed, n_clients=200, per_client=4)
+    optimum = solve_campaign(problem, 'highs', mip_gap=0.0).objective
+    plain = LagrangianBackend(polish=False).solve(problem, warm_start=False)
+    polished = LagrangianBackend(polish=True).solve(problem, warm_start=False)
+
+    for result in (plain, polished):
+        assert problem.is_feasible(result.selected)
+        assert result.objective <= optimum + 1e-9
+        assert result.bound >= optimum - 1e-6
+    assert polished.objective >= plain.objective - 1e-9
+    # евристиката е близо до оптимума при много клиенти
+    assert plain.objective >= 0.95 * optimum
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_flow_respects_capacities_and_is_bounded(seed):
+    from campaign_solvers import FlowBackend, LagrangianBackend, solve_campaign
+
+    problem = _random_problem(seed, n_clients=200, per_client=4, capacities=True)
+    assert problem.has_capacities
+    optimum = solve_campaign(problem, 'highs', mip_gap=0.0).objective
+    for result in (FlowBackend().solve(problem, warm_start=False),
+                   LagrangianBackend().solve(problem, warm_start=False)):
+        assert result.backend == 'flow'
+        assert problem.is_feasible(result.selected)
+        assert result.objective <= optimum + 1e-9
+        assert result.bound >= optimum - 1e-6
+        assert result.objective >= 0.9 * optimum
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from campaign_solvers import CampaignProblem, solve_campaign
+from candidate_pruning import prune_candidates
+
+
+def _candidates(seed, n_clients=150, per_client=12):
+    """Всеки клиент има per_client кандидата с различни цени и оценки."""
+    rng = np.random.default_rng(seed)
+    client_codes = np.repeat(np.arange(n_clients), per_client)
+    prices = rng.integers(20, 800, size=len(client_codes)).astype(float)
+    scores = rng.uniform(0.05, 1.0, size=len(client_codes))
+    return prices, scores, client_codes, 0.3 * prices.sum() / per_client
+
+
+def _optimum(prices, scores, client_codes, budget, mode):
+    keep = prune_candidates(prices, scores, client_codes, mode)
+    problem = CampaignProblem(scores[keep], prices[keep], client_codes[keep], budget)
+    result = solve_campaign(problem, 'highs', mip_gap=0.0)
+    assert result.status == 'optimal'
+    assert problem.is_feasible(result.selected)
+    return result.objective, keep.sum()
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_exact_pruning_keeps_the_optimum(seed):
+    prices, scores, client_codes, budget = _candidates(seed)
+    full, n_full = _optimum(prices, scores, client_codes, budget, 'none')
+    exact, n_exact = _optimum(prices, scores, client_codes, budget, 'exact')
+    hull, n_hull = _optimum(prices, scores, client_codes, budget, 'hull')
+
+    assert n_hull <= n_exact < n_full
+    assert exact == pytest.approx(full, abs=1e-6)
+    assert hull <= full + 1e-6
+
+
+def test_solve_candidates_prune_modes(system, data):
+    candidates = system.campaign_candidates(data[0])
+    objectives = {}
+    for prune in ('none', 'exact', 'hull'):
+        assignments = system.solve_candidates(candidates, 5000, backend='highs', mip_gap=0.0,
+                                              warm_start=False, prune=prune)
+        objectives[prune] = assignments.attrs['solve']['objective']
+        assert assignments['price'].sum() <= 5000
+
+    assert objectives['exact'] == pytest.approx(objectives['none'], abs=1e-6)
+    assert objectives['hull'] <= objectives['none'] + 1e-6
@@ -0,0 +1,43 @@
+import os
+
+import pandas as pd
+import pytest
+
+from config import DATA_CACHE_CONFIG
+from data_loader import load_table
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    directory = tmp_path / 'cache'
+    monkeypatch.setitem(DATA_CACHE_CONFIG, 'dir', str(directory))
+    return directory
+
+
+def _write_csv(path, df):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_same_file_name_in_different_directories(tmp_path, cache_dir):
+    first = _write_csv(tmp_path / 'a' / 'clients.csv', pd.DataFrame({'client_id': [1, 2], 'gender': ['M', 'F']}))
+    second = _write_csv(tmp_path / 'b' / 'clients.csv', pd.DataFrame({'client_id': [7, 8, 9], 'gender': 'F'}))
+
+    for _ in range(2):
+        assert load_table(first)['client_id'].tolist() == [1, 2]
+        assert load_table(second)['client_id'].tolist() == [7, 8, 9]
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_changed_file_replaces_cached_version(tmp_path, cache_dir):
+    path = _write_csv(tmp_path / 'offers.csv', pd.DataFrame({'offer_id': [1], 'category': ['Books']}))
+    load_table(path)
+    _write_csv(tmp_path / 'offers.csv', pd.DataFrame({'offer_id': [1, 2], 'category': ['Books', 'Toys']}))
+
+    df = load_table(path)
+    assert df['offer_id'].tolist() == [1, 2]
+    assert df['category'].astype(object).tolist() == ['Books', 'Toys']
+    # една версия на кеша, без остатъци от временни директории
+    [entry] = os.listdir(cache_dir)
+    assert len(os.listdir(cache_dir / entry)) == 1
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from eligibility import EligibilityIndex
+from recommendation_engine import RecommendationSystem
+
+
+def _edge_cases(clients, offers):
+    """Празни ограничения в офертите и пол/категории на клиенти, които каталогът не познава."""
+    offers = offers.copy()
+    offers['min_age'] = offers['min_age'].astype(float)
+    offers['price'] = offers['price'].astype(float)
+    offers.loc[offers.index[:3], 'min_age'] = np.nan
+    offers.loc[offers.index[3:5], 'price'] = np.nan
+    offers.loc[offers.index[5], 'category'] = None
+    clients = clients.copy()
+    clients.loc[clients.index[:5], 'gender'] = 'X'
+    clients.loc[clients.index[5:10], 'preferred_category'] = 'Unknown, Books'
+    clients.loc[clients.index[10:15], 'preferred_category'] = ''
+    return clients, offers
+
+
+def _many_categories(offers):
+    """Над 64 категории: индексът минава от битови маски към проверка по кодове."""
+    offers = offers.copy()
+    offers['category'] = [f'C{i % 70}' for i in range(len(offers))]
+    return offers
+
+
+def _expected_matrix(clients, offers, budgets):
+    system = RecommendationSystem(None, None, offers)
+    offer_items = offers.to_dict(orient='records')
+    matrix = np.zeros((len(clients), len(offers)), dtype=bool)
+    for i, client in enumerate(clients.to_dict(orient='records')):
+        client['budget'] = budgets[i]
+        matrix[i] = [system.is_offer_eligible(item, client) for item in offer_items]
+    return matrix
+
+
+@pytest.mark.parametrize('case', ['generated', 'edge_cases', 'many_categories'])
+def test_index_matches_is_offer_eligible(data, case):
+    clients, offers = data[0].iloc[:150], data[1]
+    if case == 'edge_cases':
+        clients, offers = _edge_cases(clients, offers)
+    elif case == 'many_categories':
+        offers = _many_categories(offers)
+        clients = clients.assign(preferred_category=[f'C{i % 75}, C{i % 3}' for i in range(len(clients))])
+    budgets = np.random.default_rng(0).uniform(0, 5000, size=len(clients))
+    expected = _expected_matrix(clients, offers, budgets)
+    assert expected.any() and not expected.all()
+    index = EligibilityIndex(offers)
+
+    np.testing.assert_array_equal(index.eligibility_matrix(clients, budgets), expected)
+    for i, client in enumerate(clients.to_dict(orient='records')):
+        client['budget'] = budgets[i]
+        np.testing.assert_array_equal(index.eligible_offers(client), np.flatnonzero(expected[i]))
+    rows, cols = map(np.concatenate, zip(*index.eligible_pairs(clients, budgets, chunk_size=40)))
+    np.testing.assert_array_equal(np.column_stack([rows, cols]), np.argwhere(expected))
+
+
+def test_updated_index_matches_rebuild(data):
+    clients, offers = data[0].iloc[:100], data[1]
+    system = RecommendationSystem(None, None, offers)
+    new_offer = offers.iloc[[0]].assign(offer_id=offers['offer_id'].max() + 1, target_gender='M',
+                                        category='Unknown')
+    system.apply_catalog_delta(add=new_offer.to_dict(orient='records'),
+                               update=[{'offer_id': int(offers['offer_id'].iloc[1]), 'price': 10.0}],
+                               retire=[int(offers['offer_id'].iloc[2])])
+
+    budgets = np.full(len(clients), 3000.0)
+    rebuilt = EligibilityIndex(system.offers)
+    np.testing.assert_array_equal(system.eligibility.eligibility_matrix(clients, budgets),
+                                  rebuilt.eligibility_matrix(clients, budgets))
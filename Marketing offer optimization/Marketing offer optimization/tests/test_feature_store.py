@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_store import ClientFeatureStore
+
+
+def _assert_same_features(store, expected, client_ids, categories):
+    assert store.last_day == expected.last_day
+    for got, want in ((store.client_features(client_ids), expected.client_features(client_ids)),
+                      (store.client_category_features(client_ids, categories),
+                       expected.client_category_features(client_ids, categories))):
+        assert got.keys() == want.keys()
+        for name in want:
+            np.testing.assert_allclose(got[name], want[name], err_msg=name)
+
+
+@pytest.mark.parametrize('n_deltas', [1, 4])
+def test_update_matches_rebuild(data, n_deltas):
+    clients, offers, history = data
+    base, rest = history.iloc[:1000], history.iloc[1000:]
+    store = ClientFeatureStore.from_history(base, offers)
+    for delta in np.array_split(np.arange(len(rest)), n_deltas):
+        store.update(rest.iloc[delta])
+    expected = ClientFeatureStore.from_history(history, offers)
+
+    # всички двойки клиент × категория плюс непознат клиент
+    categories = offers['category'].unique()
+    client_ids = np.repeat(np.append(clients['client_id'].to_numpy(), -1), len(categories))
+    _assert_same_features(store, expected, client_ids, np.tile(categories, len(clients) + 1))
+    assert store.version == n_deltas
+
+
+def test_update_with_unknown_offers_only(data):
+    offers, history = data[1], data[2]
+    store = ClientFeatureStore.from_history(history.iloc[:100], offers)
+    delta = history.iloc[100:102].assign(offer_id=-1, transaction_date='2099-01-01')
+    store.update(delta)
+
+    expected = ClientFeatureStore.from_history(pd.concat([history.iloc[:100], delta]), offers)
+    assert store.reference_date == pd.Timestamp('2099-01-01')
+    client_ids = delta['client_id'].to_numpy()
+    _assert_same_features(store, expected, client_ids, np.full(len(client_ids), offers['category'].iloc[0]))
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from incremental_trainer import IncrementalModelTrainer
+from model_registry import ModelRegistry, update_incremental
+from model_trainer import ModelTrainer
+
+
+def _late_delta(history):
+    """Закъснели редове: делта без най-новата дата в историята."""
+    dates = pd.to_datetime(history['transaction_date'])
+    late = (np.random.default_rng(0).random(len(history)) < 0.3) & (dates < dates.max())
+    return history[~late], history[late]
+
+
+def test_update_features_match_full_training(data, tmp_path, monkeypatch):
+    clients, offers, history = data
+    first, delta = _late_delta(history)
+    seen = []
+    features_for = IncrementalModelTrainer.features_for
+
+    def recording(self, new_history):
+        seen.append(features_for(self, new_history))
+        return seen[-1]
+
+    monkeypatch.setattr(IncrementalModelTrainer, 'features_for', recording)
+    registry = ModelRegistry(str(tmp_path))
+    update_incremental(registry, clients, offers, first, line='line')
+    update_incremental(registry, clients, offers, delta, line='line')
+
+    features, labels = ModelTrainer(clients, offers, history).preprocess_data()
+    rows = history.index.get_indexer(delta.index)
+    known = labels.notna().to_numpy()[rows]
+    X, y = seen[-1]
+    np.testing.assert_allclose(X, features.to_numpy(dtype=float)[rows][known])
+    np.testing.assert_array_equal(y, labels.to_numpy()[rows][known].astype(int))
+    _, metadata = registry.load_version('line')
+    assert metadata['reference_date'] == str(pd.to_datetime(history['transaction_date']).max().date())
@@ -0,0 +1,29 @@
+import numpy as np
+
+from linear_scorer import LinearScorer
+from model_trainer import ModelTrainer
+
+
+def test_linear_scorer_matches_pipeline(data, pipeline, tmp_path):
+    clients, offers, history = data
+    features, _ = ModelTrainer(clients, offers, history.copy()).preprocess_data()
+
+    path = tmp_path / 'linear_scorer.npz'
+    LinearScorer.from_pipeline(pipeline).save(path)
+    scorer = LinearScorer.load(path)
+
+    p_sk = pipeline.predict_proba(features)[:, 1]
+    p_lin = scorer.predict_proba(features.to_numpy())[:, 1]
+    assert scorer.feature_columns == list(features.columns)
+    assert np.max(np.abs(p_lin - p_sk)) < 1e-9
+
+
+def test_linear_scorer_folds_whitened_pca(data):
+    clients, offers, history = data
+    trainer = ModelTrainer(clients, offers, history.copy())
+    features, labels = trainer.preprocess_data()
+    pipeline = trainer.build_pipeline().set_params(pca__n_components=7, pca__whiten=True, lr__C=0.1)
+    pipeline.fit(features, labels)
+
+    p_lin = LinearScorer.from_pipeline(pipeline).predict_proba(features.to_numpy())[:, 1]
+    assert np.max(np.abs(p_lin - pipeline.predict_proba(features)[:, 1])) < 1e-9
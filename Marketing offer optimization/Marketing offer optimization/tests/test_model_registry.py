@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+from sklearn.base import clone
+
+import model_registry
+from model_registry import CURRENT_POINTER, ModelRegistry
+
+
+def test_resave_replaces_the_whole_entry(data, pipeline, tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    registry.save('key', pipeline, {'lr__C': 1}, [0.5, 0.6])
+    first = registry.load_scorer('key')
+
+    retrained = clone(pipeline).set_params(lr__C=0.01).fit(*_features(data))
+    registry.save('key', retrained, {'lr__C': 0.01}, [0.7])
+
+    assert os.listdir(tmp_path) == ['key']
+    # текущият и предишният запис плюс указателя; по-старите записи се трият
+    registry.save('key', pipeline, {'lr__C': 1}, [0.5])
+    entries = sorted(os.listdir(tmp_path / 'key'))
+    assert len(entries) == 3 and CURRENT_POINTER in entries
+    assert registry.load_metadata('key')['best_params'] == {'lr__C': 1}
+    registry.save('key', retrained, {'lr__C': 0.01}, [0.7])
+    assert registry.load_metadata('key')['best_params'] == {'lr__C': 0.01}
+    assert not np.allclose(registry.load_scorer('key').weights, first.weights)
+    np.testing.assert_allclose(registry.load_pipeline('key').named_steps['lr'].coef_,
+                               retrained.named_steps['lr'].coef_)
+
+
+def test_versions_are_complete_entries(pipeline, tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    assert [registry.save_version('line', pipeline, {'rows_seen': n}) for n in (10, 20)] == [1, 2]
+
+    assert registry.versions('line') == [1, 2]
+    model, metadata = registry.load_version('line')
+    assert metadata['rows_seen'] == 20
+    assert sorted(os.listdir(tmp_path / 'line')) == ['v0001', 'v0002']
+
+
+def _features(data):
+    from model_trainer import ModelTrainer
+
+    clients, offers, history = data
+    return ModelTrainer(clients, offers, history.copy()).preprocess_data()
+
+
+def test_fingerprint_reuses_digest_of_unchanged_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, '_FILE_DIGESTS', {})
+    path = tmp_path / 'clients.csv'
+    path.write_text('client_id\n1\n')
+    registry = ModelRegistry(str(tmp_path))
+    first = registry.fingerprint({'clients': str(path)})
+    assert registry.fingerprint({'clients': str(path)}) == first
+    assert len(model_registry._FILE_DIGESTS) == 1
+
+    path.write_text('client_id\n1\n2\n')
+    assert registry.fingerprint({'clients': str(path)}) != first
+    assert len(model_registry._FILE_DIGESTS) == 2
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from eligibility import EligibilityIndex
+from offer_catalog import OfferCatalog
+
+
+def test_update_with_mixed_keys_changes_only_given_cells(data):
+    clients, offers = data[0], data[1]
+    catalog = OfferCatalog(offers)
+    first, second = offers['offer_id'].iloc[:2]
+    catalog.apply_delta(update=[{'offer_id': first, 'price': 10.0},
+                                {'offer_id': second, 'estimated_profit': 1e6}])
+
+    new = catalog.snapshot().offers.set_index('offer_id')
+    expected = offers.set_index('offer_id').astype({'price': float})
+    expected.loc[first, 'price'] = 10.0
+    expected.loc[second, 'estimated_profit'] = 1e6
+    pd.testing.assert_frame_equal(new, expected, check_dtype=False)
+    assert catalog.snapshot().max_profit == 1e6
+
+    budgets = np.full(len(clients), 3000.0)
+    np.testing.assert_array_equal(catalog.snapshot().eligibility.eligibility_matrix(clients, budgets),
+                                  EligibilityIndex(catalog.snapshot().offers).eligibility_matrix(clients, budgets))
@@ -0,0 +1,30 @@
+import gc
+
+import numpy as np
+
+from linear_scorer import LinearScorer
+
+
+def test_new_model_invalidates_candidate_cache(system, data):
+    clients = data[0].iloc[:100]
+    first = system.campaign_candidates(clients)
+    assert system.campaign_candidates(clients) is first
+
+    weights = system.model.weights
+    for scale in (2.0, 3.0):
+        # старият модел се освобождава, така че новият може да получи същия id()
+        system.model = LinearScorer(weights * scale, 0.0)
+        gc.collect()
+        candidates = system.campaign_candidates(clients)
+        assert candidates is not first
+        assert not np.allclose(candidates.frame['propensity'], first.frame['propensity'])
+        first = candidates
+
+
+def test_new_feature_store_invalidates_candidate_cache(system, data):
+    from feature_store import ClientFeatureStore
+
+    clients, offers, history = data
+    first = system.campaign_candidates(clients.iloc[:100])
+    system.feature_store = ClientFeatureStore.from_history(history.iloc[:10], offers)
+    assert system.campaign_candidates(clients.iloc[:100]) is not first
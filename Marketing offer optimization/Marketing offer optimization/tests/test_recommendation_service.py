@@ -0,0 +1,111 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+from config import SERVICE_CONFIG
+from recommendation_service import BadRequest, RecommendationService
+
+
+def _client(**overrides):
+    client = {'client_id': 1, 'age': 35, 'gender': 'F', 'income': 80000, 'previous_purchases': 5,
+              'preferred_category': None, 'budget': 3000}
+    client.update(overrides)
+    return client
+
+
+def _run(service, scenario):
+    async def main():
+        await service.start()
+        try:
+            return await scenario()
+        finally:
+            await service.stop()
+    return asyncio.run(main())
+
+
+def test_bad_request_does_not_fail_its_batch(system, data):
+    service = RecommendationService(system, data[0])
+    bodies = [{'client': _client(client_id=i)} for i in range(1, 6)]
+    bodies[2] = {'client': _client(age='abc')}
+
+    async def scenario():
+        calls = (service.dispatch('POST', '/recommend', json.dumps(body).encode()) for body in bodies)
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = _run(service, scenario)
+    assert isinstance(results[2], BadRequest)
+    for i in (0, 1, 3, 4):
+        status, payload = results[i]
+        assert status == HTTPStatus.OK
+        assert len(payload['offers']) == 1
+
+
+def test_failed_batch_is_retried_per_request(system, data):
+    service = RecommendationService(system, data[0])
+    requests = [{'client': _client(client_id=i), 'top_n': 2} for i in range(1, 4)]
+    # в обход на проверката в recommend(): recommend_many отказва цялата партида
+    requests[1]['top_n'] = 0
+
+    async def scenario():
+        return await asyncio.gather(*(service.batcher.submit(r) for r in requests), return_exceptions=True)
+
+    results = _run(service, scenario)
+    assert isinstance(results[1], ValueError)
+    assert len(results[0]) == 2 and len(results[2]) == 2
+
+
+@pytest.mark.parametrize('top_n', [0, -1, 1.5, 'two'])
+def test_invalid_top_n_is_rejected(system, data, top_n):
+    service = RecommendationService(system, data[0])
+    with pytest.raises(BadRequest):
+        _run(service, lambda: service.recommend({'client': _client(), 'top_n': top_n}))
+
+
+def test_finished_jobs_are_evicted(system, data, monkeypatch):
+    monkeypatch.setitem(SERVICE_CONFIG, 'max_finished_jobs', 2)
+    service = RecommendationService(system, data[0])
+
+    async def scenario():
+        job_ids = [service.submit_campaign({'total_budget': 1000 * i, 'client_ids': list(range(1, 30))})['job_id']
+                   for i in range(1, 5)]
+        while any(job['status'] not in ('done', 'failed') for job in service.jobs.values()):
+            await asyncio.sleep(0.01)
+        return job_ids
+
+    job_ids = _run(service, scenario)
+    assert list(service.jobs) == job_ids[-2:]
+    assert all(job['status'] == 'done' for job in service.jobs.values())
+
+
+@pytest.mark.parametrize('backend', ['highs', 'lagrangian'])
+def test_campaign_endpoint_accepts_polish(system, data, backend):
+    service = RecommendationService(system, data[0])
+    body = {'total_budget': 3000, 'client_ids': list(range(1, 50)), 'backend': backend, 'polish': True}
+
+    async def scenario():
+        status, payload = await service.dispatch('POST', '/campaign', json.dumps(body).encode())
+        assert status == HTTPStatus.ACCEPTED
+        while service.jobs[payload['job_id']]['status'] not in ('done', 'failed'):
+            await asyncio.sleep(0.01)
+        return service.jobs[payload['job_id']]
+
+    job = _run(service, scenario)
+    assert job['status'] == 'done', job.get('error')
+
+
+@pytest.mark.parametrize('body', [{}, {'total_budget': None}, {'total_budget': 'abc'}, {'total_budget': -5},
+                                  {'total_budget': 1000, 'backend': 'nope'},
+                                  {'total_budget': 1000, 'polish': 'yes'},
+                                  {'total_budget': 1000, 'clients': [{'client_id': 1}]},
+                                  {'total_budget': 1000, 'client_ids': 7}])
+def test_bad_campaign_request_creates_no_job(system, data, body):
+    service = RecommendationService(system, data[0])
+
+    async def scenario():
+        with pytest.raises(BadRequest):
+            await service.dispatch('POST', '/campaign', json.dumps(body).encode())
+
+    _run(service, scenario)
+    assert service.jobs == {}
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from shared_arena import SharedArena, attach_system, export_system
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _batch(system, clients):
+    return pd.concat(system.get_recommendations_batch(clients, budgets=3000.0, top_n=2, n_jobs=1),
+                     ignore_index=True)
+
+
+def test_attached_process_does_not_delete_the_arena(system, data):
+    clients = data[0]
+    name = f"moo_test_{uuid.uuid4().hex[:12]}"
+    owner = export_system(system, clients, name=name)
+    try:
+        # закаченият процес излиза; паметта трябва да остане за останалите
+        script = f"from shared_arena import SharedArena\nSharedArena.attach(name={name!r}).close()\n"
+        subprocess.run([sys.executable, '-c', script], cwd=PACKAGE_DIR, check=True)
+
+        attached_system, attached_clients, arena = attach_system(name=name)
+        assert all(not array.flags.writeable for array in arena.arrays.values())
+        pd.testing.assert_frame_equal(attached_clients, clients.reset_index(drop=True), check_dtype=False)
+        pd.testing.assert_frame_equal(_batch(attached_system, clients), _batch(system, clients))
+        del attached_system, attached_clients
+    finally:
+        owner.unlink()
+        owner.close()
+
+
+def test_file_arena_round_trip(tmp_path):
+    arrays = {'a': np.arange(10, dtype=np.int64), 'b': np.linspace(0, 1, 7)}
+    SharedArena.create(arrays, {'kind': 'test'}, path=str(tmp_path / 'arena.bin')).close()
+
+    with SharedArena.attach(path=str(tmp_path / 'arena.bin')) as arena:
+        assert arena.meta['kind'] == 'test'
+        for key, value in arrays.items():
+            np.testing.assert_array_equal(arena[key], value)
+        with pytest.raises(ValueError):
+            arena['a'][0] = 1